@@ -3,7 +3,6 @@
 Quran Segmenter - Generate timed subtitle segments for Quran recitations.
 """
 from .config import Config, get_config
-from .pipeline.orchestrator import QuranSegmenterPipeline
 from .models import VerseRange, ProcessingResult, Segment
 
 __version__ = "1.0.0"
@@ -14,4 +13,12 @@ __all__ = [
     "VerseRange",
     "ProcessingResult",
     "Segment"
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    # The pipeline pulls in requests and the processors; import it on first use
+    if name == "QuranSegmenterPipeline":
+        from .pipeline.orchestrator import QuranSegmenterPipeline
+        return QuranSegmenterPipeline
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
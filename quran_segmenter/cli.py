@@ -3,16 +3,35 @@
 Command-line interface for Quran Segmenter.
 """
 import argparse
-import json
 import sys
 import logging
 from pathlib import Path
 from typing import Optional
 
 from .config import Config, get_config
-from .colab_setup import setup_colab
-from .pipeline.orchestrator import QuranSegmenterPipeline
 from .exceptions import QuranSegmenterError
+from .utils.jsonio import dumps
+
+# Heavy imports resolved on first use so `--help`, `init`, `status` start fast
+_LAZY_IMPORTS = {
+    "QuranSegmenterPipeline": (".pipeline.orchestrator", "QuranSegmenterPipeline"),
+    "setup_colab": (".colab_setup", "setup_colab"),
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        import importlib
+        module_name, attr = _LAZY_IMPORTS[name]
+        value = getattr(importlib.import_module(module_name, __package__), attr)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _lazy(name: str):
+    """Return a lazily imported module attribute (honours monkeypatched globals)."""
+    return globals()[name] if name in globals() else __getattr__(name)
 
 
 def setup_logging(verbose: bool = False):
@@ -38,7 +57,7 @@ def cmd_init(args):
 
 def cmd_register(args):
     """Register a new translation."""
-    pipeline = QuranSegmenterPipeline()
+    pipeline = _lazy("QuranSegmenterPipeline")()
     pipeline.register_translation(
         translation_id=args.id,
         name=args.name,
@@ -52,7 +71,7 @@ def cmd_register(args):
 
 def cmd_list(args):
     """List registered translations."""
-    pipeline = QuranSegmenterPipeline()
+    pipeline = _lazy("QuranSegmenterPipeline")()
     translations = pipeline.list_translations()
     
     if not translations:
@@ -70,7 +89,7 @@ def cmd_list(args):
 
 def cmd_prepare(args):
     """Prepare a translation for processing."""
-    pipeline = QuranSegmenterPipeline()
+    pipeline = _lazy("QuranSegmenterPipeline")()
     
     try:
         status = pipeline.prepare_translation(
@@ -94,7 +113,7 @@ def cmd_prepare(args):
 
 def cmd_process(args):
     """Process audio to generate segments."""
-    pipeline = QuranSegmenterPipeline()
+    pipeline = _lazy("QuranSegmenterPipeline")()
     
     try:
         result = pipeline.process(
@@ -120,8 +139,15 @@ def cmd_process(args):
             print(f"\nOutput saved to: {args.output}")
         else:
             # Print to stdout
-            print("\nOutput:")
-            print(json.dumps(result.to_dict(), indent=2, ensure_ascii=False))
+            print("\nOutput:", flush=True)
+            payload = dumps(result.to_dict(), indent=True) + b"\n"
+            # Notebooks and redirected/captured streams have no binary buffer
+            buffer = getattr(sys.stdout, "buffer", None)
+            if buffer is not None:
+                buffer.write(payload)
+            else:
+                sys.stdout.write(payload.decode("utf-8"))
+            sys.stdout.flush()
             
     finally:
         pipeline.cleanup()
@@ -129,7 +155,7 @@ def cmd_process(args):
 
 def cmd_status(args):
     """Show status of a translation."""
-    pipeline = QuranSegmenterPipeline()
+    pipeline = _lazy("QuranSegmenterPipeline")()
     
     if args.translation:
         status = pipeline.jumlize.get_segmentation_status(args.translation)
@@ -156,14 +182,14 @@ def cmd_clear_cache(args):
     """Clear cached data."""
     from .utils.cache import CacheManager
     config = get_config()
-    cache = CacheManager(config.cache_dir)
+    cache = CacheManager(config.cache_dir, strict=config.lafzize.strict_cache)
     cache.clear(args.category)
     print(f"Cache cleared: {args.category or 'all'}")
 
 
 def cmd_setup_colab(args):
     """Run one-shot Colab bootstrap (installs deps and wires env)."""
-    setup_colab(
+    _lazy("setup_colab")(
         words_path=args.words,
         metadata_path=args.metadata,
         config_path=args.config,
@@ -172,6 +198,7 @@ def cmd_setup_colab(args):
         lafzize_repo=args.lafzize_repo,
         go_url=args.go_url,
         jumlize_ref=args.jumlize_ref,
+        cache_dir=args.cache_dir,
     )
 
 
@@ -250,6 +277,9 @@ def main():
                          help="Go tarball URL for Colab")
     p_colab.add_argument("--jumlize-ref", default="git.sr.ht/~rehandaphedar/jumlize/v3@latest",
                          help="jumlize go install ref")
+    p_colab.add_argument("--cache-dir", default=None,
+                         help="Persistent directory (e.g. on Drive) to reuse the Go tarball and "
+                              "jumlize binary across sessions")
     p_colab.set_defaults(func=cmd_setup_colab)
     
     args = parser.parse_args()
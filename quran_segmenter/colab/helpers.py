@@ -2,16 +2,32 @@
 """
 Helper functions specifically for Google Colab environment.
 """
+import asyncio
 import os
 import sys
-import shutil
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 import logging
 
+from ..utils.jsonio import read_json, write_json
+from ..utils.storage import link_or_copy, sync_path, sync_path_async
+
 logger = logging.getLogger(__name__)
 
 
+try:
+    from google.colab import drive as _colab_drive, files as _colab_files
+except ImportError:
+    _colab_drive = _colab_files = None
+
+
+def _require_colab_files():
+    """Return google.colab.files, or raise when not running inside Colab."""
+    if _colab_files is None:
+        raise RuntimeError("google.colab is not available (not running in Colab)")
+    return _colab_files
+
+
 class ColabEnvironment:
     """
     Manages the Colab environment setup and state.
@@ -68,12 +84,9 @@ class ColabEnvironment:
         # Sync from Drive if available
         env._sync_from_drive()
         
-        # Initialize configuration
+        # Initialize configuration and detect existing assets
         env._init_config()
         
-        # Detect existing assets
-        env._config.detect_existing_assets()
-        
         # Copy required data files
         env._setup_data_files()
         
@@ -84,20 +97,19 @@ class ColabEnvironment:
     
     def _mount_drive(self):
         """Mount Google Drive."""
+        if _colab_drive is None:
+            print("⚠ Not in Colab, skipping Drive mount")
+            return
         try:
-            from google.colab import drive
-            
             drive_mount = Path("/content/drive")
             if not (drive_mount / "MyDrive").exists():
                 print("\nMounting Google Drive...")
-                drive.mount(str(drive_mount))
+                _colab_drive.mount(str(drive_mount))
             
             self.drive_data_dir = drive_mount / "MyDrive" / self.drive_folder
             self.drive_data_dir.mkdir(parents=True, exist_ok=True)
             print(f"✓ Google Drive mounted at: {self.drive_data_dir}")
             
-        except ImportError:
-            print("⚠ Not in Colab, skipping Drive mount")
         except Exception as e:
             print(f"⚠ Could not mount Drive: {e}")
     
@@ -108,29 +120,17 @@ class ColabEnvironment:
         
         print("\nSyncing from Google Drive...")
         
-        # Items to sync
+        # Items to sync (only missing or newer files are copied)
         sync_items = ["config.json", "embeddings", "translations"]
         synced = 0
         
+        state = self._load_sync_state()
+        watermarks = state.setdefault("from_drive", {})
         for item in sync_items:
-            src = self.drive_data_dir / item
-            dst = self.data_dir / item
-            
-            if src.exists():
-                if src.is_file():
-                    dst.parent.mkdir(parents=True, exist_ok=True)
-                    # Only copy if newer or doesn't exist
-                    if not dst.exists() or src.stat().st_mtime > dst.stat().st_mtime:
-                        shutil.copy2(src, dst)
-                        synced += 1
-                elif src.is_dir():
-                    dst.mkdir(parents=True, exist_ok=True)
-                    for f in src.iterdir():
-                        fdst = dst / f.name
-                        if not fdst.exists() or f.stat().st_mtime > fdst.stat().st_mtime:
-                            if f.is_file():
-                                shutil.copy2(f, fdst)
-                                synced += 1
+            synced += sync_path(
+                self.drive_data_dir / item, self.data_dir / item, watermarks=watermarks
+            )
+        self._save_sync_state(state)
         
         if synced > 0:
             print(f"✓ Synced {synced} items from Drive")
@@ -144,21 +144,54 @@ class ColabEnvironment:
         
         sync_items = ["config.json", "embeddings", "translations"]
         
+        state = self._load_sync_state()
+        watermarks = state.setdefault("to_drive", {})
         for item in sync_items:
-            src = self.data_dir / item
-            dst = self.drive_data_dir / item
-            
-            if src.exists():
-                if src.is_file():
-                    shutil.copy2(src, dst)
-                elif src.is_dir():
-                    dst.mkdir(parents=True, exist_ok=True)
-                    for f in src.iterdir():
-                        if f.is_file():
-                            shutil.copy2(f, dst / f.name)
+            sync_path(self.data_dir / item, self.drive_data_dir / item, watermarks=watermarks)
+        self._save_sync_state(state)
+        
+        print("✓ Synced to Drive")
+    
+    async def sync_to_drive_async(self):
+        """
+        Sync local data to Google Drive from a notebook cell
+        (`await env.sync_to_drive_async()`), overlapping all item copies.
+        """
+        if not self.drive_data_dir:
+            return
+        
+        print("Syncing to Google Drive...")
+        
+        sync_items = ["config.json", "embeddings", "translations"]
+        
+        state = self._load_sync_state()
+        watermarks = state.setdefault("to_drive", {})
+        await asyncio.gather(*(
+            sync_path_async(self.data_dir / item, self.drive_data_dir / item, watermarks=watermarks)
+            for item in sync_items
+        ))
+        self._save_sync_state(state)
         
         print("✓ Synced to Drive")
     
+    @property
+    def _sync_state_path(self) -> Path:
+        return self.data_dir / ".sync_state.json"
+    
+    def _load_sync_state(self) -> dict:
+        """Per-direction {source path: mtime} watermarks from previous syncs."""
+        try:
+            return read_json(self._sync_state_path)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_sync_state(self, state: dict):
+        try:
+            self.data_dir.mkdir(parents=True, exist_ok=True)
+            write_json(self._sync_state_path, state)
+        except OSError as e:
+            logger.warning(f"Could not save sync state: {e}")
+    
     def _init_config(self):
         """Initialize or load configuration."""
         from ..config import Config
@@ -168,40 +201,38 @@ class ColabEnvironment:
             base_dir=self.content_dir
         )
         
-        # Update paths for Colab environment
-        self._config.lafzize_dir = self.content_dir / "lafzize"
-        self._config.rabtize_dir = self.content_dir / "rabtize"
-        self._config.jumlize_binary = self.content_dir / "jumlize"
-        self._config.qpc_words_file = self.content_dir / "qpc-hafs-word-by-word.json"
-        self._config.quran_metadata_file = self.content_dir / "quran-metadata-misc.json"
-        self._config.save()
+        # Update paths for Colab environment (one write for both steps)
+        with self._config.batched_save():
+            self._config.lafzize_dir = self.content_dir / "lafzize"
+            self._config.rabtize_dir = self.content_dir / "rabtize"
+            self._config.jumlize_binary = self.content_dir / "jumlize"
+            self._config.qpc_words_file = self.content_dir / "qpc-hafs-word-by-word.json"
+            self._config.quran_metadata_file = self.content_dir / "quran-metadata-misc.json"
+            self._config.save()
+            self._config.detect_existing_assets()
     
     def _setup_data_files(self):
         """Ensure required data files are in place."""
-        # Files that need to be in lafzize directory
-        lafzize_files = [
-            "qpc-hafs-word-by-word.json",
-            "quran-metadata-misc.json"
+        # Files that need to be in the lafzize and rabtize directories
+        placements = [
+            ("qpc-hafs-word-by-word.json", self._config.lafzize_dir),
+            ("quran-metadata-misc.json", self._config.lafzize_dir),
+            ("qpc-hafs-word-by-word.json", self._config.rabtize_dir),
         ]
         
-        for fname in lafzize_files:
-            src = self.content_dir / fname
-            dst = self._config.lafzize_dir / fname
-            
-            if src.exists() and not dst.exists():
-                shutil.copy(src, dst)
-                print(f"  Copied {fname} to lafzize/")
-        
-        # Files that need to be in rabtize directory  
-        rabtize_files = ["qpc-hafs-word-by-word.json"]
+        # Each source is stat'ed once even when it goes to several directories
+        src_exists: Dict[str, bool] = {}
         
-        for fname in rabtize_files:
-            src = self.content_dir / fname
-            dst = self._config.rabtize_dir / fname
+        for fname, target_dir in placements:
+            if fname not in src_exists:
+                src_exists[fname] = os.path.exists(self.content_dir / fname)
+            if not src_exists[fname]:
+                continue
             
-            if src.exists() and not dst.exists():
-                shutil.copy(src, dst)
-                print(f"  Copied {fname} to rabtize/")
+            dst = target_dir / fname
+            if not os.path.exists(dst):
+                link_or_copy(self.content_dir / fname, dst)
+                print(f"  Linked {fname} into {target_dir.name}/")
     
     @property
     def config(self):
@@ -271,7 +302,7 @@ class ColabEnvironment:
             upload: Whether to upload file interactively
         """
         if upload:
-            from google.colab import files
+            files = _require_colab_files()
             print("Upload your translation JSON file:")
             uploaded = files.upload()
             
@@ -279,22 +310,24 @@ class ColabEnvironment:
                 print("No file uploaded")
                 return
             
-            filename = list(uploaded.keys())[0]
+            filename = next(iter(uploaded))
             file_path = self.content_dir / filename
         
-        if not file_path:
-            # Check if file already exists
-            possible_paths = [
+        if file_path:
+            found = os.path.isfile(file_path)
+        else:
+            # Check if file already exists (first hit wins; one stat each)
+            found = False
+            for p in (
                 self.content_dir / f"{translation_id}.json",
                 self._config.translations_dir / f"{translation_id}.json",
-            ]
-            for p in possible_paths:
-                if p.exists():
-                    file_path = p
+            ):
+                if os.path.isfile(p):
+                    file_path, found = p, True
                     print(f"Found existing file: {p}")
                     break
         
-        if not file_path or not Path(file_path).exists():
+        if not found:
             print(f"✗ No translation file found for {translation_id}")
             print("Either specify file_path or set upload=True")
             return
@@ -367,7 +400,7 @@ class ColabEnvironment:
             upload_audio: Whether to upload audio interactively
         """
         if upload_audio:
-            from google.colab import files
+            files = _require_colab_files()
             print("Upload your audio file (MP3):")
             uploaded = files.upload()
             
@@ -375,7 +408,7 @@ class ColabEnvironment:
                 print("No file uploaded")
                 return None
             
-            audio_path = self.content_dir / list(uploaded.keys())[0]
+            audio_path = self.content_dir / next(iter(uploaded))
         
         audio_path = Path(audio_path)
         if not audio_path.exists():
@@ -419,8 +452,8 @@ class ColabEnvironment:
             if result.verses:
                 print("\nSample output (first verse, first 2 segments):")
                 import json
-                first_key = list(result.verses.keys())[0]
-                sample = {first_key: result.verses[first_key].to_dict()[:2]}
+                first_key = next(iter(result.verses))
+                sample = {first_key: result.verses[first_key].to_dict(limit=2)}
                 print(json.dumps(sample, indent=2, ensure_ascii=False))
             
             return result
@@ -433,7 +466,7 @@ class ColabEnvironment:
     
     def download_result(self, path: str):
         """Download a result file."""
-        from google.colab import files
+        files = _require_colab_files()
         path = Path(path)
         if path.exists():
             files.download(str(path))
@@ -2,34 +2,52 @@
 """
 Utilities for one-shot Colab setup (installs rabtize, lafzize, jumlize, and wires env vars).
 """
+import hashlib
+import json
+import mmap
 import os
+import re
 import shutil
 import subprocess
 import sys
-import tempfile
+import threading
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 from .config import Config
 from .exceptions import QuranSegmenterError
+from .utils.storage import link_or_copy
 
 LOG_PREFIX = "[setup-colab]"
 
+# Resolves @latest module queries to a version without a Go toolchain
+GO_PROXY = "https://proxy.golang.org"
+
+# Clones and the Go download run concurrently; keep their log lines intact
+_log_lock = threading.Lock()
+
+
+def _log(message: str):
+    """Print a prefixed setup log line."""
+    with _log_lock:
+        print(f"{LOG_PREFIX} {message}", flush=True)
+
 
 def _run(cmd, cwd: Optional[Path] = None, env: Optional[Dict[str, str]] = None):
     """Run a shell command with basic logging."""
-    printable_cmd = " ".join(cmd)
-    print(f"{LOG_PREFIX} {printable_cmd}")
+    _log(" ".join(cmd))
     subprocess.run(cmd, cwd=str(cwd) if cwd else None, env=env, check=True)
 
 
 def _clone_repo(url: str, dest: Path):
     """Clone a repository if the destination does not already exist."""
     if dest.exists():
-        print(f"{LOG_PREFIX} Repo already present: {dest}")
+        _log(f"Repo already present: {dest}")
         return
-    _run(["git", "clone", "-q", url, str(dest)])
+    # Only the working tree is used (pip install -e), so skip the history
+    _run(["git", "clone", "-q", "--depth=1", "--single-branch", url, str(dest)])
 
 
 def _patch_rabtize_pyproject(pyproject: Path):
@@ -40,7 +58,7 @@ def _patch_rabtize_pyproject(pyproject: Path):
     if ">=3.13" in text:
         patched = text.replace(">=3.13", ">=3.10")
         pyproject.write_text(patched)
-        print(f"{LOG_PREFIX} Patched rabtize Python version to >=3.10")
+        _log("Patched rabtize Python version to >=3.10")
 
 
 def _pip_install(args):
@@ -48,54 +66,155 @@ def _pip_install(args):
     _run([sys.executable, "-m", "pip"] + args)
 
 
-def _ensure_go(go_url: str) -> Path:
+def _artifact_path(cache_dir: Optional[Path], name: str, source: str) -> Optional[Path]:
+    """Location of a cached setup artifact, keyed by the URL/ref it came from."""
+    if cache_dir is None:
+        return None
+    digest = hashlib.sha256(source.encode()).hexdigest()[:12]
+    return cache_dir / f"{name}-{digest}"
+
+
+def _pin_go_ref(ref: str) -> Optional[str]:
+    """
+    ref with its version pinned (module@latest resolved through the Go
+    module proxy), or None when it cannot be. Cached builds are keyed on the
+    pinned ref, so a new upstream release is built instead of restoring an
+    old binary.
+    """
+    module, _, version = ref.partition("@")
+    if re.fullmatch(r"v\d+\.\d+\.\d+\S*", version):
+        return ref
+    if version != "latest":
+        return None
+    # The proxy protocol spells upper-case letters as "!" + lower-case
+    escaped = re.sub(r"[A-Z]", lambda m: "!" + m.group().lower(), module)
+    try:
+        with urllib.request.urlopen(f"{GO_PROXY}/{escaped}/@latest", timeout=10) as response:
+            return f"{module}@{json.load(response)['Version']}"
+    except (OSError, ValueError, KeyError) as e:
+        _log(f"Could not resolve {ref} ({e}); its build will not be cached")
+        return None
+
+
+def _tar_extract_cmd(archive: str) -> List[str]:
+    """tar command extracting a .tar.gz into /usr/local, via pigz when available."""
+    if shutil.which("pigz"):
+        return ["tar", "-C", "/usr/local", "--use-compress-program=pigz", "-xf", archive]
+    return ["tar", "-C", "/usr/local", "-xzf", archive]
+
+
+def _ensure_go(go_url: str, cache_dir: Optional[Path] = None) -> Path:
     """Install Go toolchain if missing, return go binary path."""
     go_bin = Path("/usr/local/go/bin/go")
     if go_bin.exists():
-        print(f"{LOG_PREFIX} Go already present: {go_bin}")
+        _log(f"Go already present: {go_bin}")
         return go_bin
     
-    tmp_dir = Path(tempfile.mkdtemp())
-    tar_path = tmp_dir / "go.tar.gz"
-    print(f"{LOG_PREFIX} Downloading Go from {go_url}")
-    urllib.request.urlretrieve(go_url, tar_path)
-    _run(["tar", "-C", "/usr/local", "-xzf", str(tar_path)])
-    shutil.rmtree(tmp_dir, ignore_errors=True)
+    cached_tar = _artifact_path(cache_dir, "go", go_url)
+    if cached_tar and cached_tar.exists():
+        _log(f"Using cached Go tarball: {cached_tar}")
+        _run(_tar_extract_cmd(str(cached_tar)))
+        return go_bin
+    
+    # Stream the download straight into tar so fetching and extraction overlap
+    # and the tarball never touches local disk (it is only teed into the cache)
+    cmd = _tar_extract_cmd("-")
+    _log(f"Downloading Go from {go_url}")
+    _log(" ".join(cmd))
+    partial = cached_tar.with_name(cached_tar.name + ".partial") if cached_tar else None
+    if partial:
+        partial.parent.mkdir(parents=True, exist_ok=True)
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    try:
+        try:
+            with urllib.request.urlopen(go_url) as response, \
+                    (open(partial, "wb") if partial else open(os.devnull, "wb")) as tee:
+                while True:
+                    chunk = response.read(1 << 20)
+                    if not chunk:
+                        break
+                    proc.stdin.write(chunk)
+                    tee.write(chunk)
+        finally:
+            proc.stdin.close()
+            returncode = proc.wait()
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, cmd)
+    except BaseException:
+        # A failed download or extraction must not leave a stray partial tarball
+        if partial:
+            partial.unlink(missing_ok=True)
+        raise
+    if partial:
+        os.replace(partial, cached_tar)
     return go_bin
 
 
-def _install_jumlize(go_bin: Path, jumlize_ref: str, symlink_path: Path) -> Path:
-    """Install jumlize via go install and expose it at a stable path."""
-    env = os.environ.copy()
-    env["PATH"] = f"{go_bin.parent}:{env.get('PATH', '')}"
-    _run([str(go_bin), "install", jumlize_ref], env=env)
-    
+def _install_jumlize(
+    go_bin: Optional[Path],
+    jumlize_ref: str,
+    symlink_path: Path,
+    cache_dir: Optional[Path] = None
+) -> Path:
+    """
+    Install jumlize via go install (or restore it from cache) and expose it at
+    a stable path. With cache_dir, only builds of a pinned ref (see
+    _pin_go_ref) are cached; a floating one is installed but never cached.
+    """
     go_bin_dir = Path.home() / "go" / "bin"
     installed_binary = go_bin_dir / "jumlize"
+    pinned = _pin_go_ref(jumlize_ref) if cache_dir else None
+    cached_binary = _artifact_path(cache_dir, "jumlize", pinned) if pinned else None
+    
+    if cached_binary and cached_binary.exists():
+        go_bin_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(cached_binary, installed_binary)
+        installed_binary.chmod(0o755)
+        _log(f"Restored jumlize from cache: {cached_binary}")
+    else:
+        env = os.environ.copy()
+        env["PATH"] = f"{go_bin.parent}:{env.get('PATH', '')}"
+        _run([str(go_bin), "install", pinned or jumlize_ref], env=env)
+        if cached_binary and installed_binary.exists():
+            cached_binary.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(installed_binary, cached_binary)
+    
     if installed_binary.exists():
         symlink_path.parent.mkdir(parents=True, exist_ok=True)
         if not symlink_path.exists():
             symlink_path.symlink_to(installed_binary)
-        print(f"{LOG_PREFIX} jumlize available at {symlink_path}")
+        _log(f"jumlize available at {symlink_path}")
         return symlink_path
     
     raise QuranSegmenterError("jumlize binary not found after installation")
 
 
+def _file_contains(path: Path, needle: bytes) -> bool:
+    """Search a file for bytes via mmap, without reading it into memory."""
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < len(needle):
+                return False
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return mm.find(needle) != -1
+    except FileNotFoundError:
+        return False
+
+
 def _persist_env(env_vars: Dict[str, str], env_file: Path):
     """Persist environment variables to a file and source it from bashrc."""
-    lines = [f'export {k}="{v}"' for k, v in env_vars.items()]
-    env_file.write_text("\n".join(lines) + "\n")
+    content = "".join(f'export {k}="{v}"\n' for k, v in env_vars.items())
+    env_file.write_text(content)
     
     bashrc = Path.home() / ".bashrc"
     marker = f"source {env_file}"
-    if not bashrc.exists() or marker not in bashrc.read_text():
+    if not _file_contains(bashrc, marker.encode()):
         with open(bashrc, "a", encoding="utf-8") as f:
             f.write(f"\n# Quran Segmenter env\n{marker}\n")
     
     try:
         profile_d = Path("/etc/profile.d/quran_segmenter.sh")
-        profile_d.write_text(env_file.read_text())
+        profile_d.write_text(content)
     except PermissionError:
         # Not fatal; bashrc sourcing still works.
         pass
@@ -109,13 +228,20 @@ def setup_colab(
     rabtize_repo: str = "https://git.sr.ht/~rehandaphedar/rabtize",
     lafzize_repo: str = "https://git.sr.ht/~rehandaphedar/lafzize",
     go_url: str = "https://go.dev/dl/go1.25.5.linux-amd64.tar.gz",
-    jumlize_ref: str = "git.sr.ht/~rehandaphedar/jumlize/v3@latest"
+    jumlize_ref: str = "git.sr.ht/~rehandaphedar/jumlize/v3@latest",
+    cache_dir: Optional[str] = None
 ):
     """
     One-shot setup for Colab: installs rabtize, lafzize, jumlize, and wires env vars.
+    
+    With `cache_dir` (e.g. a folder on Google Drive), the Go tarball and the
+    built jumlize binary are kept there and reused by later sessions. The
+    binary is keyed on the resolved jumlize version, so a new release is
+    built rather than restored.
     """
     try:
         base_dir = Path(base_dir).expanduser().resolve()
+        cache_path = Path(cache_dir).expanduser() if cache_dir else None
         words = Path(words_path).expanduser().resolve()
         metadata = Path(metadata_path).expanduser().resolve()
         config_file = Path(config_path).expanduser().resolve()
@@ -129,27 +255,42 @@ def setup_colab(
         rabtize_dir = base_dir / "rabtize"
         lafzize_dir = base_dir / "lafzize"
         
-        # Clone + install rabtize
-        _clone_repo(rabtize_repo, rabtize_dir)
-        _patch_rabtize_pyproject(rabtize_dir / "pyproject.toml")
-        _pip_install(["install", "-q", "-e", f"{rabtize_dir}/.[embed]"])
-        
-        # Clone + install lafzize
-        _clone_repo(lafzize_repo, lafzize_dir)
-        requirements = lafzize_dir / "requirements.txt"
-        if requirements.exists():
-            _pip_install(["install", "-q", "-r", str(requirements)])
-        else:
-            raise QuranSegmenterError(f"lafzize requirements not found at {requirements}")
-        
-        # Install Go + jumlize
-        go_bin = _ensure_go(go_url)
-        jumlize_bin = _install_jumlize(go_bin, jumlize_ref, Path("/usr/local/bin/jumlize"))
+        # Network-bound fetches run concurrently; pip installs stay serial
+        # (they share site-packages) and start as soon as their clone lands
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            rabtize_clone = pool.submit(_clone_repo, rabtize_repo, rabtize_dir)
+            lafzize_clone = pool.submit(_clone_repo, lafzize_repo, lafzize_dir)
+            # A cached jumlize binary does not need the Go toolchain at all
+            # (cached builds are keyed on the pinned ref; floating ones are never cached)
+            pinned_ref = _pin_go_ref(jumlize_ref) if cache_path else None
+            jumlize_cached = _artifact_path(cache_path, "jumlize", pinned_ref) if pinned_ref else None
+            go_download = None
+            if not (jumlize_cached and jumlize_cached.exists()):
+                go_download = pool.submit(_ensure_go, go_url, cache_path)
+            
+            # Install rabtize
+            rabtize_clone.result()
+            _patch_rabtize_pyproject(rabtize_dir / "pyproject.toml")
+            _pip_install(["install", "-q", "-e", f"{rabtize_dir}/.[embed]"])
+            
+            # Install lafzize
+            lafzize_clone.result()
+            requirements = lafzize_dir / "requirements.txt"
+            if requirements.exists():
+                _pip_install(["install", "-q", "-r", str(requirements)])
+            else:
+                raise QuranSegmenterError(f"lafzize requirements not found at {requirements}")
+            
+            # Install jumlize
+            go_bin = go_download.result() if go_download else None
+        jumlize_bin = _install_jumlize(
+            go_bin, pinned_ref or jumlize_ref, Path("/usr/local/bin/jumlize"), cache_dir=cache_path
+        )
         
-        # Copy resource files into expected locations
-        shutil.copy2(words, lafzize_dir / words.name)
-        shutil.copy2(words, rabtize_dir / words.name)
-        shutil.copy2(metadata, lafzize_dir / metadata.name)
+        # Place resource files in expected locations (hardlinked where possible)
+        link_or_copy(words, lafzize_dir / words.name)
+        link_or_copy(words, rabtize_dir / words.name)
+        link_or_copy(metadata, lafzize_dir / metadata.name)
         
         # Persist environment variables
         env_vars = {
@@ -171,11 +312,11 @@ def setup_colab(
         cfg.quran_metadata_file = metadata
         cfg.save()
         
-        print(f"{LOG_PREFIX} Setup complete.")
-        print(f"{LOG_PREFIX} Config: {cfg.config_path}")
-        print(f"{LOG_PREFIX} jumlize: {jumlize_bin}")
-        print(f"{LOG_PREFIX} lafzize: {lafzize_dir}")
-        print(f"{LOG_PREFIX} rabtize: {rabtize_dir}")
+        _log("Setup complete.")
+        _log(f"Config: {cfg.config_path}")
+        _log(f"jumlize: {jumlize_bin}")
+        _log(f"lafzize: {lafzize_dir}")
+        _log(f"rabtize: {rabtize_dir}")
     
     except subprocess.CalledProcessError as e:
         raise QuranSegmenterError(f"Command failed ({' '.join(e.cmd)}): {e}") from e
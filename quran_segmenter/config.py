@@ -2,16 +2,35 @@
 """
 Central configuration management with persistence.
 """
+import hashlib
 import os
-import json
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 from dataclasses import dataclass, field
-from typing import Dict, Optional, List, Any
+from typing import Any, ClassVar, Dict, FrozenSet, List, Optional, Tuple
 import logging
 
+from .utils.jsonio import dumps, loads, peek_values
+
 logger = logging.getLogger(__name__)
 
 
+def _digest(payload: bytes) -> bytes:
+    """Content digest used to detect unchanged config payloads."""
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+@lru_cache(maxsize=1024)
+def _as_path(value: str) -> Path:
+    """Path for a stored path string (memoized; Path objects are immutable)."""
+    return Path(value)
+
+
+# Configs returned by get_config(), keyed by resolved config path -> (mtime_ns, config)
+_CONFIG_CACHE: Dict[Path, Tuple[int, "Config"]] = {}
+
+
 def _resolve_path(path: Path, base: Path) -> Path:
     """Resolve path to absolute using base when relative."""
     path = Path(path).expanduser()
@@ -20,7 +39,7 @@ def _resolve_path(path: Path, base: Path) -> Path:
     return path
 
 
-@dataclass
+@dataclass(slots=True)
 class TranslationConfig:
     """Configuration for a single translation."""
     id: str
@@ -30,89 +49,137 @@ class TranslationConfig:
     is_segmented: bool = False
     segmented_file_path: Optional[str] = None
     embeddings_path: Optional[str] = None
+    # Serialized form reused by Config.save until a field changes
+    _dict_cache: Optional[dict] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        if name != "_dict_cache":
+            object.__setattr__(self, "_dict_cache", None)
+    
+    def _as_dict(self) -> dict:
+        """Serialized form, rebuilt only after a field changes (shared; do not mutate)."""
+        d = self._dict_cache
+        if d is None:
+            d = {
+                "id": self.id,
+                "name": self.name,
+                "language_code": self.language_code,
+                "file_path": self.file_path,
+                "is_segmented": self.is_segmented,
+                "segmented_file_path": self.segmented_file_path,
+                "embeddings_path": self.embeddings_path
+            }
+            object.__setattr__(self, "_dict_cache", d)
+        return d
     
     def to_dict(self) -> dict:
-        return {
-            "id": self.id,
-            "name": self.name,
-            "language_code": self.language_code,
-            "file_path": self.file_path,
-            "is_segmented": self.is_segmented,
-            "segmented_file_path": self.segmented_file_path,
-            "embeddings_path": self.embeddings_path
-        }
+        return dict(self._as_dict())
     
     @classmethod
     def from_dict(cls, data: dict) -> "TranslationConfig":
-        return cls(
-            id=data["id"],
-            name=data["name"],
-            language_code=data["language_code"],
-            file_path=data["file_path"],
-            is_segmented=data.get("is_segmented", False),
-            segmented_file_path=data.get("segmented_file_path"),
-            embeddings_path=data.get("embeddings_path")
-        )
+        # Bypass __init__: called once per translation on every config load
+        obj = object.__new__(cls)
+        get = data.get
+        obj.id = data["id"]
+        obj.name = data["name"]
+        obj.language_code = data["language_code"]
+        obj.file_path = data["file_path"]
+        obj.is_segmented = get("is_segmented", False)
+        obj.segmented_file_path = get("segmented_file_path")
+        obj.embeddings_path = get("embeddings_path")
+        return obj
     
     def get_file_path(self) -> Path:
-        return Path(self.file_path)
+        return _as_path(self.file_path)
     
     def get_segmented_path(self) -> Optional[Path]:
-        return Path(self.segmented_file_path) if self.segmented_file_path else None
+        return _as_path(self.segmented_file_path) if self.segmented_file_path else None
     
     def get_embeddings_path(self) -> Optional[Path]:
-        return Path(self.embeddings_path) if self.embeddings_path else None
+        return _as_path(self.embeddings_path) if self.embeddings_path else None
 
 
-@dataclass
+@dataclass(slots=True)
 class LafzizeConfig:
     """Configuration for lafzize audio alignment."""
     server_host: str = "127.0.0.1"
     server_port: int = 8004
     timeout: int = 300
+    # False: key cached timestamps on the audio file's stat instead of hashing it
+    strict_cache: bool = True
+    
+    _PERSISTED_FIELDS: ClassVar[FrozenSet[str]] = frozenset({"server_host", "server_port", "timeout", "strict_cache"})
     
     def to_dict(self) -> dict:
-        return {"server_host": self.server_host, "server_port": self.server_port, "timeout": self.timeout}
+        return {
+            "server_host": self.server_host,
+            "server_port": self.server_port,
+            "timeout": self.timeout,
+            "strict_cache": self.strict_cache,
+        }
     
     @classmethod
     def from_dict(cls, data: dict) -> "LafzizeConfig":
-        return cls(**data)
+        fields = cls._PERSISTED_FIELDS
+        return cls(**{k: v for k, v in data.items() if k in fields})
 
 
-@dataclass
+@dataclass(slots=True)
 class JumlizeConfig:
     """Configuration for jumlize LLM segmentation."""
     model: str = "gemini-2.5-flash"
     thinking_budget: int = 0
     temperature: float = 0.0
     max_retries: int = 5
+    rpm_limit: int = 0  # Max jumlize launches per minute (0 = unlimited)
+    api_key: Optional[str] = None  # Runtime only, never written to config.json
+    
+    _PERSISTED_FIELDS: ClassVar[FrozenSet[str]] = frozenset(
+        {"model", "thinking_budget", "temperature", "max_retries", "rpm_limit"}
+    )
     
     def to_dict(self) -> dict:
         return {
             "model": self.model,
             "thinking_budget": self.thinking_budget,
             "temperature": self.temperature,
-            "max_retries": self.max_retries
+            "max_retries": self.max_retries,
+            "rpm_limit": self.rpm_limit
         }
     
     @classmethod
     def from_dict(cls, data: dict) -> "JumlizeConfig":
-        return cls(**{k: v for k, v in data.items() if k in ['model', 'thinking_budget', 'temperature', 'max_retries']})
+        fields = cls._PERSISTED_FIELDS
+        return cls(**{k: v for k, v in data.items() if k in fields})
 
 
-@dataclass 
+@dataclass(slots=True)
 class RabtizeConfig:
     """Configuration for rabtize alignment."""
     embedding_model: str = "intfloat/multilingual-e5-large"
     device: str = "cuda"
     batch_size: int = 512
+    in_process: bool = False  # Run rabtize.main inside this interpreter instead of a subprocess
+    worker: bool = False  # Keep one rabtize subprocess alive and reuse it across calls
+    
+    _PERSISTED_FIELDS: ClassVar[FrozenSet[str]] = frozenset(
+        {"embedding_model", "device", "batch_size", "in_process", "worker"}
+    )
     
     def to_dict(self) -> dict:
-        return {"embedding_model": self.embedding_model, "device": self.device, "batch_size": self.batch_size}
+        return {
+            "embedding_model": self.embedding_model,
+            "device": self.device,
+            "batch_size": self.batch_size,
+            "in_process": self.in_process,
+            "worker": self.worker
+        }
     
     @classmethod
     def from_dict(cls, data: dict) -> "RabtizeConfig":
-        return cls(**data)
+        fields = cls._PERSISTED_FIELDS
+        return cls(**{k: v for k, v in data.items() if k in fields})
 
 
 class Config:
@@ -129,10 +196,24 @@ class Config:
         # Changes auto-save, or manually:
         config.save()
         
+        # Coalesce several changes into one write
+        with config.batched_save():
+            config.update_translation(...)
+            config.detect_existing_assets()
+        
         # Reload from disk
         config.reload()
     """
     
+    # Path attributes persisted in config.json (resolved against base_dir on load)
+    _PATH_FIELDS = (
+        "lafzize_dir", "rabtize_dir", "jumlize_binary", "qpc_words_file", "quran_metadata_file"
+    )
+    # Nested component configs
+    _COMPONENT_FIELDS = (
+        ("lafzize", LafzizeConfig), ("jumlize", JumlizeConfig), ("rabtize", RabtizeConfig)
+    )
+    
     def __init__(
         self,
         data_dir: Path,
@@ -167,6 +248,12 @@ class Config:
         self.spans_embeddings_generated: bool = False
         self._spans_embeddings_path = None
         
+        # Deferred saves (see batched_save)
+        self._defer_save = False
+        self._save_pending = False
+        # Digest of the last payload written by save(), to skip no-op rewrites
+        self._last_saved_digest: Optional[bytes] = None
+        
         # Create directories
         for d in [self.translations_dir, self.embeddings_dir, self.cache_dir]:
             d.mkdir(parents=True, exist_ok=True)
@@ -194,49 +281,68 @@ class Config:
             "lafzize": self.lafzize.to_dict(),
             "jumlize": self.jumlize.to_dict(),
             "rabtize": self.rabtize.to_dict(),
-            "translations": {k: v.to_dict() for k, v in self.translations.items()},
+            "translations": {k: v._as_dict() for k, v in self.translations.items()},
             "spans_embeddings_generated": self.spans_embeddings_generated,
             "spans_embeddings_path": str(self.spans_embeddings_path)
         }
     
     def _update_from_dict(self, data: dict):
         """Update config from dictionary."""
-        if "lafzize_dir" in data:
-            self.lafzize_dir = _resolve_path(data["lafzize_dir"], self.base_dir)
-        if "rabtize_dir" in data:
-            self.rabtize_dir = _resolve_path(data["rabtize_dir"], self.base_dir)
-        if "jumlize_binary" in data:
-            self.jumlize_binary = _resolve_path(data["jumlize_binary"], self.base_dir)
-        if "qpc_words_file" in data:
-            self.qpc_words_file = _resolve_path(data["qpc_words_file"], self.base_dir)
-        if "quran_metadata_file" in data:
-            self.quran_metadata_file = _resolve_path(data["quran_metadata_file"], self.base_dir)
+        get = data.get
+        base_dir = self.base_dir
+        
+        for name in self._PATH_FIELDS:
+            value = get(name)
+            if value is not None:
+                setattr(self, name, _resolve_path(value, base_dir))
         if "spans_embeddings_path" in data:
             self.spans_embeddings_path = data["spans_embeddings_path"]
         
-        if "lafzize" in data:
-            self.lafzize = LafzizeConfig.from_dict(data["lafzize"])
-        if "jumlize" in data:
-            self.jumlize = JumlizeConfig.from_dict(data["jumlize"])
-        if "rabtize" in data:
-            self.rabtize = RabtizeConfig.from_dict(data["rabtize"])
+        for name, component_cls in self._COMPONENT_FIELDS:
+            value = get(name)
+            if value is not None:
+                setattr(self, name, component_cls.from_dict(value))
         
-        self.translations = {}
-        for tid, tdata in data.get("translations", {}).items():
-            self.translations[tid] = TranslationConfig.from_dict(tdata)
+        from_dict = TranslationConfig.from_dict
+        self.translations = {
+            tid: from_dict(tdata) for tid, tdata in get("translations", {}).items()
+        }
         
-        self.spans_embeddings_generated = data.get("spans_embeddings_generated", False)
+        self.spans_embeddings_generated = get("spans_embeddings_generated", False)
         
         # Also check if file actually exists
         if self.spans_embeddings_path.exists():
             self.spans_embeddings_generated = True
     
+    @contextmanager
+    def batched_save(self):
+        """Defer save() calls made inside the block and write once on exit."""
+        if self._defer_save:
+            yield self
+            return
+        
+        self._defer_save = True
+        try:
+            yield self
+        finally:
+            self._defer_save = False
+            if self._save_pending:
+                self.save()
+    
     def save(self):
         """Save configuration to disk."""
-        data = self.to_dict()
+        if self._defer_save:
+            self._save_pending = True
+            return
+        self._save_pending = False
+        
+        payload = dumps(self.to_dict(), indent=True)
+        digest = _digest(payload)
+        if digest == self._last_saved_digest and self.config_path.exists():
+            return
         
-        with open(self.config_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        self.config_path.write_bytes(payload)
+        self._last_saved_digest = digest
         
         if self._storage:
             self._storage.sync_to_drive(["config.json"])
@@ -246,9 +352,10 @@ class Config:
     def reload(self):
         """Reload configuration from disk."""
         if self.config_path.exists():
-            with open(self.config_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            self._update_from_dict(data)
+            raw = self.config_path.read_bytes()
+            self._update_from_dict(loads(raw))
+            # A save() that would reproduce the file byte-for-byte is skipped
+            self._last_saved_digest = _digest(raw)
             logger.info(f"Config reloaded from {self.config_path}")
         else:
             logger.warning(f"No config file at {self.config_path}")
@@ -295,7 +402,12 @@ class Config:
         spans_embeddings_filepath: Optional[Path] = None,
         segment_embeddings_filepath: Optional[Path] = None
     ) -> TranslationConfig:
-        """Register a new translation."""
+        """
+        Register a new translation.
+        
+        Saves the config; when registering many translations, wrap the loop
+        in `with config.batched_save():` so config.json is written once.
+        """
         source_file = Path(source_file)
         
         if not source_file.exists():
@@ -344,12 +456,8 @@ class Config:
     def _check_segmentation_status(self, tc: TranslationConfig):
         """Check if translation file already has segments."""
         try:
-            with open(tc.file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
             # Check first few verses for segments
-            sample_keys = list(data.keys())[:10]
-            has_segments = all("segments" in data[k] for k in sample_keys if k in data)
+            has_segments = all("segments" in v for v in peek_values(tc.file_path, 10))
             
             if has_segments:
                 tc.is_segmented = True
@@ -360,14 +468,15 @@ class Config:
     
     def get_translation(self, translation_id: str) -> TranslationConfig:
         """Get translation config by ID."""
-        if translation_id not in self.translations:
+        tc = self.translations.get(translation_id)
+        if tc is None:
             available = list(self.translations.keys())
             raise ValueError(
                 f"Translation '{translation_id}' not found. "
                 f"Available: {available}. "
                 f"Use 'register' command to add it."
             )
-        return self.translations[translation_id]
+        return tc
     
     def update_translation(
         self,
@@ -376,7 +485,7 @@ class Config:
         segmented_file_path: Path = None,
         embeddings_path: Path = None
     ):
-        """Update translation status."""
+        """Update translation status (saves; coalesce bulk updates with batched_save)."""
         tc = self.get_translation(translation_id)
         
         if is_segmented is not None:
@@ -388,6 +497,9 @@ class Config:
         
         self.save()
     
+    # Name used by the pipeline processors
+    update_translation_status = update_translation
+    
     def detect_existing_assets(self):
         """Scan for existing assets and update config."""
         updated = False
@@ -428,7 +540,8 @@ class Config:
         else:
             for tid, tc in self.translations.items():
                 seg_status = "✓" if tc.is_segmented else "✗"
-                emb_status = "✓" if tc.embeddings_path and Path(tc.embeddings_path).exists() else "✗"
+                emb_path = tc.get_embeddings_path()
+                emb_status = "✓" if emb_path and emb_path.exists() else "✗"
                 ready = tc.is_segmented and tc.embeddings_path and self.spans_embeddings_generated
                 ready_status = "✓ READY" if ready else "✗ Not ready"
                 print(f"  {tid}:")
@@ -442,7 +555,24 @@ def get_config() -> Config:
     Get the global configuration instance.
     
     QURAN_SEGMENTER_CONFIG should point directly to the config JSON file.
+    Repeat calls return the same instance while the config file is unchanged on disk.
     """
     env_path = os.environ.get("QURAN_SEGMENTER_CONFIG")
     config_path = Path(env_path).expanduser() if env_path else Path("./quran_data/config.json")
-    return Config.load_or_create(config_path)
+    json_path = config_path if config_path.suffix == ".json" else config_path / "config.json"
+    key = json_path.resolve()
+    
+    cached = _CONFIG_CACHE.get(key)
+    if cached is not None:
+        try:
+            if key.stat().st_mtime_ns == cached[0]:
+                return cached[1]
+        except FileNotFoundError:
+            pass
+    
+    config = Config.load_or_create(config_path)
+    try:
+        _CONFIG_CACHE[key] = (key.stat().st_mtime_ns, config)
+    except FileNotFoundError:
+        _CONFIG_CACHE.pop(key, None)
+    return config
@@ -2,6 +2,7 @@
 """
 Custom exceptions for the pipeline.
 """
+from typing import List, Optional
 
 
 class QuranSegmenterError(Exception):
@@ -21,7 +22,10 @@ class LafzizeError(QuranSegmenterError):
 
 class JumlizeError(QuranSegmenterError):
     """Errors from jumlize processing."""
-    pass
+    def __init__(self, message: str, missing_verses: Optional[List[str]] = None):
+        # Verse keys still lacking segments, when the output was incomplete
+        self.missing_verses = missing_verses or []
+        super().__init__(message)
 
 
 class RabtizeError(QuranSegmenterError):
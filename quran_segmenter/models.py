@@ -2,8 +2,10 @@
 """
 Data models for the pipeline.
 """
+from array import array
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Tuple
+from functools import cached_property
+from typing import List, Optional, Dict, Tuple, FrozenSet, Iterable, Iterator
 from pathlib import Path
 
 
@@ -47,6 +49,17 @@ class VerseRange:
         """Get all verse keys in this range (phrases excluded)."""
         return [f"{self.surah}:{v}" for v in range(self.start_verse, self.end_verse + 1)]
     
+    def verse_tuples(self) -> Iterator[Tuple[int, int, str]]:
+        """Yield (surah, ayah, verse_key) for each verse, without re-parsing keys."""
+        surah = self.surah
+        for v in range(self.start_verse, self.end_verse + 1):
+            yield surah, v, f"{surah}:{v}"
+    
+    @cached_property
+    def verse_key_set(self) -> FrozenSet[str]:
+        """Verse keys as a frozenset for membership tests (computed once)."""
+        return frozenset(self.verse_keys())
+    
     @classmethod
     def parse(cls, spec: str) -> "VerseRange":
         """
@@ -58,20 +71,20 @@ class VerseRange:
         """
         spec = spec.strip()
         
-        if ":" not in spec:
+        surah, sep, verse_part = spec.partition(":")
+        if not sep:
             # Full surah - will need metadata to resolve
             raise ValueError(f"Full surah spec '{spec}' requires metadata resolution")
         
-        parts = spec.split(":")
-        surah = int(parts[0])
-        verse_part = parts[1]
-        
-        if "-" in verse_part:
-            start, end = map(int, verse_part.split("-"))
-        else:
-            start = end = int(verse_part)
-        
-        return cls(surah=surah, start_verse=start, end_verse=end)
+        start, end = cls.parse_verse_bounds(verse_part)
+        return cls(surah=int(surah), start_verse=start, end_verse=end)
+    
+    @staticmethod
+    def parse_verse_bounds(verse_part: str) -> Tuple[int, int]:
+        """(start, end) from the part after the colon: "5" or "1-5"."""
+        start, sep, end = verse_part.partition("-")
+        start = int(start)
+        return start, (int(end) if sep else start)
     
     @classmethod
     def from_surah(cls, surah: int, total_verses: int) -> "VerseRange":
@@ -79,7 +92,7 @@ class VerseRange:
         return cls(surah=surah, start_verse=1, end_verse=total_verses)
 
 
-@dataclass
+@dataclass(slots=True)
 class WordTimestamp:
     """Timestamp for a single word."""
     surah: int
@@ -92,6 +105,10 @@ class WordTimestamp:
     def key(self) -> Tuple[int, int, int]:
         return (self.surah, self.ayah, self.word_index)
     
+    def as_row(self) -> Tuple[int, int, int, float, float]:
+        """Fields in constructor order, so WordTimestamp(*row) rebuilds it."""
+        return (self.surah, self.ayah, self.word_index, self.start_time, self.end_time)
+    
     def to_dict(self) -> dict:
         return {
             "surah": self.surah,
@@ -126,36 +143,111 @@ class WordTimestamp:
         )
 
 
-@dataclass
+class WordTimestampBatch:
+    """
+    Word timestamps stored column-wise in typed arrays.
+    
+    Holds the same data as a list of WordTimestamp in a fraction of the
+    memory (22 bytes per word instead of an object plus two boxed floats)
+    and lets the assembler walk plain columns. Indexing and iteration still
+    yield WordTimestamp objects, built on demand.
+    """
+    __slots__ = ("surahs", "ayahs", "word_indices", "starts", "ends")
+    
+    def __init__(self):
+        self.surahs = array("H")
+        self.ayahs = array("H")
+        self.word_indices = array("H")
+        self.starts = array("d")
+        self.ends = array("d")
+    
+    @classmethod
+    def from_lafzize(cls, items: Iterable[dict]) -> "WordTimestampBatch":
+        """Parse the word items of a lafzize response (other items skipped)."""
+        batch = cls()
+        surahs, ayahs, words = batch.surahs.append, batch.ayahs.append, batch.word_indices.append
+        starts, ends = batch.starts.append, batch.ends.append
+        for item in items:
+            if item.get("type") != "word":
+                continue
+            surah, ayah, word = item["key"].split(":")
+            surahs(int(surah))
+            ayahs(int(ayah))
+            words(int(word))
+            starts(item["start"] / 1000.0)
+            ends(item["end"] / 1000.0)
+        return batch
+    
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[int, int, int, float, float]]) -> "WordTimestampBatch":
+        """Build from WordTimestamp.as_row() tuples."""
+        batch = cls()
+        for surah, ayah, word, start, end in rows:
+            batch.surahs.append(surah)
+            batch.ayahs.append(ayah)
+            batch.word_indices.append(word)
+            batch.starts.append(start)
+            batch.ends.append(end)
+        return batch
+    
+    def columns(self) -> Iterator[Tuple[int, int, int, float, float]]:
+        """Row tuples in WordTimestamp.as_row() order, without building objects."""
+        return zip(self.surahs, self.ayahs, self.word_indices, self.starts, self.ends)
+    
+    def __len__(self) -> int:
+        return len(self.starts)
+    
+    def __getitem__(self, i: int) -> WordTimestamp:
+        return WordTimestamp(
+            self.surahs[i], self.ayahs[i], self.word_indices[i], self.starts[i], self.ends[i]
+        )
+    
+    def __iter__(self) -> Iterator[WordTimestamp]:
+        for row in self.columns():
+            yield WordTimestamp(*row)
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, WordTimestampBatch):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+
+@dataclass(slots=True)
 class Segment:
-    """A segment of a verse with timing and text."""
+    """A segment of a verse with timing and text (times kept to the millisecond)."""
     start: float
     end: float
     arabic: str
     translation: str
     is_last: bool = False
     
+    def __post_init__(self):
+        # Round once here rather than on every serialization
+        self.start = round(self.start, 3)
+        self.end = round(self.end, 3)
+    
     def to_dict(self) -> dict:
         return {
-            "start": round(self.start, 3),
-            "end": round(self.end, 3),
+            "start": self.start,
+            "end": self.end,
             "arabic": self.arabic,
             "translation": self.translation,
             "is_last": self.is_last
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class VerseSegments:
     """All segments for a single verse."""
     verse_key: str
     segments: List[Segment] = field(default_factory=list)
     
-    def to_dict(self) -> List[dict]:
-        return [s.to_dict() for s in self.segments]
+    def to_dict(self, limit: Optional[int] = None) -> List[dict]:
+        segments = self.segments if limit is None else self.segments[:limit]
+        return [s.to_dict() for s in segments]
 
 
-@dataclass
+@dataclass(slots=True)
 class ProcessingResult:
     """Result of processing a verse range."""
     verse_range: VerseRange
@@ -167,13 +259,30 @@ class ProcessingResult:
         return {vk: vs.to_dict() for vk, vs in self.verses.items()}
     
     def save(self, path: Path):
-        """Save result to JSON file."""
-        import json
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        """
+        Save result to JSON file.
+        
+        Written verse by verse, so only one verse's dicts exist at a time; the
+        output is byte-identical to dumping to_dict() with 2-space indent.
+        """
+        from .utils.jsonio import dumps
+        if not self.verses:
+            Path(path).write_bytes(b"{}")
+            return
+        with open(path, "wb") as f:
+            f.write(b"{")
+            sep = b"\n  "
+            for verse_key, vs in self.verses.items():
+                f.write(sep)
+                f.write(dumps(verse_key))
+                f.write(b": ")
+                # Nest the verse's indented JSON one level deeper
+                f.write(dumps(vs.to_dict(), indent=True).replace(b"\n", b"\n  "))
+                sep = b",\n  "
+            f.write(b"\n}")
 
 
-@dataclass
+@dataclass(slots=True)
 class QuranMetadata:
     """Quran surah metadata."""
     surah_verse_counts: Dict[int, int] = field(default_factory=dict)
@@ -181,26 +290,39 @@ class QuranMetadata:
     @classmethod
     def load(cls, path: Path) -> "QuranMetadata":
         """Load from metadata file."""
-        import json
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        from .utils.jsonio import read_json
+        return cls.from_data(read_json(path))
+    
+    @classmethod
+    def from_data(cls, data) -> "QuranMetadata":
+        """
+        Build from already-parsed metadata. The format is detected from the
+        first key: verse-keyed ("2:255" -> ...) or surah-keyed ("2" -> {"verses": ...}).
+        """
+        verse_counts: Dict[int, int] = {}
+        if not isinstance(data, dict) or not data:
+            return cls(surah_verse_counts=verse_counts)
         
-        # Handle different metadata formats
-        verse_counts = {}
-        if isinstance(data, dict):
+        if ":" in next(iter(data)):
+            get = verse_counts.get
+            for key in data:
+                surah, sep, ayah = key.partition(":")
+                if not sep:
+                    continue
+                surah = int(surah)
+                ayah = int(ayah.partition(":")[0])
+                if ayah > get(surah, 0):
+                    verse_counts[surah] = ayah
+        else:
             for key, value in data.items():
-                if ":" in key:
-                    surah = int(key.split(":")[0])
-                    if surah not in verse_counts:
-                        verse_counts[surah] = 0
-                    verse_counts[surah] = max(verse_counts[surah], int(key.split(":")[1]))
-                elif key.isdigit():
+                if key.isdigit():
                     verse_counts[int(key)] = value.get("verses", value.get("ayahs", 0))
         
         return cls(surah_verse_counts=verse_counts)
     
     def get_verse_count(self, surah: int) -> int:
         """Get number of verses in a surah."""
-        if surah not in self.surah_verse_counts:
+        count = self.surah_verse_counts.get(surah)
+        if count is None:
             raise ValueError(f"Unknown surah: {surah}")
-        return self.surah_verse_counts[surah]
+        return count
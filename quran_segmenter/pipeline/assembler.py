@@ -2,56 +2,157 @@
 """
 Final segment assembly combining timings with aligned text.
 """
-import json
+import os
+import pickle
+from functools import cached_property
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 import logging
 
 from ..config import Config
+from ..utils.jsonio import read_json
 from ..models import (
-    VerseRange, WordTimestamp, Segment, VerseSegments, ProcessingResult
+    VerseRange, WordTimestamp, WordTimestampBatch, Segment, VerseSegments, ProcessingResult
 )
 
 logger = logging.getLogger(__name__)
 
+# Resolved QPC words path -> ((mtime_ns, size), verse index), shared by all
+# SegmentAssembler instances in the process
+_VERSE_INDEX_MEMO: Dict[str, Tuple[Tuple[int, int], Dict[Tuple[int, int], Tuple[str, ...]]]] = {}
+
+
+def _verse_slot(surah: int, ayah: int) -> int:
+    """Pack (surah, ayah) into one int key (no surah has 1000+ verses)."""
+    return surah * 1000 + ayah
+
 
 class SegmentAssembler:
     """Assembles final timed segments from component outputs."""
     
     def __init__(self, config: Config):
         self.config = config
-        self._words_cache: Optional[Dict] = None
     
-    @property
+    @cached_property
     def words_data(self) -> Dict:
         """Lazy load QPC words data."""
-        if self._words_cache is None:
-            with open(self.config.qpc_words_file, "r", encoding="utf-8") as f:
-                self._words_cache = json.load(f)
-        return self._words_cache
+        return read_json(self.config.qpc_words_file)
     
-    def _get_arabic_words(self, surah: int, ayah: int) -> List[str]:
-        """Get Arabic words for a verse."""
-        words = []
-        for key, word_data in self.words_data.items():
-            if int(word_data.get("surah", 0)) == surah and int(word_data.get("ayah", 0)) == ayah:
-                words.append((int(word_data.get("word", 0)), word_data.get("text", "")))
+    @cached_property
+    def verse_index(self) -> Dict[Tuple[int, int], Tuple[str, ...]]:
+        """(surah, ayah) -> Arabic words in order, built once per QPC file."""
+        return self._load_verse_index()
+    
+    @staticmethod
+    def _build_verse_index(words_data: Dict) -> Dict[Tuple[int, int], Tuple[str, ...]]:
+        grouped: Dict[Tuple[int, int], List[Tuple[int, str]]] = {}
+        # Identical word texts (particles, divine names...) recur thousands of
+        # times; pool them so the index holds one str per distinct word. Pickle
+        # memoizes shared objects, so the sidecar stays deduplicated too.
+        pool: Dict[str, str] = {}
+        intern = pool.setdefault
+        for word_data in words_data.values():
+            verse = (int(word_data.get("surah", 0)), int(word_data.get("ayah", 0)))
+            text = word_data.get("text", "")
+            grouped.setdefault(verse, []).append(
+                (int(word_data.get("word", 0)), intern(text, text))
+            )
+        # Sort by word index and keep just text
+        return {
+            verse: tuple(text for _, text in sorted(words, key=itemgetter(0)))
+            for verse, words in grouped.items()
+        }
+    
+    def _load_verse_index(self) -> Dict[Tuple[int, int], Tuple[str, ...]]:
+        """
+        Load the verse index: from the in-process memo shared by all
+        assemblers, else from a pickle sidecar in the cache dir.
         
-        # Sort by word index and return just text
-        words.sort(key=lambda x: x[0])
-        return [w[1] for w in words]
+        The sidecar records the source file's (mtime, size) and is only used
+        while they still match; otherwise the JSON is parsed, indexed and the
+        sidecar rewritten.
+        """
+        source = Path(self.config.qpc_words_file)
+        st = source.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+        memo_key = str(source.resolve())
+        
+        memo = _VERSE_INDEX_MEMO.get(memo_key)
+        if memo is not None and memo[0] == stamp:
+            return memo[1]
+        
+        sidecar = Path(self.config.cache_dir) / f"{source.name}.index.pkl"
+        try:
+            with open(sidecar, "rb") as f:
+                cached = pickle.load(f)
+            if cached.get("source") == stamp:
+                _VERSE_INDEX_MEMO[memo_key] = (stamp, cached["index"])
+                return cached["index"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.debug(f"Ignoring unreadable words sidecar {sidecar}: {e}")
+        
+        index = self._build_verse_index(self.words_data)
+        _VERSE_INDEX_MEMO[memo_key] = (stamp, index)
+        try:
+            sidecar.parent.mkdir(parents=True, exist_ok=True)
+            tmp = sidecar.with_name(sidecar.name + ".tmp")
+            with open(tmp, "wb") as f:
+                pickle.dump({"source": stamp, "index": index}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, sidecar)
+        except OSError as e:
+            logger.debug(f"Could not write words sidecar {sidecar}: {e}")
+        return index
+    
+    def _get_arabic_words(self, surah: int, ayah: int) -> Tuple[str, ...]:
+        """Get Arabic words for a verse."""
+        return self.verse_index.get((surah, ayah), ())
     
-    def _build_timings_dict(
+    @staticmethod
+    def _normalize_segments(verse_data: Dict) -> List[Tuple[int, int, str]]:
+        """(start, end, translation) per rabtize segment; segments without a word range are dropped."""
+        normalized = []
+        for seg_data in verse_data.get("segments", ()):
+            word_range = seg_data.get("word_range")
+            if word_range:
+                normalized.append(
+                    (word_range.get("start", 1), word_range.get("end", 1), seg_data.get("t", ""))
+                )
+        return normalized
+    
+    def _build_verse_timings(
         self,
-        timestamps: List[WordTimestamp]
-    ) -> Dict[Tuple[int, int, int], Tuple[float, float]]:
-        """Convert timestamp list to lookup dictionary."""
-        return {ts.key: (ts.start_time, ts.end_time) for ts in timestamps}
+        timestamps: Sequence[WordTimestamp]
+    ) -> Dict[int, List[Optional[Tuple[float, float]]]]:
+        """
+        Group timestamps per verse into a dense list indexed by word_index - 1
+        (None where a word has no timing), so a segment's timings are a slice.
+        
+        Verses are keyed by the packed int from _verse_slot, which avoids
+        allocating and hashing a (surah, ayah) tuple for every word.
+        """
+        if isinstance(timestamps, WordTimestampBatch):
+            rows = timestamps.columns()
+        else:
+            rows = (ts.as_row() for ts in timestamps)
+        
+        verse_timings: Dict[int, List[Optional[Tuple[float, float]]]] = {}
+        for surah, ayah, word_index, start, end in rows:
+            idx = word_index - 1
+            if idx < 0:
+                continue
+            times = verse_timings.setdefault(_verse_slot(surah, ayah), [])
+            if idx >= len(times):
+                times.extend([None] * (idx + 1 - len(times)))
+            times[idx] = (start, end)
+        return verse_timings
     
     def assemble(
         self,
         verse_range: VerseRange,
-        timestamps: List[WordTimestamp],
+        timestamps: Sequence[WordTimestamp],
         alignment: Dict,
     ) -> ProcessingResult:
         """
@@ -66,15 +167,14 @@ class SegmentAssembler:
             ProcessingResult with all verse segments
         """
         result = ProcessingResult(verse_range=verse_range)
-        timings = self._build_timings_dict(timestamps)
+        verse_timings = self._build_verse_timings(timestamps)
         
-        for verse_key in verse_range.verse_keys():
-            if verse_key not in alignment:
+        for surah, ayah, verse_key in verse_range.verse_tuples():
+            verse_data = alignment.get(verse_key)
+            if verse_data is None:
                 result.warnings.append(f"No alignment data for {verse_key}")
                 continue
             
-            verse_data = alignment[verse_key]
-            surah, ayah = map(int, verse_key.split(":"))
             arabic_words = self._get_arabic_words(surah, ayah)
             
             if not arabic_words:
@@ -82,41 +182,35 @@ class SegmentAssembler:
                 continue
             
             segments = []
-            raw_segments = verse_data.get("segments", [])
+            times = verse_timings.get(_verse_slot(surah, ayah), ())
             
-            for seg_data in raw_segments:
-                word_range = seg_data.get("word_range")
-                if not word_range:
-                    continue
-                
-                start_idx = word_range.get("start", 1)
-                end_idx = word_range.get("end", 1)
+            for start_idx, end_idx, translation in self._normalize_segments(verse_data):
+                # Timings for this word range are a slice of the verse's list;
+                # the segment's min start / max end are tracked in one pass
+                start_time = end_time = None
+                for t in times[max(start_idx - 1, 0):end_idx]:
+                    if t is None:
+                        continue
+                    if start_time is None:
+                        start_time, end_time = t
+                    else:
+                        if t[0] < start_time:
+                            start_time = t[0]
+                        if t[1] > end_time:
+                            end_time = t[1]
                 
-                # Get Arabic text for this segment
-                # Word indices are 1-based
-                arabic_text = " ".join(arabic_words[start_idx - 1:end_idx])
-                
-                # Get timing for this word range
-                word_times = []
-                for word_idx in range(start_idx, end_idx + 1):
-                    key = (surah, ayah, word_idx)
-                    if key in timings:
-                        word_times.append(timings[key])
-                
-                if not word_times:
+                if start_time is None:
                     result.warnings.append(
                         f"No timing data for {verse_key} words {start_idx}-{end_idx}"
                     )
                     continue
                 
-                start_time = min(t[0] for t in word_times)
-                end_time = max(t[1] for t in word_times)
-                
                 segment = Segment(
                     start=start_time,
                     end=end_time,
-                    arabic=arabic_text,
-                    translation=seg_data.get("t", ""),
+                    # Word indices are 1-based
+                    arabic=" ".join(arabic_words[start_idx - 1:end_idx]),
+                    translation=translation,
                     is_last=False
                 )
                 segments.append(segment)
@@ -2,18 +2,157 @@
 """
 Jumlize integration for LLM-based translation segmentation.
 """
-import json
+import hashlib
+import os
 import subprocess
-import shutil
+import threading
+import time
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Any, Dict, List, Optional, Tuple
 import logging
 
 from ..config import Config, TranslationConfig
 from ..exceptions import JumlizeError
+from ..utils.jsonio import iter_items
+from ..utils.rate_limit import TokenBucket, backoff_delay, is_rate_limited
+from ..utils.storage import clone_file
 
 logger = logging.getLogger(__name__)
 
+# A run with no output for this long is treated as hung and restarted
+JUMLIZE_IDLE_TIMEOUT = 600
+# Hard cap across all attempts (full Quran)
+JUMLIZE_DEADLINE = 7200
+
+
+@lru_cache(maxsize=None)
+def _launch_limiter(rpm_limit: int) -> TokenBucket:
+    """Process-wide bucket per limit, so every processor shares the API budget."""
+    return TokenBucket(rpm_limit, capacity=1)
+
+
+def _marker_path(marker_dir: Path, path: Path) -> Path:
+    """Validation marker for a segmentation file, named by its resolved path."""
+    digest = hashlib.blake2b(str(path.resolve()).encode(), digest_size=8).hexdigest()
+    return marker_dir / f"{digest}.validated"
+
+
+@lru_cache(maxsize=16)
+def _segmentation_scan(path_str: str, mtime_ns: int, size: int) -> Tuple[int, Tuple[str, ...]]:
+    """
+    (total verses, keys of verses without segments) for a segmentation
+    file, in one streamed pass.
+    
+    Keyed on the file's stat as well as its path so an edited file is
+    re-read; repeated status checks in the same process are free.
+    """
+    total = 0
+    missing = []
+    for verse_key, verse_data in iter_items(Path(path_str)):
+        total += 1
+        if "segments" not in verse_data:
+            missing.append(verse_key)
+    return total, tuple(missing)
+
+
+def _scan_for(path: Path, marker_dir: Optional[Path] = None) -> Tuple[int, Tuple[str, ...]]:
+    """
+    Segmentation scan, answered by a marker in marker_dir that still matches
+    the file if there is one. A complete file gets a marker recording its
+    stat and verse count for later processes.
+    """
+    st = path.stat()
+    stamp = f"{st.st_mtime_ns}:{st.st_size}"
+    marker = _marker_path(marker_dir, path) if marker_dir is not None else None
+    if marker is not None:
+        try:
+            marked, _, total = marker.read_text().rpartition(":")
+            if marked == stamp:
+                return int(total), ()
+        except (OSError, ValueError):
+            pass
+    
+    total, missing = _segmentation_scan(str(path), st.st_mtime_ns, st.st_size)
+    if marker is not None and not missing:
+        try:
+            marker.parent.mkdir(parents=True, exist_ok=True)
+            marker.write_text(f"{stamp}:{total}")
+        except OSError as e:
+            logger.debug(f"Could not write validation marker {marker}: {e}")
+    return total, missing
+
+
+class _IdleTimeout(Exception):
+    """Jumlize went quiet for longer than the idle timeout."""
+
+
+def _run_streaming(
+    cmd: list,
+    cwd: str,
+    idle_timeout: float,
+    deadline: float,
+) -> Tuple[int, str]:
+    """
+    Run a command, forwarding its stdout/stderr to the logger line by line.
+    
+    Only the last 50 stderr lines are kept (for the error message), so memory
+    stays bounded however long the run is. The process is terminated if it
+    is silent for `idle_timeout` seconds (_IdleTimeout) or runs past the
+    monotonic `deadline` (subprocess.TimeoutExpired).
+    
+    Returns:
+        (returncode, tail of stderr)
+    """
+    proc = subprocess.Popen(
+        cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        text=True, bufsize=1
+    )
+    last_output = [time.monotonic()]
+    stderr_tail: deque = deque(maxlen=50)
+    
+    def drain(stream, level, tail=None):
+        for line in stream:
+            last_output[0] = time.monotonic()
+            # Progress output is only formatted when a handler will emit it
+            if logger.isEnabledFor(level):
+                logger.log(level, "jumlize: %s", line.rstrip("\n"))
+            if tail is not None:
+                tail.append(line.rstrip("\n"))
+        stream.close()
+    
+    readers = [
+        threading.Thread(target=drain, args=(proc.stdout, logging.DEBUG), daemon=True),
+        threading.Thread(target=drain, args=(proc.stderr, logging.ERROR, stderr_tail), daemon=True),
+    ]
+    for t in readers:
+        t.start()
+    
+    try:
+        while True:
+            try:
+                proc.wait(timeout=1)
+                break
+            except subprocess.TimeoutExpired:
+                now = time.monotonic()
+                if now > deadline:
+                    raise
+                if now - last_output[0] > idle_timeout:
+                    raise _IdleTimeout()
+    finally:
+        if proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+        for t in readers:
+            t.join(timeout=5)
+    
+    return proc.returncode, "\n".join(stderr_tail)
+
 
 class JumlizeProcessor:
     """Handles LLM-based translation text segmentation."""
@@ -29,23 +168,37 @@ class JumlizeProcessor:
         tc = self.config.get_translation(translation_id)
         if not tc.is_segmented:
             return False
-        if tc.segmented_file_path and tc.segmented_file_path.exists():
-            return self._validate_segmentation(tc.segmented_file_path)
+        path = tc.get_segmented_path()
+        if path and path.exists():
+            return self._validate_segmentation(path)
         return False
     
+    def _marker_dir_for(self, path: Path) -> Optional[Path]:
+        """
+        Where validation markers for path are kept (in the cache, never beside
+        the file), or None for files outside data_dir: those belong to the
+        user, so they are always scanned rather than trusted from a marker.
+        """
+        if not Path(path).resolve().is_relative_to(self.config.data_dir.resolve()):
+            return None
+        return self.config.cache_dir / "validated"
+    
     def _validate_segmentation(self, path: Path) -> bool:
-        """Validate that segmentation file has segments for all verses."""
+        """
+        Validate that segmentation file has segments for all verses.
+        
+        Shares its single streamed pass (and validation marker) with
+        get_segmentation_status, so neither re-reads an unchanged file.
+        """
+        return not self._missing_verses(path)
+    
+    def _missing_verses(self, path: Path) -> List[str]:
+        """Keys of verses without segments (every verse if the file is unreadable)."""
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            # Check that verses have segments
-            for verse_key, verse_data in data.items():
-                if "segments" not in verse_data:
-                    return False
-            return True
+            _, missing = _scan_for(Path(path), self._marker_dir_for(path))
         except Exception:
-            return False
+            return ["*"]
+        return list(missing)
     
     def segment(
         self,
@@ -74,7 +227,6 @@ class JumlizeProcessor:
         # Resolve API key
         api_key = api_key or self.config.jumlize.api_key
         if not api_key:
-            import os
             api_key = os.environ.get("GEMINI_API_KEY")
         
         if not api_key:
@@ -86,9 +238,10 @@ class JumlizeProcessor:
         # Prepare output path
         output_path = self.config.translations_dir / f"{translation_id}_segmented.json"
         
-        # Copy source to working location if needed
+        # Jumlize rewrites its input in place, so it gets its own copy: a
+        # reflink where supported, never a hardlink (that would edit the source)
         working_copy = self.config.translations_dir / f"{translation_id}_working.json"
-        shutil.copy(tc.file_path, working_copy)
+        clone_file(tc.get_file_path(), working_copy)
         
         logger.info(f"Running jumlize segmentation for {translation_id}")
         logger.warning("This will make LLM API calls and may take significant time/cost.")
@@ -104,33 +257,58 @@ class JumlizeProcessor:
             f"-temperature={self.config.jumlize.temperature}"
         ]
         
-        try:
-            result = subprocess.run(
-                cmd,
-                cwd=str(self.config.base_dir),
-                capture_output=True,
-                text=True,
-                timeout=7200  # 2 hour timeout for full Quran
-            )
-            
-            if result.returncode != 0:
-                logger.error(f"Jumlize stderr: {result.stderr}")
-                raise JumlizeError(f"Jumlize failed: {result.stderr}")
+        deadline = time.monotonic() + JUMLIZE_DEADLINE
+        attempts = max(1, self.config.jumlize.max_retries + 1)
+        rpm_limit = self.config.jumlize.rpm_limit
+        limiter = _launch_limiter(rpm_limit) if rpm_limit > 0 else None
+        for attempt in range(1, attempts + 1):
+            if limiter is not None:
+                limiter.acquire()
+            try:
+                returncode, stderr_tail = _run_streaming(
+                    cmd, str(self.config.base_dir), JUMLIZE_IDLE_TIMEOUT, deadline
+                )
+            except _IdleTimeout:
+                if attempt == attempts:
+                    raise JumlizeError(
+                        f"Jumlize produced no output for {JUMLIZE_IDLE_TIMEOUT}s "
+                        f"({attempts} attempts)"
+                    )
+                # Jumlize rewrites the working copy in place, so a restart
+                # resumes from the verses already segmented
+                logger.warning(
+                    f"Jumlize idle for {JUMLIZE_IDLE_TIMEOUT}s, restarting "
+                    f"(attempt {attempt + 1}/{attempts})"
+                )
+                continue
+            except subprocess.TimeoutExpired:
+                raise JumlizeError(f"Jumlize timed out after {JUMLIZE_DEADLINE // 3600} hours")
             
-            logger.debug(f"Jumlize stdout: {result.stdout}")
-            
-        except subprocess.TimeoutExpired:
-            raise JumlizeError("Jumlize timed out after 2 hours")
+            if returncode == 0:
+                break
+            if attempt < attempts and is_rate_limited(stderr_tail):
+                delay = backoff_delay(attempt - 1)
+                logger.warning(
+                    f"Jumlize hit the API rate limit, retrying in {delay:.0f}s "
+                    f"(attempt {attempt + 1}/{attempts})"
+                )
+                time.sleep(delay)
+                continue
+            raise JumlizeError(f"Jumlize failed: {stderr_tail}")
         
         # Jumlize modifies the input file in place
         if working_copy.exists():
-            shutil.move(working_copy, output_path)
+            # Same directory, so an atomic rename
+            os.replace(working_copy, output_path)
         
         # Validate output
         if not self._validate_segmentation(output_path):
+            missing = self._missing_verses(output_path)
+            preview = ", ".join(missing[:10]) + (", ..." if len(missing) > 10 else "")
             raise JumlizeError(
-                f"Segmentation incomplete. Some verses may have failed. "
-                f"Check {output_path} and re-run with higher model settings."
+                f"Segmentation incomplete: {len(missing)} verses have no segments ({preview}). "
+                f"Check {output_path} and re-run with higher model settings.",
+                missing_verses=missing
             )
         
         # Update config
@@ -154,12 +332,10 @@ class JumlizeProcessor:
             "source_file": str(tc.file_path)
         }
         
-        if tc.segmented_file_path and tc.segmented_file_path.exists():
-            with open(tc.segmented_file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            total = len(data)
-            segmented = sum(1 for v in data.values() if "segments" in v)
+        path = tc.get_segmented_path()
+        if path and path.exists():
+            total, missing = _scan_for(path, self._marker_dir_for(path))
+            segmented = total - len(missing)
             status["total_verses"] = total
             status["segmented_verses"] = segmented
             status["missing_verses"] = total - segmented
@@ -2,20 +2,135 @@
 """
 Lafzize integration for audio-to-word timestamp alignment.
 """
-import json
+import io
+import os
+import uuid
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from urllib3.util.retry import Retry
 from pathlib import Path
-from typing import List, Optional
+from typing import Optional, Sequence, Tuple
 import logging
 
 from ..config import Config
-from ..models import VerseRange, WordTimestamp
+from ..models import VerseRange, WordTimestamp, WordTimestampBatch
+from ..utils.jsonio import STREAM_PARSE_ERRORS, iter_array
 from ..utils.server import LafzizeServer
 from ..utils.cache import CacheManager
 from ..exceptions import LafzizeError, ServerNotRunningError
 
 logger = logging.getLogger(__name__)
 
+# Read size when streaming the audio into the request body
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Kept-alive connections to the lafzize server (enough for process_batch)
+HTTP_POOL_SIZE = 8
+
+
+def _make_session() -> requests.Session:
+    """Session with pooled keep-alive connections and backoff on transient errors."""
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        # Lafzize is a pure computation, so resending the POST is safe
+        allowed_methods=frozenset({"POST"}),
+        # Only retry failed connects and listed statuses: a read timeout means the
+        # server already spent the full timeout on this request
+        read=0,
+        other=0,
+        raise_on_status=False,
+    )
+    session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry))
+    return session
+
+
+class _MultipartFileStream:
+    """
+    multipart/form-data body that reads the file from disk as it is sent.
+    
+    requests would otherwise build the whole body (audio included) in memory.
+    The total length is known up front, so the request still carries a
+    Content-Length rather than falling back to chunked encoding, and the
+    stream can be rewound so urllib3 can resend it on a retry.
+    """
+    
+    def __init__(
+        self,
+        fields: Sequence[Tuple[str, str]],
+        file_field: str,
+        file_path: Path,
+        content_type: str,
+    ):
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        head = b"".join(
+            (
+                f"--{boundary}\r\n"
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f"{value}\r\n"
+            ).encode("utf-8")
+            for name, value in fields
+        )
+        head += (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{file_field}"; filename="{file_path.name}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+        self._head = head
+        self._tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+        self._path = file_path
+        self._len = len(head) + os.path.getsize(file_path) + len(self._tail)
+        self._file = None
+        self._stage = 0
+        self._pos = 0
+    
+    def __len__(self) -> int:
+        return self._len
+    
+    def tell(self) -> int:
+        return self._pos
+    
+    def seek(self, offset: int, whence: int = 0) -> int:
+        """Only rewinding to the start is supported (used when a request is retried)."""
+        if offset != 0 or whence != 0:
+            raise io.UnsupportedOperation("multipart stream can only be rewound")
+        self.close()
+        self._stage = 0
+        self._pos = 0
+        return 0
+    
+    def read(self, size: int = -1) -> bytes:
+        data = self._next_chunk()
+        self._pos += len(data)
+        return data
+    
+    def _next_chunk(self) -> bytes:
+        # Stages: 0 = head, 1 = file body, 2 = tail, 3 = done. Each read
+        # returns at most one stage's bytes, which file-like bodies allow.
+        if self._stage == 0:
+            self._stage = 1
+            self._file = open(self._path, "rb", buffering=UPLOAD_CHUNK_SIZE)
+            return self._head
+        if self._stage == 1:
+            chunk = self._file.read(UPLOAD_CHUNK_SIZE)
+            if chunk:
+                return chunk
+            self.close()
+            self._stage = 2
+        if self._stage == 2:
+            self._stage = 3
+            return self._tail
+        return b""
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
 
 class LafzizeProcessor:
     """Handles audio-to-word timestamp alignment using lafzize."""
@@ -28,6 +143,8 @@ class LafzizeProcessor:
             host=config.lafzize.server_host,
             port=config.lafzize.server_port
         )
+        # Keep-alive connections reused across requests (and batch jobs)
+        self.session = _make_session()
     
     @property
     def api_url(self) -> str:
@@ -42,8 +159,9 @@ class LafzizeProcessor:
         audio_path: Path,
         verse_range: VerseRange,
         use_cache: bool = True,
-        start_server: bool = False
-    ) -> List[WordTimestamp]:
+        start_server: bool = False,
+        timeout: Optional[float] = None
+    ) -> Sequence[WordTimestamp]:
         """
         Get word timestamps for audio file.
         
@@ -51,14 +169,20 @@ class LafzizeProcessor:
             audio_path: Path to audio file
             verse_range: Range of verses in the audio
             use_cache: Whether to use cached results
+            timeout: Request timeout in seconds (defaults to config)
             
         Returns:
-            List of WordTimestamp objects
+            WordTimestamp sequence (a column-wise WordTimestampBatch)
         """
         verse_range_str = str(verse_range)
         
         # Check cache first
         if use_cache:
+            rows = self.cache.get_cached_timestamp_rows(audio_path, verse_range_str)
+            if rows:
+                logger.info(f"Using cached timestamps for {verse_range_str}")
+                return WordTimestampBatch.from_rows(rows)
+            # Caches written before timestamps were stored as rows
             cached = self.cache.get_cached_timestamps(audio_path, verse_range_str)
             if cached:
                 logger.info(f"Using cached timestamps for {verse_range_str}")
@@ -80,47 +204,55 @@ class LafzizeProcessor:
         # Call lafzize API
         logger.info(f"Calling lafzize for {audio_path.name} verses {verse_range_str}")
         
+        body = _MultipartFileStream(
+            fields=[("segments", seg) for seg in verse_range.to_lafzize_segments()],
+            file_field="audio",
+            file_path=audio_path,
+            content_type="audio/mpeg",
+        )
         try:
-            with open(audio_path, "rb") as f:
-                files = {"audio": (audio_path.name, f, "audio/mpeg")}
-                data = [("segments", s) for s in verse_range.to_lafzize_segments()]
-                
-                response = requests.post(
-                    self.api_url,
-                    files=files,
-                    data=data,
-                    timeout=self.config.lafzize.timeout
-                )
-            
-            if response.status_code != 200:
-                raise LafzizeError(
-                    f"Lafzize API error {response.status_code}: {response.text}"
-                )
-            
-            raw_timestamps = response.json()
+            response = self.session.post(
+                self.api_url,
+                data=body,
+                headers={"Content-Type": body.content_type},
+                timeout=timeout or self.config.lafzize.timeout,
+                stream=True
+            )
+            try:
+                if response.status_code != 200:
+                    raise LafzizeError(
+                        f"Lafzize API error {response.status_code}: {response.text}"
+                    )
+                # Parse word items straight off the socket
+                response.raw.decode_content = True
+                timestamps = WordTimestampBatch.from_lafzize(iter_array(response.raw))
+            finally:
+                response.close()
             
         except requests.exceptions.RequestException as e:
             raise LafzizeError(f"Failed to connect to lafzize: {e}")
-        
-        # Parse response
-        timestamps = []
-        for item in raw_timestamps:
-            ts = WordTimestamp.from_lafzize_response(item)
-            if ts:
-                timestamps.append(ts)
+        except Urllib3HTTPError as e:
+            # Reading response.raw bypasses requests' wrapping (reset, read timeout)
+            raise LafzizeError(f"Lafzize response interrupted: {e}")
+        except (*STREAM_PARSE_ERRORS, LookupError, TypeError, AttributeError) as e:
+            # Malformed JSON, or word items missing or mistyping their fields
+            raise LafzizeError(f"Invalid lafzize response: {e!r}")
+        finally:
+            body.close()
         
         logger.info(f"Got {len(timestamps)} word timestamps")
         
         # Cache results
         if use_cache:
-            self.cache.cache_timestamps(
+            self.cache.cache_timestamp_rows(
                 audio_path,
                 verse_range_str,
-                [t.to_dict() for t in timestamps]
+                list(timestamps.columns())
             )
         
         return timestamps
     
     def stop_server(self):
         """Stop the lafzize server if we started it."""
+        self.session.close()
         self.server.stop()
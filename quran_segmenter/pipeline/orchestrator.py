@@ -3,16 +3,22 @@
 Main pipeline orchestrator that coordinates all components.
 """
 import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 import logging
 
 from ..config import Config, get_config
-from ..models import VerseRange, ProcessingResult
+from ..models import VerseRange, ProcessingResult, QuranMetadata
 from ..utils.cache import CacheManager
 from ..utils.verse_parser import parse_verse_spec, load_quran_metadata
 from ..exceptions import (
-    QuranSegmenterError, TranslationNotPreparedError, ConfigurationError
+    QuranSegmenterError, TranslationNotPreparedError, ConfigurationError,
+    LafzizeError, ServerNotRunningError
 )
 
 from .lafzize import LafzizeProcessor
@@ -23,6 +29,29 @@ from .assembler import SegmentAssembler
 logger = logging.getLogger(__name__)
 
 
+def _scan_exists(paths) -> Dict[str, bool]:
+    """
+    Existence of each path, from one os.scandir per distinct parent directory
+    instead of a stat per path. Keys are os.fspath(path), matching the
+    exists_cache used by RabtizeProcessor.is_ready.
+    """
+    by_dir: Dict[str, List[str]] = {}
+    for path in paths:
+        key = os.fspath(path)
+        by_dir.setdefault(os.path.dirname(key) or ".", []).append(key)
+    
+    exists: Dict[str, bool] = {}
+    for directory, keys in by_dir.items():
+        try:
+            with os.scandir(directory) as it:
+                names = {entry.name for entry in it if entry.is_file()}
+        except OSError:
+            names = set()
+        for key in keys:
+            exists[key] = os.path.basename(key) in names
+    return exists
+
+
 class QuranSegmenterPipeline:
     """
     Main orchestrator for the Quran segmentation pipeline.
@@ -44,38 +73,57 @@ class QuranSegmenterPipeline:
     
     def __init__(self, config: Optional[Config] = None):
         self.config = config or get_config()
-        self.cache = CacheManager(self.config.cache_dir)
-        self.metadata = load_quran_metadata(self.config.quran_metadata_file)
+        self.cache = CacheManager(self.config.cache_dir, strict=self.config.lafzize.strict_cache)
+        # Guards first construction of the lazy components below, which
+        # process_batch workers may touch concurrently
+        self._init_lock = threading.RLock()
         
-        # Initialize processors lazily
-        self._lafzize: Optional[LafzizeProcessor] = None
-        self._jumlize: Optional[JumlizeProcessor] = None
-        self._rabtize: Optional[RabtizeProcessor] = None
-        self._assembler: Optional[SegmentAssembler] = None
+        # translation_id -> (config fingerprint, (ready, missing))
+        self._readiness: Dict[str, Tuple[tuple, Tuple[bool, List[str]]]] = {}
+        
+        # verse spec -> VerseRange fields, against this pipeline's metadata
+        self._verse_spec_fields = lru_cache(maxsize=1024)(self._parse_verse_fields)
+    
+    def _parse_verse_fields(self, verses: str) -> tuple:
+        vr = parse_verse_spec(verses, self.metadata)
+        return (vr.surah, vr.start_verse, vr.end_verse, vr.include_basmalah, vr.include_taawwudh)
+    
+    def _parse_verses(self, verses: str) -> VerseRange:
+        """
+        parse_verse_spec, memoized per spec string. VerseRange is mutable, so
+        each call gets its own instance built from the cached fields.
+        """
+        return VerseRange(*self._verse_spec_fields(verses.strip()))
     
-    @property
+    def _init_once(self, name: str, factory: Callable[[], Any]) -> Any:
+        """Build a lazy component exactly once, even under concurrent first access."""
+        with self._init_lock:
+            if name not in self.__dict__:
+                self.__dict__[name] = factory()
+            return self.__dict__[name]
+    
+    @cached_property
+    def metadata(self) -> QuranMetadata:
+        """Surah verse counts, loaded on first verse-spec parse."""
+        return self._init_once(
+            "metadata", lambda: load_quran_metadata(self.config.quran_metadata_file)
+        )
+    
+    @cached_property
     def lafzize(self) -> LafzizeProcessor:
-        if self._lafzize is None:
-            self._lafzize = LafzizeProcessor(self.config, self.cache)
-        return self._lafzize
+        return self._init_once("lafzize", lambda: LafzizeProcessor(self.config, self.cache))
     
-    @property
+    @cached_property
     def jumlize(self) -> JumlizeProcessor:
-        if self._jumlize is None:
-            self._jumlize = JumlizeProcessor(self.config)
-        return self._jumlize
+        return self._init_once("jumlize", lambda: JumlizeProcessor(self.config))
     
-    @property
+    @cached_property
     def rabtize(self) -> RabtizeProcessor:
-        if self._rabtize is None:
-            self._rabtize = RabtizeProcessor(self.config, self.cache)
-        return self._rabtize
+        return self._init_once("rabtize", lambda: RabtizeProcessor(self.config, self.cache))
     
-    @property
+    @cached_property
     def assembler(self) -> SegmentAssembler:
-        if self._assembler is None:
-            self._assembler = SegmentAssembler(self.config)
-        return self._assembler
+        return self._init_once("assembler", lambda: SegmentAssembler(self.config))
     
     # -------------------------------------------------------------------------
     # Translation Management
@@ -105,19 +153,56 @@ class QuranSegmenterPipeline:
     def list_translations(self) -> List[Dict[str, Any]]:
         """List all registered translations with their status."""
         result = []
+        # One directory read answers every embeddings file check
+        exists_cache = _scan_exists(
+            [self.config.spans_embeddings_path]
+            + [tc.embeddings_path for tc in self.config.translations.values() if tc.embeddings_path]
+        )
         for tid, tc in self.config.translations.items():
-            ready, missing = self.rabtize.is_ready(tid) if tc.is_segmented else (False, ["segmentation"])
+            if tc.is_segmented:
+                ready, missing = self._is_ready(tid, exists_cache=exists_cache)
+            else:
+                ready, missing = False, ["segmentation"]
             result.append({
                 "id": tid,
                 "name": tc.name,
                 "language": tc.language_code,
                 "is_segmented": tc.is_segmented,
-                "has_embeddings": tc.embeddings_path is not None and tc.embeddings_path.exists(),
+                "has_embeddings": bool(tc.embeddings_path) and exists_cache[os.fspath(tc.embeddings_path)],
                 "ready_for_processing": ready,
                 "missing": missing if not ready else []
             })
         return result
     
+    def _is_ready(
+        self,
+        translation_id: str,
+        exists_cache: Optional[Dict[str, bool]] = None
+    ) -> Tuple[bool, List[str]]:
+        """
+        rabtize.is_ready, memoized per translation for the pipeline's lifetime.
+        
+        The memo is keyed on the config fields readiness depends on, so
+        update_translation_status (or generating spans embeddings) invalidates
+        just the affected entries.
+        """
+        try:
+            tc = self.config.get_translation(translation_id)
+        except ValueError:
+            return self.rabtize.is_ready(translation_id, exists_cache=exists_cache)
+        fingerprint = (
+            tc.is_segmented,
+            tc.embeddings_path,
+            os.fspath(self.config.spans_embeddings_path),
+            self.config.spans_embeddings_generated,
+        )
+        memo = self._readiness.get(translation_id)
+        if memo is None or memo[0] != fingerprint:
+            ready, missing = self.rabtize.is_ready(translation_id, exists_cache=exists_cache)
+            memo = self._readiness[translation_id] = (fingerprint, (ready, list(missing)))
+        ready, missing = memo[1]
+        return ready, list(missing)
+    
     # -------------------------------------------------------------------------
     # Preparation Steps (One-time per translation)
     # -------------------------------------------------------------------------
@@ -147,6 +232,11 @@ class QuranSegmenterPipeline:
             
         Returns:
             Status dictionary with results
+        
+        Each completed step saves config.json right away, so an interrupted
+        run never loses a finished (and paid-for) segmentation. When preparing
+        many translations, wrap the loop in `config.batched_save()` to write
+        the config once instead.
         """
         status = {"translation_id": translation_id, "steps": {}}
         
@@ -191,9 +281,9 @@ class QuranSegmenterPipeline:
                 status["steps"]["spans_embeddings"] = f"failed: {e}"
                 raise
         
-        # Step 3: Segment embeddings
-        tc = self.config.get_translation(translation_id)  # Refresh
-        if tc.embeddings_path and Path(tc.embeddings_path).exists() and not force:
+        # Step 3: Segment embeddings (tc is the live config entry, so it
+        # already reflects any update made by the steps above)
+        if tc.embeddings_path and tc.get_embeddings_path().exists() and not force:
             logger.info(f"Segment embeddings already exist for {translation_id}")
             status["steps"]["segment_embeddings"] = "already_done"
         else:
@@ -236,43 +326,22 @@ class QuranSegmenterPipeline:
         Returns:
             ProcessingResult with timed segments
         """
-        audio_path = Path(audio_path)
+        # Absolute: an in-process rabtize run chdirs while lafzize reads the file
+        audio_path = Path(audio_path).absolute()
         if not audio_path.exists():
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
         
         # Parse verse specification
-        verse_range = parse_verse_spec(verses, self.metadata)
+        verse_range = self._parse_verses(verses)
         logger.info(f"Processing {audio_path.name} for verses {verse_range}")
         
         # Verify translation is ready
-        ready, missing = self.rabtize.is_ready(translation_id)
+        ready, missing = self._is_ready(translation_id)
         if not ready:
             raise TranslationNotPreparedError(translation_id, ", ".join(missing))
         
-        # Step 1: Get word timestamps
-        logger.info("Step 1/3: Getting word timestamps (lafzize)")
-        timestamps = self.lafzize.process(
-            audio_path=audio_path,
-            verse_range=verse_range,
-            use_cache=use_cache,
-            start_server=start_server
-        )
-        
-        # Step 2: Get alignment
-        logger.info("Step 2/3: Getting alignment (rabtize)")
-        alignment = self.rabtize.align(
-            translation_id=translation_id,
-            verse_range=verse_range,
-            use_cache=use_cache
-        )
-        
-        # Step 3: Assemble final segments
-        logger.info("Step 3/3: Assembling segments")
-        result = self.assembler.assemble(
-            verse_range=verse_range,
-            timestamps=timestamps,
-            alignment=alignment
-        )
+        result = self._run(audio_path, verse_range, translation_id, use_cache, start_server)
+        self.cache.flush()
         
         # Save if output path provided
         if output_path:
@@ -290,7 +359,134 @@ class QuranSegmenterPipeline:
         
         return result
     
+    def process_batch(
+        self,
+        jobs: Sequence[Tuple[Path, str, str]],
+        max_concurrency: int = 4,
+        timeout: Optional[float] = None,
+        max_retries: int = 0,
+        use_cache: bool = True,
+        start_server: bool = True
+    ) -> List[ProcessingResult]:
+        """
+        Process several recordings with a bounded pool of workers.
+        
+        Every job is validated before any work starts. The lafzize server is
+        started once and its HTTP session (keep-alive) is shared by all jobs;
+        rabtize alignments are serialized, so the first job for a translation
+        computes it and the rest reuse the in-memory copy.
+        
+        Args:
+            jobs: (audio_path, verses, translation_id) per recording
+            max_concurrency: Jobs in flight at once
+            timeout: Per-request lafzize timeout (defaults to config)
+            max_retries: Retries per job after a lafzize failure
+            use_cache: Whether to use cached intermediate results
+            start_server: Whether to start the lafzize server automatically
+            
+        Returns:
+            One ProcessingResult per job, in input order; a job that still
+            fails after retries gets a result with the error in `errors`.
+        """
+        parsed = []
+        exists_cache: Dict[str, bool] = {}
+        checked = set()
+        for audio_path, verses, translation_id in jobs:
+            audio_path = Path(audio_path).absolute()
+            if not audio_path.exists():
+                raise FileNotFoundError(f"Audio file not found: {audio_path}")
+            if translation_id not in checked:
+                ready, missing = self._is_ready(translation_id, exists_cache=exists_cache)
+                if not ready:
+                    raise TranslationNotPreparedError(translation_id, ", ".join(missing))
+                checked.add(translation_id)
+            parsed.append((audio_path, self._parse_verses(verses), translation_id))
+        
+        if not parsed:
+            return []
+        if start_server and not self.lafzize.server.start():
+            raise ServerNotRunningError(
+                f"Could not start lafzize server\nServer log (tail):\n{self.lafzize.server.get_log()}"
+            )
+        
+        align_lock = threading.Lock()
+        
+        def run_job(job: Tuple[Path, VerseRange, str]) -> ProcessingResult:
+            audio_path, verse_range, translation_id = job
+            for attempt in range(max_retries + 1):
+                try:
+                    return self._run(
+                        audio_path, verse_range, translation_id, use_cache,
+                        start_server=False, lafzize_timeout=timeout, align_lock=align_lock
+                    )
+                except LafzizeError as e:
+                    if attempt < max_retries:
+                        logger.warning(f"Retrying {audio_path.name} after lafzize error: {e}")
+                        continue
+                    error = e
+                except Exception as e:
+                    error = e
+                    break
+            logger.error(f"Failed {audio_path.name} ({verse_range}): {error}")
+            return ProcessingResult(verse_range=verse_range, errors=[str(error)])
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+            results = list(executor.map(run_job, parsed))
+        # Jobs only mark the cache index dirty; write it once for the batch
+        self.cache.flush()
+        
+        logger.info(
+            f"Processed {len(results)} jobs, "
+            f"{sum(1 for r in results if r.errors)} failed"
+        )
+        return results
+    
+    def _run(
+        self,
+        audio_path: Path,
+        verse_range: VerseRange,
+        translation_id: str,
+        use_cache: bool,
+        start_server: bool,
+        lafzize_timeout: Optional[float] = None,
+        align_lock: Optional[threading.Lock] = None
+    ) -> ProcessingResult:
+        """Timestamps, alignment and assembly for one already-validated job."""
+        lafzize_kwargs = {"timeout": lafzize_timeout} if lafzize_timeout is not None else {}
+        
+        # Steps 1 and 2 only share verse_range, so they run side by side:
+        # lafzize (HTTP to the local server) in a worker thread while rabtize
+        # aligns in this one. Wall time is the slower of the two, not the sum.
+        logger.info("Step 1/3: Getting word timestamps (lafzize)")
+        logger.info("Step 2/3: Getting alignment (rabtize)")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            timestamps_future = executor.submit(
+                self.lafzize.process,
+                audio_path=audio_path,
+                verse_range=verse_range,
+                use_cache=use_cache,
+                start_server=start_server,
+                **lafzize_kwargs
+            )
+            with align_lock or nullcontext():
+                alignment = self.rabtize.align(
+                    translation_id=translation_id,
+                    verse_range=verse_range,
+                    use_cache=use_cache
+                )
+            timestamps = timestamps_future.result()
+        
+        # Step 3: Assemble final segments
+        logger.info("Step 3/3: Assembling segments")
+        return self.assembler.assemble(
+            verse_range=verse_range,
+            timestamps=timestamps,
+            alignment=alignment
+        )
+    
     def cleanup(self):
         """Cleanup resources (stop servers, etc.)."""
-        if self._lafzize:
-            self._lafzize.stop_server()
+        self.cache.flush()
+        lafzize = self.__dict__.get("lafzize")
+        if lafzize:
+            lafzize.stop_server()
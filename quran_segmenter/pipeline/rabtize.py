@@ -2,89 +2,285 @@
 """
 Rabtize integration for embedding generation and alignment.
 """
+import atexit
 import json
+import os
+import re
+import runpy
 import subprocess
 import sys
+import threading
+from collections import deque
 from pathlib import Path
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, Tuple, List
 import logging
 
 from ..config import Config, TranslationConfig
 from ..models import VerseRange
-from ..utils.cache import CacheManager
+from ..utils.cache import CacheManager, file_digest, safe_name
+from ..utils.jsonio import iter_items, read_json
 from ..utils.progress import ProgressReporter
+from ..utils.storage import link_or_copy
 from ..exceptions import RabtizeError, TranslationNotPreparedError
+from .rabtize_worker import DONE_MARKER
 
 logger = logging.getLogger(__name__)
 
+# Bytes pulled from the rabtize output pipe per read
+OUTPUT_READ_SIZE = 1 << 16
+
+# Script run by the persistent worker (see rabtize_worker.py)
+_WORKER_SCRIPT = Path(__file__).with_name("rabtize_worker.py")
+
+# Classify rabtize output lines with one scan each (no lowercased copies)
+_PROGRESS_RE = re.compile(r"Batches:|%")
+_STATUS_RE = re.compile(r"Generating|Loading|Saving")
+_ERROR_RE = re.compile(r"error|exception", re.IGNORECASE)
+
+
+def _iter_output_lines(pipe):
+    """
+    Decoded lines from a binary pipe, read in OUTPUT_READ_SIZE chunks.
+    
+    Carriage returns count as line ends, as they did in text mode, so each
+    progress-bar redraw arrives as its own line.
+    """
+    read = getattr(pipe, "read1", pipe.read)
+    pending = b""
+    for chunk in iter(lambda: read(OUTPUT_READ_SIZE), b""):
+        *lines, pending = (pending + chunk).replace(b"\r\n", b"\n").replace(b"\r", b"\n").split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8", errors="replace")
+    if pending:
+        yield pending.decode("utf-8", errors="replace")
+
+
+def _prefetch(path) -> bool:
+    """
+    Ask the kernel to start reading path into the page cache (readahead).
+    
+    Returns False where posix_fadvise is unavailable or refused.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        return False
+    return True
+
 
 class RabtizeProcessor:
     """Handles embedding generation and translation-to-Arabic alignment."""
     
+    # Lines of subprocess output retained for error messages
+    OUTPUT_TAIL_LINES = 200
+    
     def __init__(self, config: Config, cache: CacheManager):
         self.config = config
         self.cache = cache
+        # Full ("all") alignments kept in memory for this session:
+        # translation_id -> ((embeddings_path, mtime_ns), alignment)
+        self._full_alignments: Dict[str, Tuple[tuple, Dict]] = {}
+        # Persistent rabtize process and its line reader (rabtize.worker)
+        self._worker: Optional[subprocess.Popen] = None
+        self._worker_lines = None
         
         if not self.config.rabtize_dir.exists():
             raise RabtizeError(f"Rabtize directory not found: {self.config.rabtize_dir}")
     
+    def _stage_file(self, src: Path) -> Path:
+        """
+        Make src available in the rabtize directory under its own name.
+        
+        rabtize only reads its inputs, so a hardlink (or reflink across
+        filesystems) replaces the full copy each run used to make.
+        """
+        return link_or_copy(src, self.config.rabtize_dir / Path(src).name)
+    
     def _run_rabtize_with_progress(
         self,
         args: list,
         desc: str,
         timeout: int = 14400
     ) -> str:
-        """Run rabtize command with progress output."""
+        """Run rabtize command with progress output. Returns the tail of its output."""
         # Copy required files to rabtize directory
         qpc_dst = self.config.rabtize_dir / "qpc-hafs-word-by-word.json"
         if not qpc_dst.exists() and self.config.qpc_words_file.exists():
-            import shutil
-            shutil.copy(self.config.qpc_words_file, qpc_dst)
-        
-        cmd = [
-            sys.executable,
-            "-m", "rabtize.main",
-        ] + args
-        
-        logger.info(f"Running: {' '.join(cmd)}")
-        print(f"\n{desc}")
-        print("-" * 50)
-        
-        process = subprocess.Popen(
-            cmd,
-            cwd=str(self.config.rabtize_dir),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1
-        )
+            self._stage_file(self.config.qpc_words_file)
+        
+        if self.config.rabtize.in_process:
+            print(f"\n{desc}")
+            print("-" * 50)
+            self._run_rabtize_in_process(args)
+            return ""
+        
+        if self.config.rabtize.worker:
+            logger.info(f"Running in worker: rabtize.main {' '.join(args)}")
+            print(f"\n{desc}")
+            print("-" * 50)
+            returncode, output_lines = self._run_rabtize_in_worker(args, timeout)
+        else:
+            cmd = [
+                sys.executable,
+                "-m", "rabtize.main",
+            ] + args
+            
+            logger.info(f"Running: {' '.join(cmd)}")
+            print(f"\n{desc}")
+            print("-" * 50)
+            
+            # Binary pipe with the default buffer, read in large chunks: tqdm redraws
+            # many times a second, and line-buffered text reads cost a syscall each
+            process = subprocess.Popen(
+                cmd,
+                cwd=str(self.config.rabtize_dir),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT
+            )
+            output_lines = self._echo_output(_iter_output_lines(process.stdout))
+            returncode = process.wait()
+        print()  # New line after progress
         
-        output_lines = []
-        batch_count = 0
-        total_batches = None
+        if returncode != 0:
+            full_output = "".join(output_lines)
+            logger.error(f"Rabtize failed:\n{full_output[-2000:]}")
+            raise RabtizeError(f"Rabtize command failed (exit code {returncode})")
         
-        for line in iter(process.stdout.readline, ''):
-            output_lines.append(line)
+        return "".join(output_lines)
+    
+    def _echo_output(self, lines) -> deque:
+        """Show progress/status lines from rabtize; returns the output tail."""
+        # Only the tail is kept for error reporting; long embedding runs print a lot
+        output_lines = deque(maxlen=self.OUTPUT_TAIL_LINES)
+        
+        for line in lines:
+            output_lines.append(line + "\n")
             
             # Parse progress from rabtize output
-            if "Batches:" in line or "%" in line:
+            if _PROGRESS_RE.search(line):
                 print(f"\r  {line.strip()}", end="", flush=True)
-            elif "Generating" in line or "Loading" in line or "Saving" in line:
+            elif _STATUS_RE.search(line):
                 print(f"  {line.strip()}")
             
             # Check for errors
-            if "error" in line.lower() or "exception" in line.lower():
+            if _ERROR_RE.search(line):
                 logger.warning(line.strip())
         
-        process.wait()
-        print()  # New line after progress
+        return output_lines
+    
+    def _ensure_worker(self) -> subprocess.Popen:
+        """Start the persistent rabtize process unless it is already running."""
+        if self._worker is None or self._worker.poll() is not None:
+            self._worker = subprocess.Popen(
+                [sys.executable, "-u", str(_WORKER_SCRIPT)],
+                cwd=str(self.config.rabtize_dir),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT
+            )
+            # One reader for the worker's lifetime, so nothing buffered past
+            # a command's end marker is lost
+            self._worker_lines = _iter_output_lines(self._worker.stdout)
+            # Only processors that started a worker stay referenced until exit
+            atexit.register(self.stop_worker)
+        return self._worker
+    
+    def _run_rabtize_in_worker(self, args: list, timeout: float = 14400) -> Tuple[int, deque]:
+        """
+        Run one rabtize.main command in the persistent worker process.
         
-        if process.returncode != 0:
-            full_output = "".join(output_lines)
-            logger.error(f"Rabtize failed:\n{full_output[-2000:]}")
-            raise RabtizeError(f"Rabtize command failed (exit code {process.returncode})")
+        A command still running after `timeout` seconds kills the worker
+        (RabtizeError); the next call starts a fresh one.
+        """
+        worker = self._ensure_worker()
+        result = []
         
-        return "".join(output_lines)
+        def until_done():
+            for line in self._worker_lines:
+                if line.startswith(DONE_MARKER):
+                    result.append(int(line.rsplit(" ", 1)[1]))
+                    return
+                yield line
+        
+        try:
+            worker.stdin.write((json.dumps(list(args)) + "\n").encode("utf-8"))
+            worker.stdin.flush()
+        except OSError as e:
+            self.stop_worker()
+            raise RabtizeError(f"Rabtize worker is not accepting commands: {e}") from e
+        
+        # Killing the worker ends its output, which unblocks the read below
+        timed_out = threading.Event()
+        
+        def expire():
+            timed_out.set()
+            worker.kill()
+        
+        timer = threading.Timer(timeout, expire)
+        timer.daemon = True
+        timer.start()
+        try:
+            output_lines = self._echo_output(until_done())
+        finally:
+            timer.cancel()
+        if timed_out.is_set():
+            self.stop_worker()
+            if not result:
+                raise RabtizeError(f"Rabtize worker timed out after {timeout}s")
+        elif not result:
+            # The worker exited mid-command; the next call starts a fresh one
+            code = worker.wait()
+            self.stop_worker()
+            return (code or 1), output_lines
+        return result[0], output_lines
+    
+    def stop_worker(self):
+        """Shut down the persistent rabtize process, if one is running."""
+        worker, self._worker, self._worker_lines = self._worker, None, None
+        if worker is None:
+            return
+        atexit.unregister(self.stop_worker)
+        if worker.poll() is None:
+            try:
+                worker.stdin.close()
+                worker.wait(timeout=10)
+            except (OSError, subprocess.TimeoutExpired):
+                worker.kill()
+                worker.wait()
+        if worker.stdout:
+            worker.stdout.close()
+    
+    def _run_rabtize_in_process(self, args: list):
+        """
+        Run rabtize.main inside the current interpreter.
+        
+        torch/sentence-transformers stay imported between calls, so repeated
+        alignment and embedding runs skip interpreter and CUDA start-up.
+        """
+        rabtize_dir = str(self.config.rabtize_dir)
+        if rabtize_dir not in sys.path:
+            sys.path.insert(0, rabtize_dir)
+        
+        logger.info(f"Running in-process: rabtize.main {' '.join(args)}")
+        saved_argv, saved_cwd = sys.argv, os.getcwd()
+        sys.argv = ["rabtize.main"] + list(args)
+        os.chdir(rabtize_dir)
+        try:
+            runpy.run_module("rabtize.main", run_name="__main__", alter_sys=True)
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                raise RabtizeError(f"Rabtize command failed (exit code {e.code})") from e
+        except Exception as e:
+            raise RabtizeError(f"Rabtize command failed: {e}") from e
+        finally:
+            sys.argv = saved_argv
+            os.chdir(saved_cwd)
     
     def generate_spans_embeddings(self, force: bool = False) -> Path:
         """
@@ -94,8 +290,10 @@ class RabtizeProcessor:
         Takes ~1-2 hours on GPU.
         """
         output_path = self.config.spans_embeddings_path
+        qpc_file = self.config.qpc_words_file
+        digest = file_digest(qpc_file, self.config.rabtize.embedding_model) if qpc_file.exists() else None
         
-        if not force and output_path.exists():
+        if not force and self._is_up_to_date(output_path, digest):
             logger.info(f"✓ Spans embeddings already exist: {output_path}")
             return output_path
         
@@ -112,12 +310,10 @@ class RabtizeProcessor:
             dummy.write_text('{"1:1": {"text": "test"}}')
             translation_file = str(dummy)
         
-        # Copy translation to rabtize dir
-        import shutil
+        # Stage translation in rabtize dir
         trans_name = Path(translation_file).name
-        trans_dst = self.config.rabtize_dir / trans_name
-        if not trans_dst.exists():
-            shutil.copy(translation_file, trans_dst)
+        if not (self.config.rabtize_dir / trans_name).exists():
+            self._stage_file(Path(translation_file))
         
         args = [
             f"--words={self.config.qpc_words_file.name}",
@@ -144,6 +340,7 @@ class RabtizeProcessor:
         if not output_path.exists():
             raise RabtizeError("Spans embeddings generation failed - no output file")
         
+        self._record_digest(output_path, digest)
         self.config.spans_embeddings_generated = True
         self.config.save()
         
@@ -174,16 +371,14 @@ class RabtizeProcessor:
             raise FileNotFoundError(f"Segmented file not found: {segmented_path}")
         
         output_path = self.config.embeddings_dir / f"{translation_id}.npz"
+        digest = file_digest(segmented_path, self.config.rabtize.embedding_model)
         
-        if not force and output_path.exists():
+        if not force and self._is_up_to_date(output_path, digest):
             logger.info(f"✓ Segment embeddings already exist: {output_path}")
             return output_path
         
-        # Copy translation to rabtize dir
-        import shutil
-        trans_name = segmented_path.name
-        trans_dst = self.config.rabtize_dir / trans_name
-        shutil.copy(segmented_path, trans_dst)
+        # Stage translation in rabtize dir
+        trans_name = self._stage_file(segmented_path).name
         
         args = [
             f"--words={self.config.qpc_words_file.name}",
@@ -206,6 +401,7 @@ class RabtizeProcessor:
         if not output_path.exists():
             raise RabtizeError(f"Segment embeddings generation failed for {translation_id}")
         
+        self._record_digest(output_path, digest)
         self.config.update_translation(translation_id, embeddings_path=output_path)
         
         print(f"✓ Segment embeddings saved to: {output_path}")
@@ -213,6 +409,78 @@ class RabtizeProcessor:
         
         return output_path
     
+    def generate_segment_embeddings_batch(
+        self,
+        translation_ids: List[str],
+        force: bool = False
+    ) -> Dict[str, Path]:
+        """
+        Generate segment embeddings for several translations in one session.
+        
+        Already-embedded translations are skipped up front. With
+        `rabtize.in_process` enabled the embedding libraries are imported once
+        and shared by every run instead of once per translation.
+        """
+        results = {}
+        pending = []
+        for translation_id in dict.fromkeys(translation_ids):
+            existing = None if force else self._current_segment_embeddings(translation_id)
+            if existing:
+                logger.info(f"✓ Segment embeddings already exist: {existing}")
+                results[translation_id] = existing
+            else:
+                pending.append(translation_id)
+        
+        for i, translation_id in enumerate(pending, 1):
+            print(f"\n[{i}/{len(pending)}] {translation_id}")
+            results[translation_id] = self.generate_segment_embeddings(translation_id, force=force)
+        
+        return results
+    
+    def _current_segment_embeddings(self, translation_id: str) -> Optional[Path]:
+        """Existing segment embeddings for translation_id, if built from its current file."""
+        try:
+            tc = self.config.get_translation(translation_id)
+            segmented_path = tc.get_segmented_path() or tc.get_file_path()
+            digest = file_digest(segmented_path, self.config.rabtize.embedding_model)
+        except (ValueError, OSError):
+            # Left to generate_segment_embeddings to report
+            return None
+        output_path = self.config.embeddings_dir / f"{translation_id}.npz"
+        return output_path if self._is_up_to_date(output_path, digest) else None
+    
+    @staticmethod
+    def _digest_path(output_path: Path) -> Path:
+        return output_path.with_name(output_path.name + ".digest")
+    
+    def _is_up_to_date(self, output_path: Path, digest: Optional[str]) -> bool:
+        """
+        Whether output_path exists and was built from inputs with this digest.
+        
+        Outputs from before digests were recorded (or with no digest to
+        compare against) are trusted as they are.
+        """
+        if not output_path.exists():
+            return False
+        if digest is None:
+            return True
+        try:
+            recorded = self._digest_path(output_path).read_text().strip()
+        except FileNotFoundError:
+            return True
+        if recorded != digest:
+            logger.info(f"Inputs changed since {output_path.name} was built; regenerating")
+            return False
+        return True
+    
+    def _record_digest(self, output_path: Path, digest: Optional[str]):
+        if digest is None:
+            return
+        sidecar = self._digest_path(output_path)
+        tmp = sidecar.with_name(sidecar.name + ".tmp")
+        tmp.write_text(digest)
+        os.replace(tmp, sidecar)
+    
     def align(
         self,
         translation_id: str,
@@ -225,29 +493,36 @@ class RabtizeProcessor:
         # Check prerequisites
         if not tc.is_segmented:
             raise TranslationNotPreparedError(translation_id, "segmentation")
-        if not tc.embeddings_path or not Path(tc.embeddings_path).exists():
+        if not tc.embeddings_path or not os.path.exists(tc.embeddings_path):
             raise TranslationNotPreparedError(translation_id, "segment embeddings")
-        if not self.config.spans_embeddings_path.exists():
+        if not os.path.exists(self.config.spans_embeddings_path):
             raise TranslationNotPreparedError(translation_id, "spans embeddings (run generate_spans_embeddings first)")
         
         verse_range_str = str(verse_range) if verse_range else "all"
         
         # Check cache
         if use_cache:
+            # Fast path: full alignment already parsed earlier in this session
+            memo_key = self._alignment_memo_key(tc)
+            memo = self._full_alignments.get(translation_id)
+            if memo is not None and memo[0] == memo_key:
+                logger.info(f"Using in-memory alignment for {translation_id} -> {verse_range_str}")
+                return self._filter_alignment(memo[1], verse_range) if verse_range else dict(memo[1])
+            
             # If a full alignment is cached, reuse it and filter to the requested range.
-            if verse_range:
-                cached_all = self.cache.get_cached_alignment(translation_id, "all")
-                if cached_all:
-                    logger.info(
-                        f"Using cached alignment for {translation_id} (all) -> {verse_range_str}"
-                    )
-                    verse_keys = set(verse_range.verse_keys())
-                    return {k: v for k, v in cached_all.items() if k in verse_keys}
+            cached_all = self.cache.get_cached_alignment(translation_id, "all")
+            if cached_all:
+                logger.info(
+                    f"Using cached alignment for {translation_id} (all) -> {verse_range_str}"
+                )
+                self._full_alignments[translation_id] = (memo_key, cached_all)
+                return self._filter_alignment(cached_all, verse_range) if verse_range else dict(cached_all)
 
-            cached = self.cache.get_cached_alignment(translation_id, verse_range_str)
-            if cached:
-                logger.info(f"Using cached alignment for {translation_id} {verse_range_str}")
-                return cached
+            if verse_range:
+                cached = self.cache.get_cached_alignment(translation_id, verse_range_str)
+                if cached:
+                    logger.info(f"Using cached alignment for {translation_id} {verse_range_str}")
+                    return cached
         
         logger.info(f"Running alignment for {translation_id}...")
         
@@ -256,14 +531,20 @@ class RabtizeProcessor:
         run_full = verse_range is None or (use_cache and verse_range)
         run_range_str = "all" if run_full else verse_range_str
         
-        # Copy files to rabtize dir
-        import shutil
+        # Stage files in rabtize dir
         segmented_path = tc.get_segmented_path() or tc.get_file_path()
-        trans_name = segmented_path.name
-        trans_dst = self.config.rabtize_dir / trans_name
-        shutil.copy(segmented_path, trans_dst)
+        trans_name = self._stage_file(segmented_path).name
         
-        output_path = self.config.cache_dir / f"align_{translation_id}_{run_range_str.replace(':', '_').replace('-', '_')}.json"
+        # When caching, rabtize writes next to the cache slot and the file is
+        # renamed into place, so the result is parsed once, never
+        # re-serialized, and an interrupted run leaves no truncated cache
+        if use_cache:
+            output_path = self.cache.get_alignment_path(translation_id, run_range_str)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            run_output = output_path.with_name(output_path.name + ".partial")
+        else:
+            output_path = self.config.cache_dir / f"align_{translation_id}_{safe_name(run_range_str)}.json"
+            run_output = output_path
         
         args = [
             f"--words={self.config.qpc_words_file.name}",
@@ -271,34 +552,127 @@ class RabtizeProcessor:
             "align",
             f"-sp={self.config.spans_embeddings_path}",
             f"-se={tc.embeddings_path}",
-            str(output_path)
+            str(run_output)
         ]
         
+        # Start the embeddings loading while rabtize is still starting up
+        _prefetch(self.config.spans_embeddings_path)
+        _prefetch(tc.embeddings_path)
+        
         self._run_rabtize_with_progress(args, "Aligning segments to Arabic...", timeout=300)
         
-        if not output_path.exists():
+        if not run_output.exists():
             raise RabtizeError("Alignment failed - no output file")
+        if run_output != output_path:
+            os.replace(run_output, output_path)
         
-        with open(output_path, "r", encoding="utf-8") as f:
-            alignment = json.load(f)
+        if verse_range and not use_cache:
+            # Nothing keeps the full alignment, so only the requested verses
+            # are materialized (streamed when ijson is installed)
+            verse_keys = verse_range.verse_key_set
+            alignment = {k: v for k, v in iter_items(output_path) if k in verse_keys}
+            logger.info(f"✓ Alignment complete: {len(alignment)} verses")
+            return alignment
         
-        # Cache result
+        alignment = read_json(output_path)
+        
+        # Cache result (file is already in place)
         if use_cache:
+            self.cache.register_alignment(translation_id, run_range_str, output_path)
             if run_range_str == "all":
-                self.cache.cache_alignment(translation_id, "all", alignment)
-            else:
-                self.cache.cache_alignment(translation_id, verse_range_str, alignment)
+                self._full_alignments[translation_id] = (self._alignment_memo_key(tc), alignment)
         
         # Filter to verse range if specified
         if verse_range:
-            verse_keys = set(verse_range.verse_keys())
-            alignment = {k: v for k, v in alignment.items() if k in verse_keys}
+            alignment = self._filter_alignment(alignment, verse_range)
+        elif use_cache:
+            alignment = dict(alignment)
         
         logger.info(f"✓ Alignment complete: {len(alignment)} verses")
         return alignment
     
-    def is_ready(self, translation_id: str) -> Tuple[bool, list]:
-        """Check if translation is ready for alignment."""
+    def align_many(
+        self,
+        translation_ids: List[str],
+        verse_range: Optional[VerseRange] = None,
+        use_cache: bool = True
+    ) -> Dict[str, Dict]:
+        """
+        Align several translations to the same verse range.
+        
+        Prerequisites are checked for every translation before any alignment
+        runs, so a missing embedding fails fast instead of after minutes of
+        GPU work. With `rabtize.worker` or `rabtize.in_process` enabled the
+        runs share one interpreter, so torch/sentence-transformers are imported
+        once; rabtize.main itself (and its model load) still runs per translation.
+        """
+        translation_ids = list(dict.fromkeys(translation_ids))
+        exists_cache: Dict[str, bool] = {}
+        for translation_id in translation_ids:
+            self.config.get_translation(translation_id)  # unknown ids raise as in align()
+            ready, missing = self.is_ready(translation_id, exists_cache)
+            if not ready:
+                raise TranslationNotPreparedError(translation_id, ", ".join(missing))
+        
+        if use_cache:
+            # Read the cached full alignments not yet in memory side by side;
+            # align() below then finds them in the cache's memory
+            cold = [
+                translation_id for translation_id in translation_ids
+                if not self._has_full_alignment(translation_id)
+            ]
+            self.cache.get_cached_alignments([(translation_id, "all") for translation_id in cold])
+        
+        return {
+            translation_id: self.align(translation_id, verse_range, use_cache)
+            for translation_id in translation_ids
+        }
+    
+    def _has_full_alignment(self, translation_id: str) -> bool:
+        """Whether align() can serve this translation from _full_alignments."""
+        memo = self._full_alignments.get(translation_id)
+        return memo is not None and memo[0] == self._alignment_memo_key(
+            self.config.get_translation(translation_id)
+        )
+    
+    @staticmethod
+    def _alignment_memo_key(tc: TranslationConfig) -> tuple:
+        """Identity of the inputs behind a memoized alignment (re-embedding invalidates it)."""
+        try:
+            mtime = os.stat(tc.embeddings_path).st_mtime_ns
+        except (OSError, TypeError):
+            mtime = None
+        return (tc.embeddings_path, mtime)
+    
+    @staticmethod
+    def _filter_alignment(alignment: Dict, verse_range: VerseRange) -> Dict:
+        """Restrict an alignment to verse_range, iterating whichever side is smaller."""
+        if len(verse_range.verse_key_set) < len(alignment):
+            return {k: alignment[k] for k in verse_range.verse_keys() if k in alignment}
+        verse_keys = verse_range.verse_key_set
+        return {k: v for k, v in alignment.items() if k in verse_keys}
+    
+    @staticmethod
+    def _path_exists(path, exists_cache: Optional[Dict[str, bool]] = None) -> bool:
+        """os.path.exists, memoized in exists_cache when one is given."""
+        if exists_cache is None:
+            return os.path.exists(path)
+        key = os.fspath(path)
+        if key not in exists_cache:
+            exists_cache[key] = os.path.exists(key)
+        return exists_cache[key]
+    
+    def is_ready(
+        self,
+        translation_id: str,
+        exists_cache: Optional[Dict[str, bool]] = None
+    ) -> Tuple[bool, list]:
+        """
+        Check if translation is ready for alignment.
+        
+        Pass the same `exists_cache` dict when checking several translations so
+        shared files (spans embeddings) are only stat'ed once.
+        """
         missing = []
         
         try:
@@ -309,10 +683,10 @@ class RabtizeProcessor:
         if not tc.is_segmented:
             missing.append("segmentation")
         
-        if not self.config.spans_embeddings_path.exists():
+        if not self._path_exists(self.config.spans_embeddings_path, exists_cache):
             missing.append("spans embeddings")
         
-        if not tc.embeddings_path or not Path(tc.embeddings_path).exists():
+        if not tc.embeddings_path or not self._path_exists(tc.embeddings_path, exists_cache):
             missing.append("segment embeddings")
         
         return len(missing) == 0, missing
@@ -0,0 +1,49 @@
+# quran_segmenter/pipeline/rabtize_worker.py
+"""
+Long-lived rabtize runner.
+
+Started by RabtizeProcessor (with `rabtize.worker` enabled) in the rabtize
+directory. Each stdin line is a JSON list of rabtize.main arguments; the
+command's own output goes to stdout as usual, followed by a DONE_MARKER
+line carrying its exit code. torch and sentence-transformers are imported
+by the first command and reused by the rest.
+
+Runs as a plain script and imports only the standard library, so it does
+not need quran_segmenter to be importable in the child.
+"""
+import json
+import os
+import runpy
+import sys
+import traceback
+
+DONE_MARKER = "\x1e__rabtize_done__"
+
+
+def _run(args: list) -> int:
+    sys.argv = ["rabtize.main"] + args
+    try:
+        runpy.run_module("rabtize.main", run_name="__main__", alter_sys=True)
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+    except Exception:
+        traceback.print_exc(file=sys.stdout)
+        return 1
+    return 0
+
+
+def main():
+    sys.path.insert(0, os.getcwd())
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        code = _run(json.loads(line))
+        sys.stderr.flush()
+        sys.stdout.write(f"\n{DONE_MARKER} {code}\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
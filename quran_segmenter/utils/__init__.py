@@ -1,4 +1,26 @@
-# quran_segmenter/utils/__init__.py
-from .cache import CacheManager
-from .server import LafzizeServer
-from .verse_parser import parse_verse_spec, load_quran_metadata
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+# Submodules are imported on first use: config and the CLI import
+# utils.jsonio, which would otherwise pull in the cache and verse parser
+_LAZY = {
+    "CacheManager": ".cache",
+    "parse_verse_spec": ".verse_parser",
+    "load_quran_metadata": ".verse_parser",
+    # server imports requests; keep it off the config/CLI import path
+    "LafzizeServer": ".server",
+}
+
+__all__ = list(_LAZY)
+
+if TYPE_CHECKING:
+    from .cache import CacheManager
+    from .server import LafzizeServer
+    from .verse_parser import load_quran_metadata, parse_verse_spec
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    return getattr(import_module(module, __name__), name)
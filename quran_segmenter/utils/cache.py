@@ -2,36 +2,274 @@
 """
 Caching utilities for intermediate results.
 """
-import json
+import atexit
 import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Any, Dict
-from datetime import datetime
+from typing import Optional, Any, Callable, Dict, List, Tuple
 import logging
 
+from .jsonio import dumps, read_json
+
 logger = logging.getLogger(__name__)
 
 
+# Characters of a verse range that are replaced in file names
+_SAFE_NAME_TABLE = str.maketrans(":-", "__")
+
+
+@lru_cache(maxsize=256)
+def safe_name(verse_range: str) -> str:
+    """Filename-safe form of a verse range string (memoized; ranges repeat a lot)."""
+    return verse_range.translate(_SAFE_NAME_TABLE)
+
+
+# Read size when hashing input files
+DIGEST_CHUNK_SIZE = 1 << 20
+
+# Minimum seconds between index.json rewrites; later changes wait for the
+# next write (or flush() / interpreter exit)
+INDEX_FLUSH_INTERVAL = 2.0
+
+# Cache files kept parsed in memory (least recently used dropped first)
+MEMORY_CACHE_SIZE = 128
+
+# Default limits enforced by CacheManager.prune()
+DEFAULT_MAX_BYTES = 2 << 30
+DEFAULT_MAX_AGE_DAYS = 30
+
+# prune() runs after every this many cache writes
+PRUNE_EVERY = 64
+
+# Threads reading cache files in get_cached_alignments
+BULK_LOOKUP_WORKERS = 8
+
+# Index key categories removed by clear(category); timestamps come in two formats
+_CLEAR_CATEGORIES = {"timestamps": ("timestamps", "timestamp_rows")}
+
+
+def _update_from_file(h, path: Path):
+    """Feed a file to a hashlib object in DIGEST_CHUNK_SIZE reads (one reused buffer)."""
+    buf = bytearray(DIGEST_CHUNK_SIZE)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while n := f.readinto(buf):
+            h.update(view[:n])
+
+
+def file_digest(path: Path, *extra: str) -> str:
+    """BLAKE2b digest of a file's bytes plus any extra strings (e.g. a model id)."""
+    h = hashlib.blake2b(digest_size=16)
+    _update_from_file(h, path)
+    for item in extra:
+        h.update(b"\0" + item.encode("utf-8"))
+    return h.hexdigest()
+
+
+def _atomic_write(path: Path, data: bytes, fsync: bool = False):
+    """
+    Write data through a temp file and os.replace, so a reader (or the next
+    run, after a crash) never sees a partially written file.
+    """
+    # Unique per writer: batch jobs may cache the same file concurrently
+    tmp = path.with_name(f"{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        # e.g. a full disk; nothing indexes the temp file, so nothing else would remove it
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+@lru_cache(maxsize=256)
+def _audio_hash_for(path: str, mtime_ns: int, size: int) -> str:
+    # Keyed on the file's stat, so an edited file is hashed again
+    h = hashlib.md5()
+    _update_from_file(h, Path(path))
+    return h.hexdigest()[:12]
+
+
+def _audio_hash(audio_path: Path, strict: bool = True) -> str:
+    """
+    Cache key for an audio file, computed once per file version.
+    
+    strict hashes the contents, so a copy of the same recording (a fresh
+    upload, another session) still hits. Otherwise the key is a stat
+    fingerprint (size, mtime, inode) and the file is never read.
+    """
+    st = os.stat(audio_path)
+    if not strict:
+        return f"{st.st_size:x}-{st.st_mtime_ns:x}-{st.st_ino:x}"
+    return _audio_hash_for(os.path.abspath(audio_path), st.st_mtime_ns, st.st_size)
+
+
+def _created_ns(entry: dict) -> int:
+    """When an index entry was written, in ns since the epoch."""
+    created = entry.get("created_ns")
+    if created is not None:
+        return created
+    # Entries indexed before timestamps were stored as integers
+    from datetime import datetime
+    
+    try:
+        return int(datetime.fromisoformat(entry["created"]).timestamp() * 1e9)
+    except (KeyError, ValueError):
+        return 0
+
+
 class CacheManager:
     """Manages caching of intermediate processing results."""
     
-    def __init__(self, cache_dir: Path):
+    def __init__(
+        self,
+        cache_dir: Path,
+        strict: bool = True,
+        max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+        max_age_days: Optional[float] = DEFAULT_MAX_AGE_DAYS
+    ):
         self.cache_dir = cache_dir
+        # False: key timestamps on the audio file's stat instead of its contents
+        self.strict = strict
+        # Limits for prune(); None disables one
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self._writes = 0
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self._index_path = cache_dir / "index.json"
         self._index = self._load_index()
+        # The pipeline runs lafzize and rabtize concurrently; both update the index
+        self._index_lock = threading.Lock()
+        self._dirty = False
+        self._last_flush = 0.0
+        # Whether flush is registered to run at exit (only while changes are pending)
+        self._exit_hook = False
+        # cache file path -> parsed contents, for repeat lookups
+        self._memory: "OrderedDict[Path, Any]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+    
+    def _recall(self, path: Path) -> Any:
+        """Parsed contents of a cache file read or written earlier, or None."""
+        with self._memory_lock:
+            data = self._memory.get(path)
+            if data is not None:
+                self._memory.move_to_end(path)
+            return data
+    
+    def _remember(self, path: Path, data: Any):
+        with self._memory_lock:
+            self._memory[path] = data
+            self._memory.move_to_end(path)
+            if len(self._memory) > MEMORY_CACHE_SIZE:
+                self._memory.popitem(last=False)
+    
+    def _forget(self, path: Path):
+        with self._memory_lock:
+            self._memory.pop(path, None)
     
     def _load_index(self) -> Dict[str, dict]:
         """Load cache index."""
-        if self._index_path.exists():
-            with open(self._index_path, "r") as f:
-                return json.load(f)
-        return {}
+        try:
+            return read_json(self._index_path)
+        except FileNotFoundError:
+            return {}
     
     def _save_index(self):
-        """Save cache index."""
-        with open(self._index_path, "w") as f:
-            json.dump(self._index, f, indent=2)
+        """Save cache index (atomically, so a crash never leaves it truncated)."""
+        # Every entry is listed here, so it is also flushed to the disk
+        _atomic_write(self._index_path, dumps(self._index), fsync=True)
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        if self._exit_hook:
+            atexit.unregister(self.flush)
+            self._exit_hook = False
+    
+    def _maybe_save_index(self):
+        """
+        Mark the index changed; rewrite it only if the last write was more
+        than INDEX_FLUSH_INTERVAL ago. Call with _index_lock held.
+        """
+        self._dirty = True
+        if time.monotonic() - self._last_flush >= INDEX_FLUSH_INTERVAL:
+            self._save_index()
+        elif not self._exit_hook:
+            # Deferred changes are written at exit at the latest
+            atexit.register(self.flush)
+            self._exit_hook = True
+    
+    def _add_entry(self, key: str, entry: dict):
+        """Record a cache file in the index, pruning every PRUNE_EVERY writes."""
+        with self._index_lock:
+            self._index[key] = entry
+            self._maybe_save_index()
+            self._writes += 1
+            due = self._writes % PRUNE_EVERY == 0
+        if due:
+            self.prune()
+    
+    def prune(self) -> int:
+        """
+        Delete entries older than max_age_days, then the oldest entries until
+        the indexed files fit in max_bytes. Returns the number removed.
+        
+        Sizes come from the index (recorded at write time), so this does
+        not stat every cache file.
+        """
+        with self._index_lock:
+            entries = sorted(self._index.items(), key=lambda item: _created_ns(item[1]))
+            expired = set()
+            if self.max_age_days is not None:
+                cutoff = time.time_ns() - int(self.max_age_days * 86400e9)
+                expired = {key for key, entry in entries if _created_ns(entry) < cutoff}
+            
+            total = 0
+            for key, entry in entries:
+                if key not in expired:
+                    if "size" not in entry:
+                        # Indexed before sizes were recorded
+                        try:
+                            entry["size"] = os.stat(entry["path"]).st_size
+                        except OSError:
+                            entry["size"] = 0
+                    total += entry["size"]
+            
+            removed = []
+            for key, entry in entries:
+                if key in expired:
+                    removed.append(key)
+                elif self.max_bytes is not None and total > self.max_bytes:
+                    removed.append(key)
+                    total -= entry["size"]
+            
+            for key in removed:
+                path = Path(self._index.pop(key)["path"])
+                path.unlink(missing_ok=True)
+                self._forget(path)
+            if removed:
+                self._maybe_save_index()
+        
+        if removed:
+            logger.info(f"Pruned {len(removed)} cache entries")
+        return len(removed)
+    
+    def flush(self):
+        """Write pending index changes to disk."""
+        with self._index_lock:
+            if not self._dirty:
+                return
+            try:
+                self._save_index()
+            except OSError as e:
+                logger.warning(f"Could not save cache index {self._index_path}: {e}")
     
     def _make_key(self, category: str, identifier: str) -> str:
         """Create a cache key."""
@@ -39,17 +277,35 @@ class CacheManager:
     
     def _hash_content(self, content: str) -> str:
         """Create hash of content for change detection."""
-        return hashlib.sha256(content.encode()).hexdigest()[:16]
+        # 8-byte digest: the same 16 hex chars as before, without hashing a
+        # full SHA-256 only to throw most of it away
+        return hashlib.blake2b(content.encode(), digest_size=8).hexdigest()
+    
+    def _timestamps_dir(self, audio_hash: str) -> Path:
+        # One of 256 shard directories, so no single directory grows with
+        # every recitation. The last two characters are uniform for both
+        # key kinds (a stat fingerprint starts with the file size).
+        return self.cache_dir / "timestamps" / audio_hash[-2:]
     
     def get_timestamps_path(self, audio_hash: str, verse_range: str) -> Path:
         """Get path for cached timestamps."""
-        safe_name = verse_range.replace(":", "_").replace("-", "_")
-        return self.cache_dir / "timestamps" / f"{audio_hash}_{safe_name}.json"
+        return self._timestamps_dir(audio_hash) / f"{audio_hash}_{safe_name(verse_range)}.json"
+    
+    def get_timestamp_rows_path(self, audio_hash: str, verse_range: str) -> Path:
+        """Get path for cached timestamps stored as pickled row tuples."""
+        return self._timestamps_dir(audio_hash) / f"{audio_hash}_{safe_name(verse_range)}.pkl"
+    
+    @staticmethod
+    def _read_timestamps_file(path: Path, load: Callable[[Path], Any]) -> Any:
+        """load(path), falling back to the unsharded location older caches used."""
+        try:
+            return load(path)
+        except FileNotFoundError:
+            return load(path.parent.parent / path.name)
     
     def get_alignment_path(self, translation_id: str, verse_range: str) -> Path:
         """Get path for cached alignment."""
-        safe_name = verse_range.replace(":", "_").replace("-", "_")
-        return self.cache_dir / "alignments" / f"{translation_id}_{safe_name}.json"
+        return self.cache_dir / "alignments" / f"{translation_id}_{safe_name(verse_range)}.json"
     
     def cache_timestamps(
         self,
@@ -59,24 +315,24 @@ class CacheManager:
     ) -> Path:
         """Cache timestamp data."""
         # Create audio hash for cache key
-        audio_hash = hashlib.md5(open(audio_path, 'rb').read()).hexdigest()[:12]
+        audio_hash = _audio_hash(audio_path, self.strict)
         
         cache_path = self.get_timestamps_path(audio_hash, verse_range)
         cache_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(cache_path, "w", encoding="utf-8") as f:
-            json.dump(timestamps, f, indent=2, ensure_ascii=False)
+        payload = dumps(timestamps)
+        _atomic_write(cache_path, payload)
+        self._remember(cache_path, list(timestamps))
         
         # Update index
-        key = self._make_key("timestamps", f"{audio_hash}_{verse_range}")
-        self._index[key] = {
+        self._add_entry(self._make_key("timestamps", f"{audio_hash}_{verse_range}"), {
             "path": str(cache_path),
             "audio_path": str(audio_path),
             "verse_range": verse_range,
-            "created": datetime.now().isoformat(),
-            "count": len(timestamps)
-        }
-        self._save_index()
+            "created_ns": time.time_ns(),
+            "count": len(timestamps),
+            "size": len(payload)
+        })
         
         logger.debug(f"Cached timestamps: {cache_path}")
         return cache_path
@@ -87,14 +343,74 @@ class CacheManager:
         verse_range: str
     ) -> Optional[list]:
         """Retrieve cached timestamps if available."""
-        audio_hash = hashlib.md5(open(audio_path, 'rb').read()).hexdigest()[:12]
+        audio_hash = _audio_hash(audio_path, self.strict)
         cache_path = self.get_timestamps_path(audio_hash, verse_range)
         
-        if cache_path.exists():
-            with open(cache_path, "r", encoding="utf-8") as f:
-                logger.debug(f"Cache hit for timestamps: {cache_path}")
-                return json.load(f)
-        return None
+        data = self._recall(cache_path)
+        if data is None:
+            # Open directly: a miss costs failed opens, a hit no extra stat
+            try:
+                data = self._read_timestamps_file(cache_path, read_json)
+            except FileNotFoundError:
+                return None
+            self._remember(cache_path, data)
+        logger.debug(f"Cache hit for timestamps: {cache_path}")
+        # Copied, so callers cannot change what later lookups return
+        return list(data)
+    
+    def cache_timestamp_rows(
+        self,
+        audio_path: Path,
+        verse_range: str,
+        rows: List[Tuple]
+    ) -> Path:
+        """
+        Cache timestamps as a pickled list of field tuples.
+        
+        Unlike cache_timestamps (JSON dicts), a hit needs no per-word dict
+        lookups: each row goes straight back into its constructor.
+        """
+        audio_hash = _audio_hash(audio_path, self.strict)
+        
+        cache_path = self.get_timestamp_rows_path(audio_hash, verse_range)
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        payload = pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL)
+        _atomic_write(cache_path, payload)
+        self._remember(cache_path, list(rows))
+        
+        self._add_entry(self._make_key("timestamp_rows", f"{audio_hash}_{verse_range}"), {
+            "path": str(cache_path),
+            "audio_path": str(audio_path),
+            "verse_range": verse_range,
+            "created_ns": time.time_ns(),
+            "count": len(rows),
+            "size": len(payload)
+        })
+        
+        logger.debug(f"Cached timestamp rows: {cache_path}")
+        return cache_path
+    
+    def get_cached_timestamp_rows(
+        self,
+        audio_path: Path,
+        verse_range: str
+    ) -> Optional[List[Tuple]]:
+        """Retrieve timestamps cached by cache_timestamp_rows, if available."""
+        audio_hash = _audio_hash(audio_path, self.strict)
+        cache_path = self.get_timestamp_rows_path(audio_hash, verse_range)
+        
+        rows = self._recall(cache_path)
+        if rows is None:
+            try:
+                rows = self._read_timestamps_file(cache_path, lambda p: pickle.loads(p.read_bytes()))
+            except FileNotFoundError:
+                return None
+            except Exception as e:
+                logger.debug(f"Ignoring unreadable timestamp cache {cache_path}: {e}")
+                return None
+            self._remember(cache_path, rows)
+        logger.debug(f"Cache hit for timestamp rows: {cache_path}")
+        return list(rows)
     
     def cache_alignment(
         self,
@@ -106,17 +422,28 @@ class CacheManager:
         cache_path = self.get_alignment_path(translation_id, verse_range)
         cache_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(cache_path, "w", encoding="utf-8") as f:
-            json.dump(alignment, f, indent=2, ensure_ascii=False)
+        _atomic_write(cache_path, dumps(alignment))
         
-        key = self._make_key("alignment", f"{translation_id}_{verse_range}")
-        self._index[key] = {
+        self.register_alignment(translation_id, verse_range, cache_path)
+        self._remember(cache_path, dict(alignment))
+        return cache_path
+    
+    def register_alignment(
+        self,
+        translation_id: str,
+        verse_range: str,
+        cache_path: Path
+    ) -> Path:
+        """Index an alignment file already written to get_alignment_path()."""
+        # The file was (re)written behind our back
+        self._forget(cache_path)
+        self._add_entry(self._make_key("alignment", f"{translation_id}_{verse_range}"), {
             "path": str(cache_path),
             "translation_id": translation_id,
             "verse_range": verse_range,
-            "created": datetime.now().isoformat()
-        }
-        self._save_index()
+            "created_ns": time.time_ns(),
+            "size": cache_path.stat().st_size
+        })
         
         logger.debug(f"Cached alignment: {cache_path}")
         return cache_path
@@ -129,29 +456,53 @@ class CacheManager:
         """Retrieve cached alignment if available."""
         cache_path = self.get_alignment_path(translation_id, verse_range)
         
-        if cache_path.exists():
-            with open(cache_path, "r", encoding="utf-8") as f:
-                logger.debug(f"Cache hit for alignment: {cache_path}")
-                return json.load(f)
-        return None
+        data = self._recall(cache_path)
+        if data is None:
+            try:
+                data = read_json(cache_path)
+            except FileNotFoundError:
+                return None
+            self._remember(cache_path, data)
+        logger.debug(f"Cache hit for alignment: {cache_path}")
+        return dict(data)
+    
+    def get_cached_alignments(
+        self,
+        keys: List[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], Optional[dict]]:
+        """
+        get_cached_alignment for several (translation_id, verse_range) keys.
+        
+        Files are read on a small thread pool (the GIL is released while
+        reading), and every hit is remembered for the lookups that follow.
+        """
+        keys = list(dict.fromkeys(keys))
+        if len(keys) <= 1:
+            return {key: self.get_cached_alignment(*key) for key in keys}
+        from concurrent.futures import ThreadPoolExecutor
+        
+        with ThreadPoolExecutor(max_workers=min(BULK_LOOKUP_WORKERS, len(keys))) as executor:
+            return dict(zip(keys, executor.map(lambda key: self.get_cached_alignment(*key), keys)))
     
     def clear(self, category: Optional[str] = None):
         """Clear cache entries."""
-        if category:
-            keys_to_remove = [k for k in self._index if k.startswith(f"{category}:")]
-            for key in keys_to_remove:
-                entry = self._index[key]
-                path = Path(entry["path"])
-                if path.exists():
-                    path.unlink()
-                del self._index[key]
-        else:
-            # Clear all
-            import shutil
-            for subdir in self.cache_dir.iterdir():
-                if subdir.is_dir() and subdir.name != "index.json":
-                    shutil.rmtree(subdir)
-            self._index = {}
-        
-        self._save_index()
+        with self._memory_lock:
+            self._memory.clear()
+        with self._index_lock:
+            if category:
+                prefixes = tuple(f"{c}:" for c in _CLEAR_CATEGORIES.get(category, (category,)))
+                keys_to_remove = [k for k in self._index if k.startswith(prefixes)]
+                for key in keys_to_remove:
+                    entry = self._index[key]
+                    Path(entry["path"]).unlink(missing_ok=True)
+                    del self._index[key]
+            else:
+                # Clear all
+                import shutil
+                for subdir in self.cache_dir.iterdir():
+                    if subdir.is_dir() and subdir.name != "index.json":
+                        shutil.rmtree(subdir)
+                self._index = {}
+            
+            self._save_index()
         logger.info(f"Cache cleared: {category or 'all'}")
\ No newline at end of file
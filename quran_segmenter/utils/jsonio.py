@@ -0,0 +1,86 @@
+# quran_segmenter/utils/jsonio.py
+"""
+JSON serialization helpers with optional orjson acceleration.
+"""
+import json
+from itertools import islice
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, List, Tuple, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def dumps(data: Any, indent: bool = False) -> bytes:
+    """Serialize data to UTF-8 encoded JSON bytes."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    if indent:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    # Compact separators, matching orjson's output
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Deserialize JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def read_json(path: Path) -> Any:
+    """Read and parse a JSON file in a single read."""
+    return loads(Path(path).read_bytes())
+
+
+def write_json(path: Path, data: Any, indent: bool = False):
+    """Serialize data and write it to path in a single write."""
+    Path(path).write_bytes(dumps(data, indent=indent))
+
+
+# Read size for streamed parsing (one syscall per 64 KiB, not per token)
+STREAM_BUFFER_SIZE = 1 << 16
+
+
+def iter_items(path: Path) -> Iterator[Tuple[str, Any]]:
+    """
+    Iterate the (key, value) pairs of a top-level JSON object.
+    
+    With ijson installed the file is streamed, so stopping early avoids
+    parsing the rest; otherwise the whole file is loaded first.
+    """
+    if ijson is None:
+        yield from read_json(path).items()
+        return
+    with open(path, "rb", buffering=STREAM_BUFFER_SIZE) as f:
+        yield from ijson.kvitems(f, "", buf_size=STREAM_BUFFER_SIZE, use_float=True)
+
+
+# What iter_array raises on a malformed or truncated stream
+STREAM_PARSE_ERRORS = (ValueError,) if ijson is None else (ValueError, ijson.JSONError)
+
+
+def iter_array(fileobj: BinaryIO) -> Iterator[Any]:
+    """
+    Iterate the elements of a top-level JSON array read from a binary stream
+    (e.g. an HTTP response body), streamed with ijson when installed.
+    """
+    if ijson is None:
+        yield from loads(fileobj.read())
+        return
+    yield from ijson.items(fileobj, "item", buf_size=STREAM_BUFFER_SIZE, use_float=True)
+
+
+def peek_values(path: Path, limit: int) -> List[Any]:
+    """First `limit` values of a top-level JSON object (streamed when possible)."""
+    return [value for _, value in islice(iter_items(path), limit)]
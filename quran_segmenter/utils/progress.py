@@ -8,43 +8,86 @@ from typing import Optional, Callable
 from contextlib import contextmanager
 
 
+def _detect_notebook() -> bool:
+    """Detect if running in Jupyter/Colab."""
+    try:
+        from IPython import get_ipython
+        shell = get_ipython().__class__.__name__
+        return shell in ['ZMQInteractiveShell', 'Shell']
+    except:
+        return False
+
+
+# Resolved once; every reporter used to redo the IPython import
+_IS_NOTEBOOK = _detect_notebook()
+
+if _IS_NOTEBOOK:
+    from IPython.display import clear_output as _clear_output
+else:
+    _clear_output = None
+
+
+BAR_WIDTH = 30
+# Prebuilt bar halves; each frame slices them instead of repeating characters
+_FULL_BAR = "█" * BAR_WIDTH
+_EMPTY_BAR = "░" * BAR_WIDTH
+
+# At most this many updates (plus one) between clock reads; kept small so a
+# loop that slows down after a fast stretch still reports within a few items
+MAX_CLOCK_MASK = 15
+
+
 class ProgressReporter:
     """Simple progress reporter that works in both CLI and notebooks."""
     
     def __init__(self, total: int, desc: str = "", unit: str = "items"):
+        # total <= 0 means unknown: shows count and rate instead of a bar
         self.total = total
         self.current = 0
         self.desc = desc
         self.unit = unit
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
         self._last_print = 0
-        self._is_notebook = self._detect_notebook()
-    
-    def _detect_notebook(self) -> bool:
-        """Detect if running in Jupyter/Colab."""
-        try:
-            from IPython import get_ipython
-            shell = get_ipython().__class__.__name__
-            return shell in ['ZMQInteractiveShell', 'Shell']
-        except:
-            return False
+        self._is_notebook = _IS_NOTEBOOK
+        # The clock is read once every (_mask + 1) updates; the mask widens
+        # while reads come faster than 10/s and resets on every print
+        self._tick = 0
+        self._mask = 0
+        self._last_check = self.start_time
     
     def update(self, n: int = 1):
         """Update progress by n items."""
         self.current += n
+        self._tick += 1
+        unfinished = self.total <= 0 or self.current < self.total
+        if (self._tick & self._mask) and unfinished:
+            return
+        
+        now = time.monotonic()
+        since, self._last_check = now - self._last_check, now
+        if since < 0.1:
+            self._mask = min((self._mask << 1) | 1, MAX_CLOCK_MASK)
+        elif since > 1.0:
+            self._mask >>= 1
         
         # Rate limit output
-        now = time.time()
-        if now - self._last_print < 0.5 and self.current < self.total:
+        if now - self._last_print < 0.5 and unfinished:
             return
         self._last_print = now
+        self._mask = 0
         
         self._print_progress()
     
     def _print_progress(self):
         """Print current progress."""
+        if self.total <= 0:
+            elapsed = time.monotonic() - self.start_time
+            rate = self.current / elapsed if elapsed > 0 else 0.0
+            self._emit(f"\r{self.desc}: {self.current} {self.unit} [{rate:.1f}/s, {elapsed:.1f}s]")
+            return
+        
         pct = 100 * self.current / self.total if self.total > 0 else 0
-        elapsed = time.time() - self.start_time
+        elapsed = time.monotonic() - self.start_time
         
         if self.current > 0:
             eta = elapsed * (self.total - self.current) / self.current
@@ -52,15 +95,14 @@ class ProgressReporter:
         else:
             eta_str = "ETA: --"
         
-        bar_width = 30
-        filled = int(bar_width * self.current / self.total) if self.total > 0 else 0
-        bar = "█" * filled + "░" * (bar_width - filled)
-        
-        line = f"\r{self.desc}: |{bar}| {self.current}/{self.total} {self.unit} ({pct:.1f}%) {eta_str}"
+        filled = min(BAR_WIDTH, BAR_WIDTH * self.current // self.total)
+        bar = _FULL_BAR[:filled] + _EMPTY_BAR[filled:]
         
+        self._emit(f"\r{self.desc}: |{bar}| {self.current}/{self.total} {self.unit} ({pct:.1f}%) {eta_str}")
+    
+    def _emit(self, line: str):
         if self._is_notebook:
-            from IPython.display import clear_output
-            clear_output(wait=True)
+            _clear_output(wait=True)
             print(line)
         else:
             sys.stdout.write(line)
@@ -68,10 +110,11 @@ class ProgressReporter:
     
     def finish(self):
         """Mark as complete."""
-        self.current = self.total
+        if self.total > 0:
+            self.current = self.total
         self._print_progress()
         print()  # New line
-        elapsed = time.time() - self.start_time
+        elapsed = time.monotonic() - self.start_time
         print(f"  Completed in {elapsed:.1f}s")
 
 
@@ -86,12 +129,19 @@ def progress_context(total: int, desc: str = "", unit: str = "items"):
 
 
 def wrap_iterable(iterable, desc: str = "", unit: str = "items"):
-    """Wrap an iterable with progress reporting."""
-    items = list(iterable)
-    total = len(items)
+    """
+    Wrap an iterable with progress reporting.
+    
+    Items are passed through as they are produced; iterables without a
+    len() (generators) get a count/rate display instead of a bar.
+    """
+    try:
+        total = len(iterable)
+    except TypeError:
+        total = 0
     reporter = ProgressReporter(total, desc, unit)
     
-    for item in items:
+    for item in iterable:
         yield item
         reporter.update()
     
@@ -0,0 +1,57 @@
+# quran_segmenter/utils/rate_limit.py
+"""
+Client-side rate limiting for calls into rate-limited APIs.
+"""
+import random
+import re
+import threading
+import time
+from typing import Optional
+
+# stderr fragments that mean the LLM API throttled us (HTTP 429 / quota)
+_RATE_LIMITED = re.compile(
+    r"\b429\b|RESOURCE_EXHAUSTED|rate[ _-]?limit|quota", re.IGNORECASE
+)
+
+
+def is_rate_limited(message: str) -> bool:
+    """Whether an error message reports a rate limit or exhausted quota."""
+    return bool(_RATE_LIMITED.search(message or ""))
+
+
+def backoff_delay(attempt: int) -> float:
+    """Seconds to wait before retry `attempt` (0-based): grows linearly, with jitter."""
+    return random.uniform(2, 4) * (attempt + 1)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: refills at `rate_per_minute`, holding at most
+    `capacity` tokens (defaults to one minute's worth).
+
+    acquire() reserves tokens under the lock and sleeps outside it, so
+    concurrent callers queue up fairly instead of polling.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate_per_minute))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Take `tokens`, blocking until they are available. Returns seconds waited."""
+        if tokens > self.capacity:
+            raise ValueError(f"Cannot acquire {tokens} tokens (capacity {self.capacity})")
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
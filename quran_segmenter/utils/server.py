@@ -2,17 +2,85 @@
 """
 Server management utilities for lafzize.
 """
+import os
+import signal
+import socket
 import subprocess
+import sys
+import threading
 import time
-import requests
 import atexit
+from contextlib import nullcontext
+from functools import cached_property
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 import logging
 import shutil
 
+# requests (and urllib3) are imported on the first HTTP check, not with
+# this module
+if TYPE_CHECKING:
+    import requests
+
 logger = logging.getLogger(__name__)
 
+# Log lines uvicorn prints once the app is accepting requests
+READY_MARKERS = (b"Application startup complete", b"Uvicorn running on")
+
+# Where the server's output goes unless the caller picks another file (or None)
+DEFAULT_LOG_FILE = Path("/tmp/lafzize_server.log")
+
+# Seconds between checks of the server log while waiting for startup
+LOG_POLL_INTERVAL = 0.1
+
+# HTTP readiness polling backs off from the first delay up to the cap
+POLL_INITIAL_DELAY = 0.05
+POLL_MAX_DELAY = 1.0
+
+# Seconds a stopping server gets to exit after SIGTERM before SIGKILL
+STOP_TIMEOUT = 10.0
+
+# Connect timeout for the TCP liveness probe (the server is local)
+PORT_PROBE_TIMEOUT = 0.3
+
+
+def _pids_bound_to_port(port: int) -> set:
+    """
+    PIDs holding a TCP socket whose local port is `port`, read from /proc.
+    
+    Linux only; raises OSError where /proc/net is unavailable.
+    """
+    inodes = set()
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as f:
+                next(f)  # header
+                for line in f:
+                    fields = line.split()
+                    if int(fields[1].rsplit(":", 1)[1], 16) == port:
+                        inodes.add(f"socket:[{fields[9]}]")
+        except FileNotFoundError:
+            if table.endswith("tcp"):
+                raise
+    inodes.discard("socket:[0]")
+    if not inodes:
+        return set()
+    
+    pids = set()
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            for fd in os.scandir(f"/proc/{entry.name}/fd"):
+                if os.readlink(fd.path) in inodes:
+                    pids.add(int(entry.name))
+                    break
+        except OSError:
+            # Process exited or belongs to another user
+            continue
+    pids.discard(os.getpid())
+    return pids
+
 
 class LafzizeServer:
     """Manages the lafzize FastAPI server lifecycle."""
@@ -22,20 +90,26 @@ class LafzizeServer:
         lafzize_dir: Path,
         host: str = "127.0.0.1",
         port: int = 8004,
-        metadata_file: Optional[Path] = None
+        metadata_file: Optional[Path] = None,
+        log_file: Optional[Path] = DEFAULT_LOG_FILE
     ):
         self.lafzize_dir = Path(lafzize_dir)
         self.host = host
         self.port = port
         self.metadata_file = metadata_file
+        # None discards the server's output (readiness is then polled over HTTP)
+        self.log_file = Path(log_file) if log_file else None
         self._process: Optional[subprocess.Popen] = None
         self._started_by_us = False
         self._log_file: Optional[Path] = None
+        # Health checks reuse one kept-alive connection (created on first use)
+        self._session: Optional["requests.Session"] = None
         
         atexit.register(self.stop)
     
-    @property
+    @cached_property
     def base_url(self) -> str:
+        # Built once: host and port are fixed at construction
         return f"http://{self.host}:{self.port}"
     
     def _ensure_metadata(self):
@@ -48,45 +122,112 @@ class LafzizeServer:
             shutil.copy(self.metadata_file, dest)
             logger.info(f"Copied metadata to {dest}")
     
+    def _get_session(self) -> "requests.Session":
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            
+            session = requests.Session()
+            # No retries: a failed probe just means "not up yet"
+            session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=0))
+            self._session = session
+        return self._session
+    
+    def _port_open(self) -> bool:
+        """Whether anything accepts TCP connections on our port (no HTTP)."""
+        try:
+            socket.create_connection((self.host, self.port), timeout=PORT_PROBE_TIMEOUT).close()
+            return True
+        except OSError:
+            return False
+    
     def is_running(self) -> bool:
         """Check if server is running and responsive."""
+        from requests.exceptions import RequestException
+        
         try:
             # Try POST to root (lafzize expects POST with files)
             # A 422 means server is up but missing required fields
-            response = requests.post(
+            response = self._get_session().post(
                 self.base_url,
                 timeout=5,
                 data={}
             )
             return response.status_code in [200, 422]
-        except requests.exceptions.RequestException:
+        except RequestException:
             return False
     
     def wait_for_ready(self, timeout: int = 120) -> bool:
-        """Wait for server to be ready."""
-        start = time.time()
+        """
+        Wait for server to be ready.
+        
+        When we started the server, its log is tailed for uvicorn's startup
+        line and a single request confirms it; otherwise (or if the line
+        never shows up) the server is polled over HTTP.
+        """
+        deadline = time.monotonic() + timeout
         logger.info("Waiting for lafzize server to be ready...")
         
-        while time.time() - start < timeout:
-            if self.is_running():
+        if self._log_file and self._process:
+            seen = self._wait_for_log_marker(deadline)
+            if seen is None:
+                return self._report_died()
+            if seen and self.is_running():
+                logger.info("✓ Lafzize server is ready")
+                return True
+        
+        delay = POLL_INITIAL_DELAY
+        while time.monotonic() < deadline:
+            # The HTTP check only runs once something is listening
+            if self._port_open() and self.is_running():
                 logger.info("✓ Lafzize server is ready")
                 return True
-            time.sleep(2)
+            time.sleep(max(0.0, min(delay, deadline - time.monotonic())))
+            delay = min(delay * 1.5, POLL_MAX_DELAY)
             
             # Check if process died
             if self._process and self._process.poll() is not None:
-                logger.error("Lafzize server process died")
-                if self._log_file and self._log_file.exists():
-                    print(f"Server log ({self._log_file}):")
-                    print(self._log_file.read_text()[-2000:])
-                return False
+                return self._report_died()
         
         logger.error(f"Lafzize server not ready after {timeout}s")
         return False
     
+    def _wait_for_log_marker(self, deadline: float) -> Optional[bool]:
+        """
+        Tail the server log until a READY_MARKERS line appears.
+        
+        Returns True when seen, False on timeout or an unreadable log, and
+        None if the server process exited first.
+        """
+        keep = max(len(m) for m in READY_MARKERS) - 1
+        tail = b""
+        try:
+            with open(self._log_file, "rb") as f:
+                while time.monotonic() < deadline:
+                    data = f.read()
+                    if data:
+                        tail += data
+                        if any(m in tail for m in READY_MARKERS):
+                            return True
+                        tail = tail[-keep:]
+                    elif self._process.poll() is not None:
+                        return None
+                    else:
+                        time.sleep(LOG_POLL_INTERVAL)
+        except OSError:
+            pass
+        return False
+    
+    def _report_died(self) -> bool:
+        logger.error("Lafzize server process died")
+        if self._log_file and self._log_file.exists():
+            print(f"Server log ({self._log_file}):")
+            print(self._log_file.read_text(errors="replace")[-2000:])
+        return False
+    
     def start(self, wait: bool = True, timeout: int = 120) -> bool:
         """Start the lafzize server if not running."""
-        if self.is_running():
+        if self._port_open() and self.is_running():
             logger.info("Lafzize server already running")
             return True
         
@@ -99,21 +240,23 @@ class LafzizeServer:
         if qpc_src.exists() and not qpc_dst.exists():
             shutil.copy(qpc_src, qpc_dst)
         
-        # Kill any zombie process on our port
-        self._kill_port()
-        time.sleep(1)
+        # Kill any zombie process on our port (and give the socket time to free up)
+        if self._kill_port():
+            time.sleep(1)
         
         logger.info(f"Starting lafzize server on port {self.port}...")
         
-        self._log_file = Path("/tmp/lafzize_server.log")
-        log_handle = open(self._log_file, "w")
-        
-        self._process = subprocess.Popen(
-            ["fastapi", "run", "--port", str(self.port)],
-            cwd=str(self.lafzize_dir),
-            stdout=log_handle,
-            stderr=log_handle
-        )
+        self._log_file = self.log_file
+        # The child writes through its own copy of the fd; ours is closed
+        # straight away instead of leaking for the life of the process
+        log_target = open(self._log_file, "wb") if self._log_file else nullcontext(subprocess.DEVNULL)
+        with log_target as log_handle:
+            self._process = subprocess.Popen(
+                ["fastapi", "run", "--port", str(self.port)],
+                cwd=str(self.lafzize_dir),
+                stdout=log_handle,
+                stderr=log_handle
+            )
         self._started_by_us = True
         
         if wait:
@@ -122,44 +265,85 @@ class LafzizeServer:
     
     def stop(self):
         """Stop the server if we started it."""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
         if self._process and self._started_by_us:
             logger.info("Stopping lafzize server...")
             self._process.terminate()
-            try:
-                self._process.wait(timeout=10)
-            except subprocess.TimeoutExpired:
-                self._process.kill()
-                self._process.wait()
+            self._wait_or_kill(self._process)
             self._process = None
             self._started_by_us = False
     
-    def _kill_port(self):
-        """Kill any process using our port."""
+    @staticmethod
+    def _wait_or_kill(process: subprocess.Popen):
+        """
+        Wait for a terminated process, escalating to SIGKILL after
+        STOP_TIMEOUT. A timer does the escalation so wait() blocks in
+        waitpid instead of polling like wait(timeout) does.
+        """
+        killer = threading.Timer(STOP_TIMEOUT, process.kill)
+        killer.daemon = True
+        try:
+            killer.start()
+        except RuntimeError:
+            # No new threads during interpreter shutdown (stop() runs atexit)
+            try:
+                process.wait(timeout=STOP_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+            return
+        try:
+            process.wait()
+        finally:
+            killer.cancel()
+    
+    def _kill_port(self) -> bool:
+        """Kill any process using our port. Returns False if none was found."""
+        if sys.platform.startswith("linux"):
+            try:
+                pids = _pids_bound_to_port(self.port)
+            except OSError:
+                pass
+            else:
+                return self._kill_pids(pids)
+        
         try:
             result = subprocess.run(
                 ["lsof", "-t", "-i", f":{self.port}"],
                 capture_output=True,
                 text=True
             )
-            if result.stdout.strip():
-                pids = result.stdout.strip().split("\n")
-                for pid in pids:
-                    subprocess.run(["kill", "-9", pid], check=False)
-                logger.debug(f"Killed processes on port {self.port}: {pids}")
+            return self._kill_pids({int(pid) for pid in result.stdout.split()})
         except FileNotFoundError:
-            # lsof not available, try fuser
+            # lsof not available, try fuser (exit status 0 means it killed something)
             try:
-                subprocess.run(
+                result = subprocess.run(
                     ["fuser", "-k", f"{self.port}/tcp"],
                     capture_output=True,
                     check=False
                 )
+                return result.returncode == 0
             except FileNotFoundError:
+                return False
+    
+    def _kill_pids(self, pids: set) -> bool:
+        """SIGKILL each pid in-process (no kill(1) per pid). False if there were none."""
+        # lsof also lists us while a health-check connection is open
+        pids = pids - {os.getpid()}
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
                 pass
+        if pids:
+            logger.debug(f"Killed processes on port {self.port}: {sorted(pids)}")
+        return bool(pids)
     
     def get_log(self, last_n_chars: int = 5000) -> str:
         """Get recent server log content."""
         if self._log_file and self._log_file.exists():
-            content = self._log_file.read_text()
+            content = self._log_file.read_text(errors="replace")
             return content[-last_n_chars:] if len(content) > last_n_chars else content
         return ""
\ No newline at end of file
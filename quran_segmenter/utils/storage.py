@@ -2,16 +2,314 @@
 """
 Storage utilities with Google Drive integration for Colab.
 """
+import asyncio
 import os
+import stat
 import shutil
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _detect_colab() -> bool:
+    try:
+        import google.colab
+        return True
+    except ImportError:
+        return False
+
+
+# Resolved once: a failed import is not cached and re-searches sys.path
+_IS_COLAB = _detect_colab()
+
+
+def _collect_newer(
+    src: str,
+    dst: str,
+    work: List[Tuple[str, str]],
+    watermarks: Optional[Dict[str, float]] = None,
+    pending: Optional[Dict[str, float]] = None
+):
+    """Append (src, dst) pairs for files under src that are missing or older at dst."""
+    # dst is created on the first file that needs copying, so an up-to-date
+    # tree costs no mkdir calls (each is a round-trip on Drive)
+    dst_ready = False
+    with os.scandir(src) as it:
+        # Visit entries in inode order (d_ino comes with the listing, no stat)
+        # so metadata lookups walk the inode table sequentially
+        entries = sorted(it, key=lambda e: e.inode())
+    for entry in entries:
+        target = os.path.join(dst, entry.name)
+        if entry.is_dir():
+            _collect_newer(entry.path, target, work, watermarks, pending)
+        elif entry.is_file():
+            # DirEntry caches its stat; dst is stat'ed once (missing -> copy)
+            mtime = entry.stat().st_mtime
+            if watermarks is not None and watermarks.get(entry.path) == mtime:
+                continue
+            try:
+                if os.stat(target).st_mtime >= mtime:
+                    if watermarks is not None:
+                        watermarks[entry.path] = mtime
+                    continue
+            except FileNotFoundError:
+                pass
+            if not dst_ready:
+                os.makedirs(dst, exist_ok=True)
+                dst_ready = True
+            work.append((entry.path, target))
+            if pending is not None:
+                pending[entry.path] = mtime
+
+
+# ioctl request for a copy-on-write clone (Linux FICLONE)
+_FICLONE = 0x40049409
+
+
+def clone_file(src: Path, dst: Path) -> Path:
+    """
+    Copy src to dst, as a reflink (copy-on-write clone) when the filesystem
+    supports it (btrfs, XFS) and with an in-kernel copy otherwise.
+    """
+    try:
+        import fcntl
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        shutil.copystat(src, dst)
+    except (ImportError, OSError):
+        _fast_copy(os.fspath(src), os.fspath(dst))
+    return Path(dst)
+
+
+def link_or_copy(src: Path, dst: Path) -> Path:
+    """
+    Place src at dst as a hardlink, falling back to clone_file across
+    filesystems. Only for read-only assets: a hardlink shares the inode,
+    so writing through dst would modify src.
+    """
+    try:
+        if os.path.samefile(src, dst):
+            return Path(dst)
+        os.unlink(dst)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src, dst)
+    except OSError:
+        clone_file(src, dst)
+    return Path(dst)
+
+
+# mtimes closer than this count as equal (Drive's FUSE layer keeps coarse timestamps)
+MTIME_TOLERANCE_NS = 10**9
+
+
+def _mirror_dir(src: str, dst: str) -> int:
+    """
+    Make dst an exact copy of the tree at src.
+    
+    Files are copied only when their size or mtime differs at dst (copies
+    keep the source mtime, so the next mirror skips them), and entries that
+    src no longer has are removed. Returns the number of files copied.
+    """
+    os.makedirs(dst, exist_ok=True)
+    copied = 0
+    names = set()
+    with os.scandir(src) as it:
+        for entry in it:
+            names.add(entry.name)
+            target = os.path.join(dst, entry.name)
+            if entry.is_dir():
+                if os.path.isfile(target):
+                    os.unlink(target)
+                copied += _mirror_dir(entry.path, target)
+            elif entry.is_file():
+                src_st = entry.stat()
+                try:
+                    dst_st = os.stat(target)
+                    if (
+                        dst_st.st_size == src_st.st_size
+                        and abs(dst_st.st_mtime_ns - src_st.st_mtime_ns) < MTIME_TOLERANCE_NS
+                    ):
+                        continue
+                    if os.path.isdir(target):
+                        shutil.rmtree(target)
+                except FileNotFoundError:
+                    pass
+                _fast_copy(entry.path, target)
+                copied += 1
+    with os.scandir(dst) as it:
+        orphans = [e for e in it if e.name not in names]
+    for entry in orphans:
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path)
+        else:
+            os.unlink(entry.path)
+    return copied
+
+
+def _stat_or_none(path: Path) -> Optional[os.stat_result]:
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+def _replace_item(src: Path, dst: Path):
+    """Copy a file, or mirror a whole directory, to dst."""
+    if src.is_dir():
+        if dst.is_file():
+            dst.unlink()
+        _mirror_dir(os.fspath(src), os.fspath(dst))
+    elif src.is_file():
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        _fast_copy(src, dst)
+
+
+# Concurrent copies for sync_path; Drive (FUSE) copies are latency-bound
+SYNC_MAX_WORKERS = 8
+
+
+def _fast_copy(src: str, dst: str):
+    """
+    copy2 equivalent that copies data in-kernel with os.copy_file_range
+    (Linux 4.5+), which can offload to the filesystem and runs without the
+    GIL. Falls back to shutil.copy2 (itself sendfile-based on Linux).
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        # Source shrank, or a filesystem that reports 0 instead
+                        # of failing (some FUSE mounts): let copy2 redo it
+                        raise OSError(f"copy_file_range stopped with {remaining} bytes left")
+                    remaining -= copied
+            shutil.copystat(src, dst)
+            return
+        except OSError:
+            # EXDEV/ENOSYS/EINVAL on older kernels or FUSE; copy2 rewrites dst
+            # and re-raises genuine errors
+            pass
+    shutil.copy2(src, dst)
+
+
+def _copy_logged(pair: Tuple[str, str]) -> bool:
+    """Copy one (src, dst) pair; log and report failure instead of raising."""
+    try:
+        _fast_copy(*pair)
+        return True
+    except OSError as e:
+        logger.warning(f"Failed to copy {pair[0]} -> {pair[1]}: {e}")
+        return False
+
+
+def _plan_sync(
+    src: Path,
+    dst: Path,
+    watermarks: Optional[Dict[str, float]]
+) -> Tuple[List[Tuple[str, str]], Dict[str, float]]:
+    """(src, dst) pairs that need copying, plus the source mtime of each."""
+    work: List[Tuple[str, str]] = []
+    pending: Dict[str, float] = {}
+    try:
+        src_st = os.stat(src)
+    except FileNotFoundError:
+        return work, pending
+    
+    if stat.S_ISDIR(src_st.st_mode):
+        _collect_newer(os.fspath(src), os.fspath(dst), work, watermarks, pending)
+        return work, pending
+    
+    src_key = os.fspath(src)
+    if watermarks is not None and watermarks.get(src_key) == src_st.st_mtime:
+        return work, pending
+    try:
+        if os.stat(dst).st_mtime >= src_st.st_mtime:
+            if watermarks is not None:
+                watermarks[src_key] = src_st.st_mtime
+            return work, pending
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(os.fspath(dst)) or ".", exist_ok=True)
+    work.append((src_key, os.fspath(dst)))
+    pending[src_key] = src_st.st_mtime
+    return work, pending
+
+
+def _record_synced(
+    watermarks: Optional[Dict[str, float]],
+    work: List[Tuple[str, str]],
+    results: List[bool],
+    pending: Dict[str, float]
+) -> int:
+    """Advance watermarks for successful copies; return how many succeeded."""
+    if watermarks is not None:
+        for (src_file, _), ok in zip(work, results):
+            if ok:
+                watermarks[src_file] = pending[src_file]
+    return sum(results)
+
+
+def sync_path(
+    src: Path,
+    dst: Path,
+    max_workers: int = SYNC_MAX_WORKERS,
+    watermarks: Optional[Dict[str, float]] = None
+) -> int:
+    """
+    Mirror a file or directory tree from src to dst.
+    
+    Only files that are missing or older at dst are copied (with copy2, so
+    mtimes carry over and the next sync skips them). Copies run on up to
+    `max_workers` threads; a failed file is logged and skipped. Returns the
+    number of files copied.
+    
+    `watermarks` maps source paths to the mtime they had when last synced;
+    files whose mtime still matches are skipped without stat-ing dst (which
+    is the expensive side on Drive). It is updated in place.
+    """
+    work, pending = _plan_sync(src, dst, watermarks)
+    if len(work) <= 1 or max_workers <= 1:
+        results = list(map(_copy_logged, work))
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(work))) as pool:
+            results = list(pool.map(_copy_logged, work))
+    return _record_synced(watermarks, work, results, pending)
+
+
+# Outstanding copies for sync_path_async
+SYNC_ASYNC_CONCURRENCY = 32
+
+
+async def sync_path_async(
+    src: Path,
+    dst: Path,
+    concurrency: int = SYNC_ASYNC_CONCURRENCY,
+    watermarks: Optional[Dict[str, float]] = None
+) -> int:
+    """
+    Awaitable sync_path for use inside a running event loop (e.g. a notebook
+    cell with top-level await). Copies are dispatched with asyncio.to_thread,
+    at most `concurrency` in flight.
+    """
+    work, pending = await asyncio.to_thread(_plan_sync, src, dst, watermarks)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    
+    async def _copy(pair: Tuple[str, str]) -> bool:
+        async with semaphore:
+            return await asyncio.to_thread(_copy_logged, pair)
+    
+    results = await asyncio.gather(*(_copy(pair) for pair in work))
+    return _record_synced(watermarks, work, list(results), pending)
+
+
 class StorageManager:
     """
     Manages persistent storage with optional Google Drive backing.
@@ -29,18 +327,14 @@ class StorageManager:
         self.local_base = Path(local_base)
         self.drive_base = Path(drive_base) if drive_base else None
         self.auto_sync = auto_sync
-        self._is_colab = self._detect_colab()
+        self._is_colab = _IS_COLAB
         
         # Create local directories
         self.local_base.mkdir(parents=True, exist_ok=True)
     
     def _detect_colab(self) -> bool:
         """Detect if running in Google Colab."""
-        try:
-            import google.colab
-            return True
-        except ImportError:
-            return False
+        return _IS_COLAB
     
     @classmethod
     def setup_colab(
@@ -107,15 +401,8 @@ class StorageManager:
             dst = self.local_base / item
             
             if src.exists():
-                if src.is_file():
-                    dst.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.copy2(src, dst)
-                    logger.debug(f"  Synced file: {item}")
-                elif src.is_dir():
-                    if dst.exists():
-                        shutil.rmtree(dst)
-                    shutil.copytree(src, dst)
-                    logger.debug(f"  Synced folder: {item}")
+                _replace_item(src, dst)
+                logger.debug(f"  Synced {'folder' if src.is_dir() else 'file'}: {item}")
         
         logger.info("✓ Sync from Drive complete")
     
@@ -133,13 +420,7 @@ class StorageManager:
             dst = self.drive_base / item
             
             if src.exists():
-                if src.is_file():
-                    dst.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.copy2(src, dst)
-                elif src.is_dir():
-                    if dst.exists():
-                        shutil.rmtree(dst)
-                    shutil.copytree(src, dst)
+                _replace_item(src, dst)
     
     def save_config(self, config_data: dict):
         """Save configuration with Drive backup."""
@@ -156,22 +437,17 @@ class StorageManager:
         local_path = self.local_base / "config.json"
         drive_path = self.drive_base / "config.json" if self.drive_base else None
         
-        # Check which is newer
-        local_exists = local_path.exists()
-        drive_exists = drive_path and drive_path.exists()
+        # One stat per side (each Drive call is a FUSE round-trip)
+        local_st = _stat_or_none(local_path)
+        drive_st = _stat_or_none(drive_path) if drive_path else None
         
-        if drive_exists and local_exists:
-            # Use newer one
-            if drive_path.stat().st_mtime > local_path.stat().st_mtime:
-                shutil.copy2(drive_path, local_path)
-        elif drive_exists and not local_exists:
-            shutil.copy2(drive_path, local_path)
+        if drive_st and (local_st is None or drive_st.st_mtime_ns > local_st.st_mtime_ns):
+            _fast_copy(drive_path, local_path)
+        elif local_st is None:
+            return None
         
-        if local_path.exists():
-            with open(local_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        
-        return None
+        with open(local_path, "r", encoding="utf-8") as f:
+            return json.load(f)
     
     def save_embeddings(self, name: str, data_path: Path):
         """Save embeddings file with Drive backup."""
@@ -180,10 +456,11 @@ class StorageManager:
         
         dest = embeddings_dir / name
         if data_path != dest:
-            shutil.copy2(data_path, dest)
+            _fast_copy(data_path, dest)
         
         if self.auto_sync and self.drive_base:
-            self.sync_to_drive(["embeddings"])
+            # Upload just this file; the rest of the folder is unchanged
+            self.sync_to_drive([f"embeddings/{name}"])
     
     def get_embeddings_path(self, name: str) -> Path:
         """Get path to embeddings file."""
@@ -208,11 +485,7 @@ def get_storage_manager(
     Returns:
         Configured StorageManager
     """
-    try:
-        import google.colab
-        if use_drive:
-            return StorageManager.setup_colab(local_base=local_base)
-    except ImportError:
-        pass
+    if _IS_COLAB and use_drive:
+        return StorageManager.setup_colab(local_base=local_base)
     
     return StorageManager(local_base=Path(local_base))
\ No newline at end of file
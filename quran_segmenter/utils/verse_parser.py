@@ -2,133 +2,188 @@
 """
 Verse specification parsing utilities.
 """
-import json
+from array import array
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Final, Optional, Tuple
 import logging
 
 from ..models import VerseRange, QuranMetadata
 
 logger = logging.getLogger(__name__)
 
-# Standard Quran structure (fallback)
-SURAH_VERSE_COUNTS = {
-    1: 7, 2: 286, 3: 200, 4: 176, 5: 120, 6: 165, 7: 206, 8: 75, 9: 129, 10: 109,
-    11: 123, 12: 111, 13: 43, 14: 52, 15: 99, 16: 128, 17: 111, 18: 110, 19: 98, 20: 135,
-    21: 112, 22: 78, 23: 118, 24: 64, 25: 77, 26: 227, 27: 93, 28: 88, 29: 69, 30: 60,
-    31: 34, 32: 30, 33: 73, 34: 54, 35: 45, 36: 83, 37: 182, 38: 88, 39: 75, 40: 85,
-    41: 54, 42: 53, 43: 89, 44: 59, 45: 37, 46: 35, 47: 38, 48: 29, 49: 18, 50: 45,
-    51: 60, 52: 49, 53: 62, 54: 55, 55: 78, 56: 96, 57: 29, 58: 22, 59: 24, 60: 13,
-    61: 14, 62: 11, 63: 11, 64: 18, 65: 12, 66: 12, 67: 30, 68: 52, 69: 52, 70: 44,
-    71: 28, 72: 28, 73: 20, 74: 56, 75: 40, 76: 31, 77: 50, 78: 40, 79: 46, 80: 42,
-    81: 29, 82: 19, 83: 36, 84: 25, 85: 22, 86: 17, 87: 19, 88: 26, 89: 30, 90: 20,
-    91: 15, 92: 21, 93: 11, 94: 8, 95: 8, 96: 19, 97: 5, 98: 8, 99: 8, 100: 11,
-    101: 11, 102: 8, 103: 3, 104: 9, 105: 5, 106: 4, 107: 7, 108: 3, 109: 6, 110: 3,
-    111: 5, 112: 4, 113: 5, 114: 6
-}
+__all__ = [
+    "SURAH_VERSE_COUNTS",
+    "load_quran_metadata",
+    "parse_verse_spec",
+    "validate_verse_range",
+]
+
+# Standard Quran structure (fallback): verse counts of surahs 1-114, in order.
+# Lookups index this array (surah - 1) after a range check.
+_VERSE_COUNTS: Final = array("H", (
+    7, 286, 200, 176, 120, 165, 206, 75, 129, 109, 123, 111, 43, 52, 99, 128, 111, 110, 98, 135,
+    112, 78, 118, 64, 77, 227, 93, 88, 69, 60, 34, 30, 73, 54, 45, 83, 182, 88, 75, 85,
+    54, 53, 89, 59, 37, 35, 38, 29, 18, 45, 60, 49, 62, 55, 78, 96, 29, 22, 24, 13,
+    14, 11, 11, 18, 12, 12, 30, 52, 52, 44, 28, 28, 20, 56, 40, 31, 50, 40, 46, 42,
+    29, 19, 36, 25, 22, 17, 19, 26, 30, 20, 15, 21, 11, 8, 8, 19, 5, 8, 8, 11,
+    11, 8, 3, 9, 5, 4, 7, 3, 6, 3, 5, 4, 5, 6
+))
+
+SURAH_VERSE_COUNTS: Final[Dict[int, int]] = dict(enumerate(_VERSE_COUNTS, 1))
+
+
+# Verse spec prefix -> the VerseRange flag it sets
+_PREFIX_FLAGS: Final[Dict[str, str]] = {"taawwudh": "include_taawwudh", "basmalah": "include_basmalah"}
+
+
+# Resolved metadata path -> ((mtime_ns, size), surah verse counts)
+_METADATA_MEMO: Dict[str, Tuple[Tuple[int, int], Dict[int, int]]] = {}
+
+
+def _load_verse_counts(path: Path) -> Dict[int, int]:
+    """
+    Surah verse counts from a metadata file (fallback counts filled in).
+    
+    Only the 114 counts are kept, memoized in-process on the file's
+    (mtime, size), so the JSON is only parsed again after it changes.
+    """
+    st = path.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    memo_key = str(path.resolve())
+    memo = _METADATA_MEMO.get(memo_key)
+    if memo is not None and memo[0] == stamp:
+        return memo[1]
+    
+    # Fallback counts for missing surahs; loaded counts take precedence
+    counts = {**SURAH_VERSE_COUNTS, **QuranMetadata.load(path).surah_verse_counts}
+    _METADATA_MEMO[memo_key] = (stamp, counts)
+    return counts
 
 
 def load_quran_metadata(path: Path) -> QuranMetadata:
     """Load Quran metadata from file or use defaults."""
+    path = Path(path)
     if path.exists():
         try:
-            meta = QuranMetadata.load(path)
-            # Fill missing surahs with fallback counts
-            for s, count in SURAH_VERSE_COUNTS.items():
-                if s not in meta.surah_verse_counts:
-                    meta.surah_verse_counts[s] = count
-            return meta
+            return QuranMetadata(surah_verse_counts=dict(_load_verse_counts(path)))
         except Exception as e:
-            logger.warning(f"Failed to load metadata from {path}: {e}")
+            logger.warning("Failed to load metadata from %s: %s", path, e)
     
     return QuranMetadata(surah_verse_counts=SURAH_VERSE_COUNTS.copy())
 
 
-def parse_verse_spec(
-    spec: str,
-    metadata: QuranMetadata = None
-) -> VerseRange:
+@lru_cache(maxsize=1024)
+def _split_verse_spec(spec: str) -> Tuple[int, Optional[int], Optional[int], bool, bool]:
     """
-    Parse a verse specification into a VerseRange.
+    (surah, start_verse, end_verse, include_basmalah, include_taawwudh) for a
+    spec; start/end are None for a full surah, which needs verse counts.
     
-    Formats supported:
-      - "2:282" -> single verse
-      - "2:1-5" -> verse range within surah
-      - "2" -> entire surah (requires metadata)
-      - "taawwudh+2:1-5" -> prepend taawwudh segment
-      - "taawwudh+basmalah+2:1-5" -> prepend taawwudh and basmalah
-      - "2:255,2:282" -> NOT supported (multiple non-contiguous)
+    Pure in the spec string, so memoized: the same specs recur in batch runs.
     """
     spec = spec.strip()
     include_taawwudh = False
     include_basmalah = False
     
-    # Extract optional prefix phrases
-    if "+" in spec:
-        parts = [p.strip() for p in spec.split("+") if p.strip()]
-        if not parts:
-            raise ValueError("Empty verse spec")
-        base_spec = parts[-1]
-        for prefix in parts[:-1]:
-            key = prefix.lower()
-            if key == "taawwudh":
-                include_taawwudh = True
-            elif key == "basmalah":
-                include_basmalah = True
-            else:
-                raise ValueError(f"Unknown prefix '{prefix}' in verse spec '{spec}'")
-    else:
+    # Extract optional prefix phrases (most specs have none: one find() and done)
+    plus = spec.find("+")
+    if plus == -1:
         base_spec = spec
+    else:
+        base_spec = ""
+        start = 0
+        while True:
+            token = spec[start:plus].strip() if plus != -1 else spec[start:].strip()
+            if token:
+                # The previous non-empty token turned out to be a prefix
+                if base_spec:
+                    flag = _PREFIX_FLAGS.get(base_spec.lower())
+                    if flag is None:
+                        raise ValueError(f"Unknown prefix '{base_spec}' in verse spec '{spec}'")
+                    if flag == "include_taawwudh":
+                        include_taawwudh = True
+                    else:
+                        include_basmalah = True
+                base_spec = token
+            if plus == -1:
+                break
+            start = plus + 1
+            plus = spec.find("+", start)
+        if not base_spec:
+            raise ValueError("Empty verse spec")
     
-    # Check for unsupported formats
-    if "," in base_spec and base_spec.count(":") > 1:
+    # Check for unsupported formats (a comma can never parse, whatever follows it)
+    if "," in base_spec:
         raise ValueError(
             f"Non-contiguous verse ranges not supported: '{spec}'. "
             "Process each range separately."
         )
     
-    if ":" not in base_spec:
+    surah, sep, verse_part = base_spec.partition(":")
+    if not sep:
         # Full surah
-        surah = int(base_spec)
+        return int(surah), None, None, include_basmalah, include_taawwudh
+    
+    start_verse, end_verse = VerseRange.parse_verse_bounds(verse_part)
+    return int(surah), start_verse, end_verse, include_basmalah, include_taawwudh
+
+
+def parse_verse_spec(
+    spec: str,
+    metadata: Optional[QuranMetadata] = None
+) -> VerseRange:
+    """
+    Parse a verse specification into a VerseRange.
+    
+    Formats supported:
+      - "2:282" -> single verse
+      - "2:1-5" -> verse range within surah
+      - "2" -> entire surah (requires metadata)
+      - "taawwudh+2:1-5" -> prepend taawwudh segment
+      - "taawwudh+basmalah+2:1-5" -> prepend taawwudh and basmalah
+      - "2:255,2:282" -> NOT supported (multiple non-contiguous)
+    
+    Every call returns a new VerseRange, so callers may modify it.
+    """
+    surah, start_verse, end_verse, include_basmalah, include_taawwudh = _split_verse_spec(spec)
+    
+    if start_verse is None:
         if metadata:
-            verse_count = metadata.get_verse_count(surah)
-        elif surah in SURAH_VERSE_COUNTS:
-            verse_count = SURAH_VERSE_COUNTS[surah]
+            end_verse = metadata.get_verse_count(surah)
+        elif 1 <= surah <= 114:
+            end_verse = _VERSE_COUNTS[surah - 1]
         else:
             raise ValueError(f"Unknown surah {surah} and no metadata provided")
-        
-        return VerseRange(
-            surah=surah,
-            start_verse=1,
-            end_verse=verse_count,
-            include_basmalah=include_basmalah,
-            include_taawwudh=include_taawwudh
-        )
+        start_verse = 1
     
-    vr = VerseRange.parse(base_spec)
-    vr.include_basmalah = include_basmalah
-    vr.include_taawwudh = include_taawwudh
-    return vr
+    return VerseRange(
+        surah=surah,
+        start_verse=start_verse,
+        end_verse=end_verse,
+        include_basmalah=include_basmalah,
+        include_taawwudh=include_taawwudh
+    )
 
 
-def validate_verse_range(vr: VerseRange, metadata: QuranMetadata = None) -> Tuple[bool, str]:
+def validate_verse_range(vr: VerseRange, metadata: Optional[QuranMetadata] = None) -> Tuple[bool, str]:
     """Validate a verse range against metadata."""
-    if metadata:
-        try:
-            max_verse = metadata.get_verse_count(vr.surah)
-            if vr.end_verse > max_verse:
-                return False, f"Verse {vr.end_verse} exceeds surah {vr.surah} max ({max_verse})"
-        except ValueError as e:
-            return False, str(e)
-    elif vr.surah in SURAH_VERSE_COUNTS:
-        max_verse = SURAH_VERSE_COUNTS[vr.surah]
-        if vr.end_verse > max_verse:
-            return False, f"Verse {vr.end_verse} exceeds surah {vr.surah} max ({max_verse})"
-    
+    # Cheap invariants first; the verse-count lookup only runs for sane ranges
     if vr.start_verse < 1:
         return False, "Start verse must be >= 1"
     
     if vr.start_verse > vr.end_verse:
         return False, "Start verse must be <= end verse"
     
+    if metadata:
+        max_verse = metadata.surah_verse_counts.get(vr.surah)
+        if max_verse is None:
+            return False, f"Unknown surah: {vr.surah}"
+    elif 1 <= vr.surah <= 114:
+        max_verse = _VERSE_COUNTS[vr.surah - 1]
+    else:
+        return True, ""
+    
+    if vr.end_verse > max_verse:
+        return False, f"Verse {vr.end_verse} exceeds surah {vr.surah} max ({max_verse})"
+    
     return True, ""
@@ -13,6 +13,10 @@ setup(
         "colab": [
             "google-colab",
         ],
+        "fast": [
+            "orjson>=3.9.0",
+            "ijson>=3.2.0",
+        ],
         "dev": [
             "pytest>=7.0.0",
             "black>=23.0.0",
@@ -1,17 +1,50 @@
 import json
+import shutil
 from pathlib import Path
 
 import pytest
 
 from quran_segmenter.config import Config
 
+# Translation file contents for make_translation_file, serialized once
+_TRANSLATION_PLAIN = json.dumps({
+    "1:1": {"text": "hello world"},
+    "1:2": {"text": "second verse"},
+}).encode()
+_TRANSLATION_SEGMENTED = json.dumps({
+    "1:1": {"text": "hello world", "segments": [{"t": "hello", "word_range": {"start": 1, "end": 1}}]},
+    "1:2": {"text": "second verse", "segments": [{"t": "two", "word_range": {"start": 1, "end": 1}}]},
+}).encode()
+
+
+@pytest.fixture(scope="session")
+def _config_template(tmp_path_factory):
+    """Resource files shared by every temp_config, built once per session."""
+    template = tmp_path_factory.mktemp("config-template")
+    (template / "jumlize").write_text("#!/bin/sh\n")
+
+    # Minimal words + metadata fixtures
+    (template / "qpc-hafs-word-by-word.json").write_text(
+        json.dumps(
+            {
+                "1:1:1": {"surah": 1, "ayah": 1, "word": 1, "text": "alpha"},
+                "1:1:2": {"surah": 1, "ayah": 1, "word": 2, "text": "beta"},
+                "1:2:1": {"surah": 1, "ayah": 2, "word": 1, "text": "gamma"},
+            }
+        )
+    )
+    (template / "quran-metadata-misc.json").write_text(json.dumps({"1:1": {}, "1:2": {}}))
+    return template
+
 
 @pytest.fixture
-def temp_config(tmp_path):
+def temp_config(tmp_path, _config_template):
     """
     Create an isolated Config with required paths and minimal resource files.
     """
     base_dir = tmp_path
+    # Each test gets its own copy, so tests may modify the resource files
+    shutil.copytree(_config_template, base_dir, dirs_exist_ok=True)
     data_dir = base_dir / "data"
     cfg = Config(data_dir=data_dir, base_dir=base_dir)
 
@@ -20,22 +53,8 @@ def temp_config(tmp_path):
     cfg.rabtize_dir.mkdir(parents=True, exist_ok=True)
 
     cfg.jumlize_binary = base_dir / "jumlize"
-    cfg.jumlize_binary.write_text("#!/bin/sh\n")
-
-    # Minimal words + metadata fixtures
     cfg.qpc_words_file = base_dir / "qpc-hafs-word-by-word.json"
-    cfg.qpc_words_file.write_text(
-        json.dumps(
-            {
-                "1:1:1": {"surah": 1, "ayah": 1, "word": 1, "text": "alpha"},
-                "1:1:2": {"surah": 1, "ayah": 1, "word": 2, "text": "beta"},
-                "1:2:1": {"surah": 1, "ayah": 2, "word": 1, "text": "gamma"},
-            }
-        )
-    )
-
     cfg.quran_metadata_file = base_dir / "quran-metadata-misc.json"
-    cfg.quran_metadata_file.write_text(json.dumps({"1:1": {}, "1:2": {}}))
 
     return cfg
 
@@ -45,14 +64,7 @@ def make_translation_file(tmp_path):
     """Factory to create translation files with optional segments."""
     def _make(segmented: bool = False, name: str = "translation") -> Path:
         path = tmp_path / f"{name}.json"
-        data = {
-            "1:1": {"text": "hello world"},
-            "1:2": {"text": "second verse"},
-        }
-        if segmented:
-            data["1:1"]["segments"] = [{"t": "hello", "word_range": {"start": 1, "end": 1}}]
-            data["1:2"]["segments"] = [{"t": "two", "word_range": {"start": 1, "end": 1}}]
-        path.write_text(json.dumps(data))
+        path.write_bytes(_TRANSLATION_SEGMENTED if segmented else _TRANSLATION_PLAIN)
         return path
 
     return _make
@@ -1,5 +1,8 @@
+import os
+
+from quran_segmenter.pipeline import assembler as assembler_module
 from quran_segmenter.pipeline.assembler import SegmentAssembler
-from quran_segmenter.models import VerseRange, WordTimestamp
+from quran_segmenter.models import VerseRange, WordTimestamp, WordTimestampBatch
 
 
 def test_assemble_segments_success(temp_config):
@@ -44,3 +47,82 @@ def test_assemble_missing_timing_warns(temp_config):
 
     assert "No timing data for 1:1 words 1-2" in result.warnings
     assert "No valid segments for 1:1" in result.warnings
+
+
+def test_verse_index_groups_and_orders_words(temp_config):
+    index = SegmentAssembler._build_verse_index({
+        "1:1:2": {"surah": "1", "ayah": "1", "word": "2", "text": "beta"},
+        "1:2:1": {"surah": "1", "ayah": "2", "word": "1", "text": "gamma"},
+        "1:1:1": {"surah": "1", "ayah": "1", "word": "1", "text": "alpha"},
+    })
+    assert index == {(1, 1): ("alpha", "beta"), (1, 2): ("gamma",)}
+
+
+def test_verse_index_reuses_pickle_sidecar(monkeypatch, temp_config):
+    expected = SegmentAssembler(temp_config).verse_index
+    assert (temp_config.cache_dir / f"{temp_config.qpc_words_file.name}.index.pkl").exists()
+
+    def _no_json(path):
+        raise AssertionError("JSON should not be re-parsed")
+
+    monkeypatch.setattr(assembler_module, "read_json", _no_json)
+    monkeypatch.setattr(assembler_module, "_VERSE_INDEX_MEMO", {})
+    assert SegmentAssembler(temp_config).verse_index == expected
+
+    # Touching the source invalidates the sidecar
+    monkeypatch.undo()
+    os.utime(temp_config.qpc_words_file, ns=(0, 10**18))
+    assert SegmentAssembler(temp_config).verse_index == expected
+
+
+def test_assemble_segment_spans_min_start_max_end(temp_config):
+    assembler = SegmentAssembler(temp_config)
+    timestamps = [
+        WordTimestamp(surah=1, ayah=1, word_index=1, start_time=0.4, end_time=0.9),
+        WordTimestamp(surah=1, ayah=1, word_index=3, start_time=0.2, end_time=0.6),
+    ]
+    alignment = {"1:1": {"segments": [{"word_range": {"start": 1, "end": 3}, "t": "x"}]}}
+
+    seg = assembler.assemble(VerseRange.parse("1:1"), timestamps, alignment).verses["1:1"].segments[0]
+
+    assert (seg.start, seg.end) == (0.2, 0.9)
+
+
+def test_verse_index_shared_across_instances(monkeypatch, temp_config):
+    first = SegmentAssembler(temp_config).verse_index
+
+    def _no_load(*args):
+        raise AssertionError("index should come from the in-process memo")
+
+    monkeypatch.setattr(assembler_module.pickle, "load", _no_load)
+    assert SegmentAssembler(temp_config).verse_index is first
+
+
+def test_build_verse_timings_is_dense_per_verse(temp_config):
+    timings = SegmentAssembler(temp_config)._build_verse_timings([
+        WordTimestamp(surah=1, ayah=1, word_index=3, start_time=0.3, end_time=0.4),
+        WordTimestamp(surah=1, ayah=1, word_index=1, start_time=0.1, end_time=0.2),
+        WordTimestamp(surah=1, ayah=2, word_index=1, start_time=0.5, end_time=0.6),
+    ])
+    assert timings == {
+        assembler_module._verse_slot(1, 1): [(0.1, 0.2), None, (0.3, 0.4)],
+        assembler_module._verse_slot(1, 2): [(0.5, 0.6)],
+    }
+
+
+def test_build_verse_timings_accepts_column_batch(temp_config):
+    words = [
+        WordTimestamp(surah=1, ayah=1, word_index=2, start_time=0.2, end_time=0.3),
+        WordTimestamp(surah=1, ayah=1, word_index=1, start_time=0.0, end_time=0.1),
+    ]
+    assembler = SegmentAssembler(temp_config)
+    batch = WordTimestampBatch.from_rows(w.as_row() for w in words)
+    assert assembler._build_verse_timings(batch) == assembler._build_verse_timings(words)
+
+
+def test_verse_index_shares_repeated_word_strings():
+    index = SegmentAssembler._build_verse_index({
+        "1:1:1": {"surah": 1, "ayah": 1, "word": 1, "text": "".join(["وَ"])},
+        "1:2:1": {"surah": 1, "ayah": 2, "word": 1, "text": "".join(["و", "َ"])},
+    })
+    assert index[(1, 1)][0] is index[(1, 2)][0]
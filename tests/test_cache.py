@@ -1,6 +1,12 @@
+import hashlib
 import json
+import os
+import threading
 from pathlib import Path
 
+import pytest
+
+from quran_segmenter.utils import cache as cache_module
 from quran_segmenter.utils.cache import CacheManager
 
 
@@ -13,6 +19,8 @@ def test_cache_timestamps_roundtrip(tmp_path):
     cache_path = cache.cache_timestamps(audio, "1:1", data)
 
     assert cache_path.exists()
+    # Machine-read only, so written compactly
+    assert b" " not in cache_path.read_bytes()
     loaded = cache.get_cached_timestamps(audio, "1:1")
     assert loaded == data
 
@@ -29,6 +37,49 @@ def test_cache_alignment_roundtrip_and_clear(tmp_path):
     assert cache.get_cached_alignment("en-test", "1:1") is None
 
 
+def test_timestamp_formats_are_indexed_and_cleared_together(tmp_path):
+    cache = CacheManager(tmp_path / "cache")
+    audio = tmp_path / "audio.mp3"
+    audio.write_bytes(b"audio-bytes")
+    json_path = cache.cache_timestamps(audio, "1:1", [{"surah": 1}])
+    rows_path = cache.cache_timestamp_rows(audio, "1:1", [(1, 1, 1, 0.0, 1.0)])
+
+    # Each file has its own index entry, so neither is orphaned
+    assert {entry["path"] for entry in cache._index.values()} == {str(json_path), str(rows_path)}
+
+    cache.clear("timestamps")
+    assert not json_path.exists()
+    assert not rows_path.exists()
+    assert cache._index == {}
+
+
+def test_atomic_write_removes_temp_file_on_failure(monkeypatch, tmp_path):
+    target = tmp_path / "entry.json"
+
+    def disk_full(src, dst):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(cache_module.os, "replace", disk_full)
+    with pytest.raises(OSError):
+        cache_module._atomic_write(target, b"data")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_clear_waits_for_the_index_lock(tmp_path):
+    cache = CacheManager(tmp_path / "cache")
+    cache.cache_alignment("en", "1:1", {})
+
+    with cache._index_lock:
+        clearing = threading.Thread(target=cache.clear, args=("alignment",))
+        clearing.start()
+        clearing.join(0.1)
+        # Blocked behind a concurrent index update
+        assert clearing.is_alive()
+        assert "alignment:en_1:1" in cache._index
+    clearing.join()
+    assert cache._index == {}
+
+
 def test_clear_all_removes_entries(tmp_path):
     cache = CacheManager(tmp_path)
     audio = tmp_path / "audio.mp3"
@@ -40,3 +91,171 @@ def test_clear_all_removes_entries(tmp_path):
     # Index file remains but cached content should be gone
     remaining = list(tmp_path.iterdir())
     assert all(p.name == "index.json" or p == audio for p in remaining)
+
+
+def test_audio_hash_streams_once_per_file_version(monkeypatch, tmp_path):
+    audio = tmp_path / "audio.mp3"
+    audio.write_bytes(b"audio-bytes" * 200_000)
+    monkeypatch.setattr(cache_module, "DIGEST_CHUNK_SIZE", 4096)
+    cache_module._audio_hash_for.cache_clear()
+
+    # Same key as hashing the whole file in one go
+    expected = hashlib.md5(audio.read_bytes()).hexdigest()[:12]
+    assert cache_module._audio_hash(audio) == expected
+    assert cache_module._audio_hash(audio) == expected
+    assert cache_module._audio_hash_for.cache_info().misses == 1
+
+    # A rewritten file is hashed again
+    audio.write_bytes(b"other")
+    os.utime(audio, ns=(0, 10**18))
+    assert cache_module._audio_hash(audio) == hashlib.md5(b"other").hexdigest()[:12]
+
+
+def test_non_strict_cache_keys_on_stat_without_reading(monkeypatch, tmp_path):
+    cache = CacheManager(tmp_path / "cache", strict=False)
+    audio = tmp_path / "audio.mp3"
+    audio.write_bytes(b"audio-bytes")
+    monkeypatch.setattr(cache_module, "_update_from_file", lambda h, path: pytest.fail("file was read"))
+
+    cache.cache_timestamp_rows(audio, "1:1", [(1, 1, 1, 0.0, 1.0)])
+    assert cache.get_cached_timestamp_rows(audio, "1:1") == [(1, 1, 1, 0.0, 1.0)]
+
+    os.utime(audio, ns=(0, 10**18))
+    assert cache.get_cached_timestamp_rows(audio, "1:1") is None
+
+
+def test_index_writes_are_batched_until_flush(monkeypatch, tmp_path):
+    cache = CacheManager(tmp_path / "cache")
+    writes = []
+    real_save = cache._save_index
+    monkeypatch.setattr(cache, "_save_index", lambda: writes.append(1) or real_save())
+
+    for i in range(1, 6):
+        cache.cache_alignment("en", f"1:{i}", {})
+    # Only the first change was written straight away
+    assert len(writes) == 1
+    on_disk = json.loads((tmp_path / "cache" / "index.json").read_text())
+    assert list(on_disk) == ["alignment:en_1:1"]
+
+    cache.flush()
+    cache.flush()
+    assert len(writes) == 2
+    on_disk = json.loads((tmp_path / "cache" / "index.json").read_text())
+    assert len(on_disk) == 5
+    assert CacheManager(tmp_path / "cache")._index == on_disk
+
+
+def test_exit_flush_is_registered_only_while_changes_are_pending(monkeypatch, tmp_path):
+    hooks = []
+    monkeypatch.setattr(cache_module.atexit, "register", hooks.append)
+    monkeypatch.setattr(cache_module.atexit, "unregister", hooks.remove)
+    cache = CacheManager(tmp_path / "cache")
+    assert hooks == []
+
+    # The first change is written straight away; the next one is deferred
+    cache.cache_alignment("en", "1:1", {})
+    assert hooks == []
+    cache.cache_alignment("en", "1:2", {})
+    cache.cache_alignment("en", "1:3", {})
+    assert hooks == [cache.flush]
+
+    cache.flush()
+    assert hooks == []
+
+
+def test_repeat_lookups_are_served_from_memory(monkeypatch, tmp_path):
+    cache = CacheManager(tmp_path / "cache")
+    audio = tmp_path / "audio.mp3"
+    audio.write_bytes(b"audio-bytes")
+    cache.cache_alignment("en", "1:1", {"1:1": {"segments": []}})
+    cache.cache_timestamp_rows(audio, "1:1", [(1, 1, 1, 0.0, 1.0)])
+
+    monkeypatch.setattr(cache_module, "read_json", lambda path: pytest.fail("read from disk"))
+    alignment = cache.get_cached_alignment("en", "1:1")
+    assert alignment == {"1:1": {"segments": []}}
+    assert cache.get_cached_timestamp_rows(audio, "1:1") == [(1, 1, 1, 0.0, 1.0)]
+
+    # Callers get their own copy
+    alignment["1:2"] = {}
+    assert "1:2" not in cache.get_cached_alignment("en", "1:1")
+
+
+def test_register_alignment_drops_remembered_contents(tmp_path):
+    cache = CacheManager(tmp_path / "cache")
+    path = cache.cache_alignment("en", "all", {"1:1": {"segments": []}})
+
+    # Rewritten in place (as rabtize does), then registered
+    path.write_text(json.dumps({"1:1": {"segments": [1]}}))
+    cache.register_alignment("en", "all", path)
+    assert cache.get_cached_alignment("en", "all") == {"1:1": {"segments": [1]}}
+
+
+def test_timestamps_are_sharded_and_legacy_files_still_hit(tmp_path):
+    cache = CacheManager(tmp_path / "cache")
+    audio = tmp_path / "audio.mp3"
+    audio.write_bytes(b"audio-bytes")
+    path = cache.cache_timestamp_rows(audio, "1:1", [(1, 1, 1, 0.0, 1.0)])
+    audio_hash = cache_module._audio_hash(audio)
+    assert path.parent == tmp_path / "cache" / "timestamps" / audio_hash[-2:]
+
+    # A cache written before sharding, read by a fresh manager
+    legacy = tmp_path / "cache" / "timestamps" / path.name
+    path.rename(legacy)
+    assert CacheManager(tmp_path / "cache").get_cached_timestamp_rows(audio, "1:1") == [(1, 1, 1, 0.0, 1.0)]
+
+
+def test_cache_writes_replace_files_atomically(monkeypatch, tmp_path):
+    cache = CacheManager(tmp_path / "cache")
+    path = cache.cache_alignment("en", "1:1", {"1:1": {"segments": []}})
+    cache.flush()
+    assert not list((tmp_path / "cache").rglob("*.tmp"))
+
+    # A write that dies before the rename leaves the previous file intact
+    def crash(src, dst):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(cache_module.os, "replace", crash)
+    with pytest.raises(KeyboardInterrupt):
+        cache.cache_alignment("en", "1:1", {"1:1": {"segments": [1, 2, 3]}})
+    assert json.loads(path.read_text()) == {"1:1": {"segments": []}}
+
+
+def test_prune_drops_expired_then_oldest_entries(tmp_path):
+    cache = CacheManager(tmp_path / "cache", max_age_days=30)
+    paths = [cache.cache_alignment("en", f"1:{i}", {"1:1": {"t": "x" * 100}}) for i in range(1, 5)]
+    size = paths[0].stat().st_size
+    # An entry from an older index, with an ISO timestamp
+    entry = cache._index["alignment:en_1:1"]
+    del entry["created_ns"]
+    entry["created"] = "2000-01-01T00:00:00"
+
+    cache.max_bytes = 2 * size
+    assert cache.prune() == 2
+
+    # The expired entry, then the oldest one over the budget
+    assert [p.exists() for p in paths] == [False, False, True, True]
+    assert cache.get_cached_alignment("en", "1:2") is None
+    assert sorted(cache._index) == ["alignment:en_1:3", "alignment:en_1:4"]
+    assert cache.prune() == 0
+
+
+def test_prune_runs_periodically_on_writes(monkeypatch, tmp_path):
+    monkeypatch.setattr(cache_module, "PRUNE_EVERY", 3)
+    cache = CacheManager(tmp_path / "cache", max_bytes=0)
+    for i in range(1, 4):
+        cache.cache_alignment("en", f"1:{i}", {})
+    assert cache._index == {}
+
+
+def test_get_cached_alignments_reads_many_keys(monkeypatch, tmp_path):
+    cache = CacheManager(tmp_path / "cache")
+    for tid in ("en", "fr"):
+        cache.cache_alignment(tid, "all", {"1:1": {"t": tid}})
+    fresh = CacheManager(tmp_path / "cache")
+
+    found = fresh.get_cached_alignments([("en", "all"), ("fr", "all"), ("de", "all"), ("en", "all")])
+    assert found == {("en", "all"): {"1:1": {"t": "en"}}, ("fr", "all"): {"1:1": {"t": "fr"}}, ("de", "all"): None}
+
+    # Hits are remembered for the single lookups that follow
+    monkeypatch.setattr(cache_module, "read_json", lambda path: pytest.fail("read from disk"))
+    assert fresh.get_cached_alignment("fr", "all") == {"1:1": {"t": "fr"}}
@@ -1,4 +1,8 @@
+import contextlib
+import io
 import json
+import subprocess
+import sys
 from types import SimpleNamespace
 
 import pytest
@@ -7,6 +11,8 @@ from quran_segmenter import cli
 
 
 class DummyResult:
+    __slots__ = ("verses", "warnings")
+
     def __init__(self, warnings=None):
         self.verses = {"1:1": SimpleNamespace(segments=[1, 2])}
         self.warnings = warnings or []
@@ -16,6 +22,8 @@ class DummyResult:
 
 
 class DummyPipeline:
+    __slots__ = ("calls", "cleanup_called", "jumlize", "rabtize")
+
     def __init__(self):
         self.calls = []
         self.cleanup_called = 0
@@ -98,6 +106,24 @@ def test_cmd_process_prints_output(monkeypatch, capsys):
     assert pipeline.cleanup_called == 1
 
 
+def test_cmd_process_prints_output_to_text_only_stdout(monkeypatch):
+    pipeline = DummyPipeline()
+    monkeypatch.setattr(cli, "QuranSegmenterPipeline", lambda: pipeline)
+    out = io.StringIO()  # no .buffer, like a notebook or redirect_stdout
+
+    args = SimpleNamespace(
+        audio="audio.mp3",
+        verses="1:1",
+        translation="en",
+        output=None,
+        no_cache=False,
+        start_server=False,
+    )
+    with contextlib.redirect_stdout(out):
+        cli.cmd_process(args)
+    assert json.loads(out.getvalue().split("Output:\n", 1)[1]) == DummyResult().to_dict()
+
+
 def test_cmd_status_with_translation(monkeypatch, capsys):
     pipeline = DummyPipeline()
     monkeypatch.setattr(cli, "QuranSegmenterPipeline", lambda: pipeline)
@@ -114,3 +140,13 @@ def test_cmd_clear_cache(monkeypatch, temp_config, capsys):
     cli.cmd_clear_cache(args)
     out = capsys.readouterr().out
     assert "Cache cleared" in out
+
+
+@pytest.mark.slow
+def test_cli_import_defers_pipeline():
+    code = (
+        "import sys, quran_segmenter.cli; "
+        "assert 'quran_segmenter.pipeline.orchestrator' not in sys.modules; "
+        "assert 'requests' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,60 @@
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+from quran_segmenter import colab_setup
+
+
+def test_log_prints_prefixed_line(capsys):
+    colab_setup._log("hello")
+    assert capsys.readouterr().out == f"{colab_setup.LOG_PREFIX} hello\n"
+
+
+def test_run_logs_command_and_runs_it(capsys, tmp_path):
+    colab_setup._run([sys.executable, "-c", "open('ran', 'w').close()"], cwd=tmp_path)
+    assert (tmp_path / "ran").exists()
+    assert capsys.readouterr().out.startswith(f"{colab_setup.LOG_PREFIX} {sys.executable} -c")
+
+
+def test_pin_go_ref_keeps_pinned_refs():
+    ref = "git.sr.ht/~user/tool/v3@v3.1.0"
+    assert colab_setup._pin_go_ref(ref) == ref
+    assert colab_setup._pin_go_ref("example.com/tool@main") is None
+
+
+def test_pin_go_ref_resolves_latest_through_the_proxy(monkeypatch):
+    urls = []
+
+    def fake_urlopen(url, timeout=None):
+        urls.append(url)
+        return io.BytesIO(b'{"Version": "v3.2.0"}')
+
+    monkeypatch.setattr(colab_setup.urllib.request, "urlopen", fake_urlopen)
+    assert colab_setup._pin_go_ref("example.com/Tool/v3@latest") == "example.com/Tool/v3@v3.2.0"
+    assert urls == [f"{colab_setup.GO_PROXY}/example.com/!tool/v3/@latest"]
+
+
+def test_pin_go_ref_gives_up_when_offline(monkeypatch, capsys):
+    def offline(url, timeout=None):
+        raise OSError("unreachable")
+
+    monkeypatch.setattr(colab_setup.urllib.request, "urlopen", offline)
+    assert colab_setup._pin_go_ref("example.com/tool@latest") is None
+    assert "will not be cached" in capsys.readouterr().out
+
+
+def test_ensure_go_removes_partial_tarball_on_failure(monkeypatch, tmp_path):
+    if Path("/usr/local/go/bin/go").exists():
+        pytest.skip("Go is installed, so _ensure_go would not download it")
+    monkeypatch.setattr(colab_setup, "_tar_extract_cmd", lambda archive: [sys.executable, "-c", "import sys; sys.stdin.buffer.read()"])
+
+    class BrokenDownload(io.BytesIO):
+        def read(self, *args):
+            raise OSError("connection reset")
+
+    monkeypatch.setattr(colab_setup.urllib.request, "urlopen", lambda url: BrokenDownload())
+    with pytest.raises(OSError):
+        colab_setup._ensure_go("https://example.com/go.tar.gz", tmp_path / "cache")
+    assert list((tmp_path / "cache").iterdir()) == []
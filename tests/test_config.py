@@ -1,9 +1,11 @@
+import os
 import json
+import shutil
 from pathlib import Path
 
 import pytest
 
-from quran_segmenter.config import Config
+from quran_segmenter.config import Config, TranslationConfig
 
 
 def test_register_translation_copies_and_detects_segmentation(temp_config, make_translation_file):
@@ -91,3 +93,105 @@ def test_update_translation_and_persistence(temp_config, make_translation_file,
     reloaded = Config.load_or_create(temp_config.config_path)
     assert reloaded.translations[tc.id].is_segmented
     assert reloaded.translations[tc.id].embeddings_path.endswith("emb.npz")
+
+
+def test_get_config_reuses_instance_until_file_changes(monkeypatch, tmp_path):
+    from quran_segmenter import config as config_module
+
+    config_path = tmp_path / "data" / "config.json"
+    monkeypatch.setenv("QURAN_SEGMENTER_CONFIG", str(config_path))
+    monkeypatch.setattr(config_module, "_CONFIG_CACHE", {})
+
+    first = config_module.get_config()
+    assert config_module.get_config() is first
+
+    config_path.write_text(config_path.read_text())
+    os.utime(config_path, ns=(0, 0))
+    assert config_module.get_config() is not first
+
+
+def test_batched_save_writes_once(monkeypatch, temp_config, make_translation_file):
+    source = make_translation_file(segmented=False)
+    writes = []
+    original_save = Config.save
+
+    def _counting_save(self):
+        if not self._defer_save:
+            writes.append(1)
+        original_save(self)
+
+    monkeypatch.setattr(Config, "save", _counting_save)
+
+    with temp_config.batched_save():
+        temp_config.register_translation("en-test", "Test", "en", source)
+        temp_config.update_translation_status("en-test", is_segmented=True)
+        assert not writes
+
+    assert len(writes) == 1
+    reloaded = Config.load_or_create(temp_config.config_path)
+    assert reloaded.translations["en-test"].is_segmented
+
+
+def test_translation_config_from_dict_roundtrip():
+    data = {
+        "id": "en",
+        "name": "English",
+        "language_code": "en",
+        "file_path": "/tmp/en.json",
+    }
+    tc = TranslationConfig.from_dict(data)
+
+    assert tc == TranslationConfig(id="en", name="English", language_code="en", file_path="/tmp/en.json")
+    assert TranslationConfig.from_dict(tc.to_dict()) == tc
+
+
+def test_save_skips_unchanged_payload(temp_config):
+    temp_config.save()
+    os.utime(temp_config.config_path, ns=(0, 0))
+
+    temp_config.save()
+    assert temp_config.config_path.stat().st_mtime_ns == 0
+
+    temp_config.spans_embeddings_generated = True
+    temp_config.save()
+    assert temp_config.config_path.stat().st_mtime_ns != 0
+
+
+def test_reloaded_config_skips_identical_save(temp_config):
+    temp_config.save()
+    config = Config.load_or_create(temp_config.data_dir, base_dir=temp_config.base_dir)
+    os.utime(config.config_path, ns=(0, 0))
+
+    config.save()
+    assert config.config_path.stat().st_mtime_ns == 0
+
+
+def test_translation_config_dict_cache_invalidated_on_change():
+    tc = TranslationConfig(id="en", name="English", language_code="en", file_path="/tmp/en.json")
+    first = tc._as_dict()
+    assert tc._as_dict() is first
+
+    tc.embeddings_path = "/tmp/en.npz"
+    assert tc._as_dict() is not first
+    assert tc.to_dict()["embeddings_path"] == "/tmp/en.npz"
+
+
+def test_new_config_recreates_removed_dirs(tmp_path):
+    data_dir = tmp_path / "data"
+    Config(data_dir=data_dir, base_dir=tmp_path)
+    shutil.rmtree(data_dir)
+
+    cfg = Config(data_dir=data_dir, base_dir=tmp_path)
+    cfg.save()
+
+    assert cfg.cache_dir.is_dir()
+    assert cfg.translations_dir.is_dir()
+
+
+def test_strict_cache_option_persists(temp_config):
+    assert temp_config.lafzize.strict_cache
+    temp_config.lafzize.strict_cache = False
+    temp_config.save()
+
+    reloaded = Config.load_or_create(temp_config.config_path)
+    assert reloaded.lafzize.strict_cache is False
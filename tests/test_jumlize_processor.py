@@ -1,9 +1,12 @@
 import shutil
+import sys
+import time
 from pathlib import Path
 
 import pytest
 
 from quran_segmenter.exceptions import JumlizeError
+from quran_segmenter.pipeline import jumlize as jumlize_module
 from quran_segmenter.pipeline.jumlize import JumlizeProcessor
 from quran_segmenter.utils.cache import CacheManager
 
@@ -59,15 +62,127 @@ def test_jumlize_segment_runs_subprocess(monkeypatch, temp_config, make_translat
     processor = JumlizeProcessor(temp_config)
     temp_config.jumlize.api_key = "key"
 
-    class DummyCompleted:
-        returncode = 0
-        stdout = "ok"
-        stderr = ""
-
-    monkeypatch.setattr("quran_segmenter.pipeline.jumlize.subprocess.run", lambda *args, **kwargs: DummyCompleted())
+    monkeypatch.setattr("quran_segmenter.pipeline.jumlize._run_streaming", lambda *args, **kwargs: (0, ""))
     monkeypatch.setattr(processor, "_validate_segmentation", lambda path: True)
     # Inject missing method expected by code
     temp_config.update_translation_status = lambda *args, **kwargs: None
 
     output = processor.segment(tc.id, api_key=None, force=True)
     assert Path(output).exists()
+
+
+def test_validate_segmentation_checks_every_verse(temp_config, tmp_path):
+    processor = JumlizeProcessor(temp_config)
+    good = tmp_path / "good.json"
+    good.write_text('{"1:1": {"t": "a", "segments": []}, "1:2": {"t": "b", "segments": []}}')
+    partial = tmp_path / "partial.json"
+    partial.write_text('{"1:1": {"t": "a", "segments": []}, "1:2": {"t": "b"}}')
+    broken = tmp_path / "broken.json"
+    broken.write_text('{"1:1": ')
+
+    assert processor._validate_segmentation(good)
+    assert not processor._validate_segmentation(partial)
+    assert not processor._validate_segmentation(broken)
+
+
+def test_validate_segmentation_writes_marker_and_reuses_it(monkeypatch, temp_config):
+    processor = JumlizeProcessor(temp_config)
+    path = temp_config.translations_dir / "seg.json"
+    path.write_text('{"1:1": {"t": "a", "segments": []}}')
+
+    assert processor._validate_segmentation(path)
+    # The marker lives in the cache, not next to the file
+    assert not list(temp_config.translations_dir.glob("*.validated"))
+    assert len(list((temp_config.cache_dir / "validated").iterdir())) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("file should not be re-parsed")
+
+    monkeypatch.setattr("quran_segmenter.pipeline.jumlize.iter_items", fail)
+    jumlize_module._segmentation_scan.cache_clear()
+    assert processor._validate_segmentation(path)
+
+    # Editing the file invalidates the marker
+    path.write_text('{"1:1": {"t": "a"}, "1:2": {"t": "b"}}')
+    monkeypatch.undo()
+    assert not processor._validate_segmentation(path)
+
+
+def test_files_outside_data_dir_get_no_marker(temp_config, tmp_path):
+    processor = JumlizeProcessor(temp_config)
+    path = tmp_path / "user_seg.json"
+    path.write_text('{"1:1": {"t": "a", "segments": []}}')
+
+    assert processor._validate_segmentation(path)
+    assert not (temp_config.cache_dir / "validated").exists()
+
+
+@pytest.mark.slow
+def test_run_streaming_forwards_output_and_keeps_stderr_tail(caplog):
+    cmd = [sys.executable, "-c", "import sys; print('hello'); print('boom', file=sys.stderr); sys.exit(3)"]
+    with caplog.at_level("DEBUG", logger="quran_segmenter.pipeline.jumlize"):
+        returncode, tail = jumlize_module._run_streaming(cmd, ".", 30, time.monotonic() + 30)
+
+    assert returncode == 3
+    assert tail == "boom"
+    assert "jumlize: hello" in caplog.text
+
+
+@pytest.mark.slow
+def test_run_streaming_terminates_idle_process():
+    cmd = [sys.executable, "-c", "import time; time.sleep(30)"]
+    started = time.monotonic()
+    with pytest.raises(jumlize_module._IdleTimeout):
+        jumlize_module._run_streaming(cmd, ".", 0.5, time.monotonic() + 30)
+    assert time.monotonic() - started < 10
+
+
+def test_segmentation_status_reads_counts_from_marker(monkeypatch, temp_config, make_translation_file):
+    source = make_translation_file(segmented=True)
+    tc = temp_config.register_translation("en-test", "Test", "en", source)
+    processor = JumlizeProcessor(temp_config)
+
+    first = processor.get_segmentation_status(tc.id)
+    assert first["missing_verses"] == 0
+
+    # A later process: nothing cached in memory, so only the marker can answer
+    jumlize_module._segmentation_scan.cache_clear()
+    monkeypatch.setattr("quran_segmenter.pipeline.jumlize.iter_items", lambda path: 1 / 0)
+    again = processor.get_segmentation_status(tc.id)
+    assert again["total_verses"] == first["total_verses"]
+    assert again["completion_pct"] == 100.0
+    assert processor.is_segmented(tc.id)
+
+
+def test_jumlize_segment_retries_after_rate_limit(monkeypatch, temp_config, make_translation_file):
+    source = make_translation_file(segmented=False)
+    tc = temp_config.register_translation("en-test", "Test", "en", source)
+    processor = JumlizeProcessor(temp_config)
+    temp_config.jumlize.api_key = "key"
+    temp_config.jumlize.max_retries = 2
+
+    outcomes = [(1, "Error 429: RESOURCE_EXHAUSTED"), (0, "")]
+    monkeypatch.setattr("quran_segmenter.pipeline.jumlize._run_streaming", lambda *args, **kwargs: outcomes.pop(0))
+    monkeypatch.setattr("quran_segmenter.pipeline.jumlize.time.sleep", lambda seconds: None)
+    monkeypatch.setattr(processor, "_validate_segmentation", lambda path: True)
+
+    processor.segment(tc.id, force=True)
+    assert outcomes == []
+
+    outcomes[:] = [(1, "invalid API key")]
+    with pytest.raises(JumlizeError):
+        processor.segment(tc.id, force=True)
+
+
+def test_jumlize_segment_reports_missing_verses(monkeypatch, temp_config, make_translation_file):
+    source = make_translation_file(segmented=False)
+    tc = temp_config.register_translation("en-test", "Test", "en", source)
+    processor = JumlizeProcessor(temp_config)
+    temp_config.jumlize.api_key = "key"
+    monkeypatch.setattr("quran_segmenter.pipeline.jumlize._run_streaming", lambda *args, **kwargs: (0, ""))
+
+    with pytest.raises(JumlizeError) as excinfo:
+        processor.segment(tc.id, force=True)
+
+    assert excinfo.value.missing_verses == ["1:1", "1:2"]
+    assert "2 verses have no segments (1:1, 1:2)" in str(excinfo.value)
@@ -1,11 +1,14 @@
+import io
+from email.parser import BytesParser
 from pathlib import Path
 
 import pytest
+from urllib3.exceptions import ProtocolError
 
 from quran_segmenter.models import VerseRange
-from quran_segmenter.pipeline.lafzize import LafzizeProcessor
+from quran_segmenter.pipeline.lafzize import LafzizeProcessor, _MultipartFileStream, _make_session
 from quran_segmenter.utils.cache import CacheManager
-from quran_segmenter.exceptions import ServerNotRunningError
+from quran_segmenter.exceptions import LafzizeError, ServerNotRunningError
 
 
 def test_lafzize_processor_returns_cached_timestamps(temp_config, tmp_path):
@@ -38,16 +41,22 @@ def test_lafzize_processor_calls_api_and_caches(monkeypatch, temp_config, tmp_pa
 
     class DummyResponse:
         status_code = 200
+        raw = io.BytesIO(b'[{"type": "word", "key": "1:1:1", "start": 0, "end": 1000}]')
 
-        def json(self):
-            return [{"type": "word", "key": "1:1:1", "start": 0, "end": 1000}]
+        def close(self):
+            pass
 
-    monkeypatch.setattr("quran_segmenter.pipeline.lafzize.requests.post", lambda *args, **kwargs: DummyResponse())
+    monkeypatch.setattr(processor.session, "post", lambda *args, **kwargs: DummyResponse())
 
     result = processor.process(audio, vr, use_cache=True, start_server=True)
     assert len(result) == 1
-    cached = cache.get_cached_timestamps(audio, str(vr))
-    assert cached is not None
+    cached = cache.get_cached_timestamp_rows(audio, str(vr))
+    assert cached == [(1, 1, 1, 0.0, 1.0)]
+
+    # A second call is served from the row cache
+    processor.session.post = lambda *args, **kwargs: pytest.fail("should hit the cache")
+    again = processor.process(audio, vr, use_cache=True)
+    assert again == result
 
 
 def test_lafzize_processor_errors_when_server_not_running(temp_config, tmp_path):
@@ -62,3 +71,86 @@ def test_lafzize_processor_errors_when_server_not_running(temp_config, tmp_path)
 
     with pytest.raises(ServerNotRunningError):
         processor.process(audio, vr, use_cache=False, start_server=False)
+
+
+class _ResetStream(io.BytesIO):
+    def read(self, *args):
+        raise ProtocolError("Connection broken", ConnectionResetError(104, "reset"))
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        io.BytesIO(b'[{"type": "word", "key": "1:1:1", "sta'),
+        io.BytesIO(b'[{"type": "word", "start": 0, "end": 1000}]'),
+        _ResetStream(),
+    ],
+    ids=["truncated", "missing-key", "connection-reset"],
+)
+def test_lafzize_processor_wraps_broken_responses(monkeypatch, temp_config, tmp_path, raw):
+    processor = LafzizeProcessor(temp_config, CacheManager(temp_config.cache_dir))
+    audio = tmp_path / "audio.mp3"
+    audio.write_bytes(b"audio")
+    processor.server.is_running = lambda: True
+
+    class DummyResponse:
+        status_code = 200
+
+        def close(self):
+            pass
+
+    DummyResponse.raw = raw
+    monkeypatch.setattr(processor.session, "post", lambda *args, **kwargs: DummyResponse())
+
+    with pytest.raises(LafzizeError):
+        processor.process(audio, VerseRange.parse("1:1"), use_cache=False, start_server=False)
+
+
+def test_multipart_stream_encodes_fields_and_file(tmp_path):
+    audio = tmp_path / "audio.mp3"
+    audio.write_bytes(b"\x00\x01audio" * 1000)
+    body = _MultipartFileStream(
+        fields=[("segments", "basmalah"), ("segments", "1:1,1:7")],
+        file_field="audio",
+        file_path=audio,
+        content_type="audio/mpeg",
+    )
+
+    chunks = []
+    while True:
+        chunk = body.read(8192)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    payload = b"".join(chunks)
+    assert len(payload) == len(body)
+
+    message = BytesParser().parsebytes(
+        f"Content-Type: {body.content_type}\r\n\r\n".encode() + payload
+    )
+    parts = message.get_payload()
+    assert [p.get_payload() for p in parts[:2]] == ["basmalah", "1:1,1:7"]
+    assert parts[2].get_filename() == "audio.mp3"
+    assert parts[2].get_payload(decode=True) == audio.read_bytes()
+
+
+def test_multipart_stream_rewinds_for_retries(tmp_path):
+    audio = tmp_path / "audio.mp3"
+    audio.write_bytes(b"audio" * 100)
+    body = _MultipartFileStream([("segments", "1:1")], "audio", audio, "audio/mpeg")
+
+    def drain():
+        return b"".join(iter(lambda: body.read(8192), b""))
+
+    first = drain()
+    assert body.tell() == len(body)
+    body.seek(0)
+    assert body.tell() == 0
+    assert drain() == first
+
+
+def test_session_does_not_retry_read_timeouts():
+    retry = _make_session().get_adapter("http://127.0.0.1").max_retries
+    assert retry.read == 0
+    assert retry.other == 0
+    assert retry.total == 3
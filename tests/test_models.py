@@ -3,10 +3,12 @@ from pathlib import Path
 
 from quran_segmenter.models import (
     ProcessingResult,
+    QuranMetadata,
     Segment,
     VerseRange,
     VerseSegments,
     WordTimestamp,
+    WordTimestampBatch,
 )
 
 
@@ -17,6 +19,7 @@ def test_verse_range_formatting_and_segments():
     assert vr.to_lafzize_format() == "taawwudh,basmalah,2:1,2:3"
     assert vr.to_lafzize_segments() == ["taawwudh", "basmalah", "2:1,2:3"]
     assert vr.verse_keys() == ["2:1", "2:2", "2:3"]
+    assert list(vr.verse_tuples()) == [(2, 1, "2:1"), (2, 2, "2:2"), (2, 3, "2:3")]
 
 
 def test_verse_range_parse_and_from_surah():
@@ -59,3 +62,51 @@ def test_segment_and_result_serialization(tmp_path):
 
     saved = json.loads(output_path.read_text())
     assert saved == {"1:1": [segment.to_dict()]}
+
+
+def test_verse_segments_to_dict_limit():
+    segments = [Segment(start=float(i), end=float(i + 1), arabic="a", translation="t") for i in range(5)]
+    vs = VerseSegments(verse_key="1:1", segments=segments)
+    assert vs.to_dict(limit=2) == [s.to_dict() for s in segments[:2]]
+    assert len(vs.to_dict()) == 5
+
+
+def test_processing_result_save_matches_indented_dump(tmp_path):
+    seg = Segment(start=0.1, end=0.2, arabic="ا ب", translation="line\nbreak")
+    result = ProcessingResult(
+        verse_range=VerseRange.parse("1:1-2"),
+        verses={
+            "1:1": VerseSegments(verse_key="1:1", segments=[seg, seg]),
+            "1:2": VerseSegments(verse_key="1:2", segments=[]),
+        },
+    )
+    path = tmp_path / "out.json"
+    result.save(path)
+    assert path.read_text(encoding="utf-8") == json.dumps(result.to_dict(), indent=2, ensure_ascii=False)
+
+    ProcessingResult(verse_range=VerseRange.parse("1:1")).save(path)
+    assert json.loads(path.read_text()) == {}
+
+
+def test_quran_metadata_from_data_both_formats():
+    verse_keyed = QuranMetadata.from_data({"2:1": {}, "2:7": {}, "2:3": {}, "3:1": {}})
+    assert verse_keyed.surah_verse_counts == {2: 7, 3: 1}
+
+    surah_keyed = QuranMetadata.from_data({"1": {"verses": 7}, "2": {"ayahs": 286}})
+    assert surah_keyed.surah_verse_counts == {1: 7, 2: 286}
+
+    assert QuranMetadata.from_data({}).surah_verse_counts == {}
+
+
+def test_word_timestamp_batch_matches_objects():
+    items = [
+        {"type": "word", "key": "2:255:1", "start": 100, "end": 600},
+        {"type": "pause", "key": "x", "start": 600, "end": 700},
+        {"type": "word", "key": "2:255:2", "start": 700, "end": 1250},
+    ]
+    batch = WordTimestampBatch.from_lafzize(items)
+
+    assert len(batch) == 2
+    assert list(batch) == [WordTimestamp.from_lafzize_response(item) for item in items if item["type"] == "word"]
+    assert batch[1].key == (2, 255, 2) and batch[1].end_time == 1.25
+    assert WordTimestampBatch.from_rows(batch.columns()) == batch
@@ -1,22 +1,32 @@
+import threading
+import time
 from pathlib import Path
 
 import pytest
 
 from quran_segmenter.models import ProcessingResult, VerseSegments, WordTimestamp
+from quran_segmenter.pipeline import orchestrator as orchestrator_module
 from quran_segmenter.pipeline.orchestrator import QuranSegmenterPipeline
 from quran_segmenter.exceptions import TranslationNotPreparedError
 
 
+# Stub results, shared by every call (the pipeline only reads them)
+_STUB_TIMESTAMPS = (
+    WordTimestamp(surah=1, ayah=1, word_index=1, start_time=0.0, end_time=0.5),
+    WordTimestamp(surah=1, ayah=1, word_index=2, start_time=0.5, end_time=1.0),
+)
+_STUB_ALIGNMENT = {"1:1": {"segments": [{"word_range": {"start": 1, "end": 2}, "t": "hello"}]}}
+
+
 class _StubLafzize:
+    __slots__ = ("calls",)
+
     def __init__(self):
         self.calls = []
 
     def process(self, audio_path, verse_range, use_cache=True, start_server=True):
         self.calls.append((audio_path, verse_range, use_cache, start_server))
-        return [
-            WordTimestamp(surah=1, ayah=1, word_index=1, start_time=0.0, end_time=0.5),
-            WordTimestamp(surah=1, ayah=1, word_index=2, start_time=0.5, end_time=1.0),
-        ]
+        return list(_STUB_TIMESTAMPS)
 
     def stop_server(self):
         self.calls.append(("stop",))
@@ -27,12 +37,12 @@ class _StubRabtize:
         self.ready = ready
         self.align_calls = []
 
-    def is_ready(self, translation_id):
+    def is_ready(self, translation_id, exists_cache=None):
         return (self.ready, [] if self.ready else ["missing"])
 
     def align(self, translation_id, verse_range=None, use_cache=True):
         self.align_calls.append((translation_id, verse_range, use_cache))
-        return {"1:1": {"segments": [{"word_range": {"start": 1, "end": 2}, "t": "hello"}]}}
+        return _STUB_ALIGNMENT
 
 
 class _StubAssembler:
@@ -63,9 +73,9 @@ def _prep_ready_translation(cfg):
 def test_process_calls_components(monkeypatch, temp_config, tmp_path):
     _prep_ready_translation(temp_config)
     pipeline = QuranSegmenterPipeline(config=temp_config)
-    pipeline._lafzize = _StubLafzize()
-    pipeline._rabtize = _StubRabtize(ready=True)
-    pipeline._assembler = _StubAssembler()
+    pipeline.lafzize = _StubLafzize()
+    pipeline.rabtize = _StubRabtize(ready=True)
+    pipeline.assembler = _StubAssembler()
 
     audio = tmp_path / "audio.mp3"
     audio.write_bytes(b"audio")
@@ -81,7 +91,7 @@ def test_process_calls_components(monkeypatch, temp_config, tmp_path):
 def test_process_raises_when_not_ready(monkeypatch, temp_config, tmp_path):
     _prep_ready_translation(temp_config)
     pipeline = QuranSegmenterPipeline(config=temp_config)
-    pipeline._rabtize = _StubRabtize(ready=False)
+    pipeline.rabtize = _StubRabtize(ready=False)
 
     audio = tmp_path / "audio.mp3"
     audio.write_bytes(b"audio")
@@ -94,9 +104,184 @@ def test_list_translations_reports_status(monkeypatch, temp_config, make_transla
     source = make_translation_file(segmented=True)
     tc = temp_config.register_translation("en", "Test", "en", source)
     pipeline = QuranSegmenterPipeline(config=temp_config)
-    pipeline._rabtize = _StubRabtize(ready=True)
+    pipeline.rabtize = _StubRabtize(ready=True)
 
     translations = pipeline.list_translations()
     entry = translations[0]
     assert entry["id"] == tc.id
     assert entry["ready_for_processing"]
+
+
+def test_process_runs_lafzize_and_rabtize_concurrently(temp_config, tmp_path):
+    _prep_ready_translation(temp_config)
+    pipeline = QuranSegmenterPipeline(config=temp_config)
+    aligning = threading.Event()
+
+    class _WaitingLafzize(_StubLafzize):
+        def process(self, *args, **kwargs):
+            # Only completes if rabtize is running at the same time
+            assert aligning.wait(timeout=5)
+            return super().process(*args, **kwargs)
+
+    class _SignallingRabtize(_StubRabtize):
+        def align(self, *args, **kwargs):
+            aligning.set()
+            return super().align(*args, **kwargs)
+
+    pipeline.lafzize = _WaitingLafzize()
+    pipeline.rabtize = _SignallingRabtize(ready=True)
+    pipeline.assembler = _StubAssembler()
+
+    audio = tmp_path / "audio.mp3"
+    audio.write_bytes(b"audio")
+
+    pipeline.process(audio, "1:1", "en", start_server=False)
+    verse_range, timestamps, alignment = pipeline.assembler.calls[0]
+    assert len(timestamps) == 2
+    assert "1:1" in alignment
+
+
+def test_process_batch_preserves_order_and_isolates_failures(temp_config, tmp_path):
+    _prep_ready_translation(temp_config)
+    pipeline = QuranSegmenterPipeline(config=temp_config)
+    pipeline.lafzize = _StubLafzize()
+    pipeline.rabtize = _StubRabtize(ready=True)
+    pipeline.assembler = _StubAssembler()
+
+    good = tmp_path / "good.mp3"
+    good.write_bytes(b"audio")
+    bad = tmp_path / "bad.mp3"
+    bad.write_bytes(b"audio")
+
+    original = pipeline.assembler.assemble
+
+    def assemble(verse_range, timestamps, alignment):
+        if verse_range.start_verse == 2:
+            raise RuntimeError("boom")
+        return original(verse_range, timestamps, alignment)
+
+    pipeline.assembler.assemble = assemble
+
+    results = pipeline.process_batch(
+        [(good, "1:1", "en"), (bad, "1:2", "en"), (good, "1:3", "en")],
+        max_concurrency=2,
+        start_server=False,
+    )
+
+    assert [r.verse_range.start_verse for r in results] == [1, 2, 3]
+    assert results[1].errors == ["boom"]
+    assert not results[0].errors and not results[2].errors
+    assert len(pipeline.lafzize.calls) == 3
+
+
+def test_process_batch_validates_before_running(temp_config, tmp_path):
+    _prep_ready_translation(temp_config)
+    pipeline = QuranSegmenterPipeline(config=temp_config)
+    pipeline.lafzize = _StubLafzize()
+    pipeline.rabtize = _StubRabtize(ready=True)
+
+    audio = tmp_path / "audio.mp3"
+    audio.write_bytes(b"audio")
+
+    with pytest.raises(FileNotFoundError):
+        pipeline.process_batch([(audio, "1:1", "en"), (tmp_path / "missing.mp3", "1:1", "en")])
+    assert pipeline.lafzize.calls == []
+
+
+def test_readiness_is_memoized_until_translation_changes(temp_config, tmp_path):
+    _prep_ready_translation(temp_config)
+    pipeline = QuranSegmenterPipeline(config=temp_config)
+    stub = _StubRabtize(ready=True)
+    calls = []
+    original = stub.is_ready
+    stub.is_ready = lambda tid, exists_cache=None: calls.append(tid) or original(tid, exists_cache)
+    pipeline.rabtize = stub
+
+    pipeline.list_translations()
+    pipeline.list_translations()
+    assert calls == ["en"]
+
+    other = temp_config.embeddings_dir / "en-v2.npz"
+    other.write_text("segments")
+    temp_config.update_translation_status("en", embeddings_path=other)
+    entry = pipeline.list_translations()[0]
+    assert calls == ["en", "en"]
+    assert entry["has_embeddings"]
+
+
+def test_lazy_components_are_built_once_under_concurrency(monkeypatch, temp_config):
+    built = []
+
+    class _SlowAssembler:
+        def __init__(self, config):
+            time.sleep(0.05)
+            built.append(self)
+
+    monkeypatch.setattr("quran_segmenter.pipeline.orchestrator.SegmentAssembler", _SlowAssembler)
+    pipeline = QuranSegmenterPipeline(config=temp_config)
+
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(pipeline.assembler)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(built) == 1
+    assert all(a is built[0] for a in seen)
+
+
+def test_verse_specs_are_parsed_once_per_string(monkeypatch, temp_config):
+    pipeline = QuranSegmenterPipeline(config=temp_config)
+    calls = []
+    real = orchestrator_module.parse_verse_spec
+    monkeypatch.setattr(
+        orchestrator_module, "parse_verse_spec",
+        lambda spec, metadata=None: calls.append(spec) or real(spec, metadata),
+    )
+
+    first = pipeline._parse_verses("basmalah+1:1-3")
+    second = pipeline._parse_verses(" basmalah+1:1-3 ")
+    assert calls == ["basmalah+1:1-3"]
+    assert first == second and first is not second
+    assert second.include_basmalah and second.end_verse == 3
+
+
+def test_prepare_translation_is_a_no_op_when_already_prepared(monkeypatch, temp_config):
+    _prep_ready_translation(temp_config)
+    pipeline = QuranSegmenterPipeline(config=temp_config)
+    monkeypatch.setattr(temp_config, "save", lambda: pytest.fail("config should not be rewritten"))
+    calls = []
+    monkeypatch.setattr(temp_config, "get_translation", _counting(temp_config.get_translation, calls))
+
+    status = pipeline.prepare_translation("en", skip_segmentation=True, skip_embeddings=True)
+
+    assert status["steps"]["segment_embeddings"] == "already_done"
+    assert status["ready"]
+    assert calls == ["en"]
+
+
+def _counting(fn, calls):
+    def wrapper(translation_id):
+        calls.append(translation_id)
+        return fn(translation_id)
+    return wrapper
+
+
+def test_process_resolves_relative_audio_before_running(monkeypatch, temp_config, tmp_path):
+    _prep_ready_translation(temp_config)
+    pipeline = QuranSegmenterPipeline(config=temp_config)
+    pipeline.lafzize = _StubLafzize()
+    pipeline.rabtize = _StubRabtize(ready=True)
+    pipeline.assembler = _StubAssembler()
+    (tmp_path / "audio.mp3").write_bytes(b"audio")
+    monkeypatch.chdir(tmp_path)
+
+    pipeline.process("audio.mp3", "1:1", "en", start_server=False)
+    pipeline.process_batch([("audio.mp3", "1:1", "en")], start_server=False)
+    assert [call[0] for call in pipeline.lafzize.calls] == [tmp_path / "audio.mp3"] * 2
+
+
+def test_pipeline_cache_follows_strict_cache_option(temp_config):
+    temp_config.lafzize.strict_cache = False
+    assert QuranSegmenterPipeline(temp_config).cache.strict is False
@@ -0,0 +1,54 @@
+from quran_segmenter.utils import progress
+from quran_segmenter.utils.progress import wrap_iterable
+
+
+def test_wrap_iterable_streams_generators(capsys):
+    produced = []
+
+    def gen():
+        for i in range(3):
+            produced.append(i)
+            yield i
+
+    wrapped = wrap_iterable(gen(), desc="Embedding")
+    assert next(wrapped) == 0
+    # Items are passed through as produced, not collected up front
+    assert produced == [0]
+    assert list(wrapped) == [1, 2]
+
+    out = capsys.readouterr().out
+    assert "Embedding: 3 items [" in out
+
+
+def test_wrap_iterable_shows_bar_for_sized_iterables(capsys):
+    assert list(wrap_iterable([1, 2], desc="Verses")) == [1, 2]
+    assert "2/2 items (100.0%)" in capsys.readouterr().out
+
+
+def test_update_reads_the_clock_less_often_in_tight_loops(monkeypatch):
+    reads = []
+    real = progress.time.monotonic
+    monkeypatch.setattr(progress.time, "monotonic", lambda: reads.append(1) or real())
+    reporter = progress.ProgressReporter(100_000)
+    reads.clear()
+
+    for _ in range(99_999):
+        reporter.update()
+    assert len(reads) < 99_999 // 8
+
+
+def test_update_reports_promptly_when_a_fast_loop_slows_down(monkeypatch, capsys):
+    clock = [0.0]
+    monkeypatch.setattr(progress.time, "monotonic", lambda: clock[0])
+    reporter = progress.ProgressReporter(10_000, desc="Slow")
+
+    # Fast stretch widens the stride to its maximum
+    for _ in range(1000):
+        reporter.update()
+    capsys.readouterr()
+
+    # Each update now takes a second; output must follow within a few items
+    for _ in range(progress.MAX_CLOCK_MASK + 1):
+        clock[0] += 1.0
+        reporter.update()
+    assert "Slow:" in capsys.readouterr().out
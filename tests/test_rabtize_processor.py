@@ -1,10 +1,14 @@
+import io
 import json
+import os
+import sys
 from pathlib import Path
 
 import pytest
 
 from quran_segmenter.exceptions import TranslationNotPreparedError, RabtizeError
 from quran_segmenter.models import VerseRange
+from quran_segmenter.pipeline import rabtize as rabtize_module
 from quran_segmenter.pipeline.rabtize import RabtizeProcessor
 from quran_segmenter.utils.cache import CacheManager
 
@@ -83,6 +87,71 @@ def test_align_runs_and_caches(monkeypatch, temp_config, make_translation_file):
     alignment2 = rp.align(tc.id, verse_range=vr, use_cache=True)
     assert alignment2 == alignment
     assert len(writes) == 1
+    # rabtize output is written next to the cache slot, then renamed into it
+    slot = rp.cache.get_alignment_path(tc.id, "all")
+    assert writes[0].parent == slot.parent and writes[0] != slot
+    assert slot.exists() and not writes[0].exists()
+
+
+def test_align_without_cache_keeps_only_requested_verses(monkeypatch, temp_config, make_translation_file):
+    source = make_translation_file(segmented=True)
+    tc = temp_config.register_translation("en-test", "Test", "en", source)
+    temp_config.update_translation(tc.id, is_segmented=True)
+    temp_config.spans_embeddings_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_config.spans_embeddings_path.write_text("spans")
+    emb = temp_config.embeddings_dir / f"{tc.id}.npz"
+    emb.write_text("segments")
+    temp_config.update_translation(tc.id, embeddings_path=emb)
+    rp = RabtizeProcessor(temp_config, cache=CacheManager(temp_config.cache_dir))
+
+    def _fake_run(args, desc, timeout=0):
+        Path(args[-1]).write_text(json.dumps({f"1:{i}": {"segments": [i]} for i in range(1, 8)}))
+        return ""
+
+    monkeypatch.setattr(rp, "_run_rabtize_with_progress", _fake_run)
+
+    alignment = rp.align(tc.id, verse_range=VerseRange.parse("1:2-3"), use_cache=False)
+    assert alignment == {"1:2": {"segments": [2]}, "1:3": {"segments": [3]}}
+    assert tc.id not in rp._full_alignments
+
+
+def test_align_many_checks_every_translation_before_running(monkeypatch, temp_config, make_translation_file):
+    temp_config.spans_embeddings_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_config.spans_embeddings_path.write_text("spans")
+    for tid in ("en-a", "en-b"):
+        source = make_translation_file(segmented=True, name=tid)
+        temp_config.register_translation(tid, "Test", "en", source)
+        temp_config.update_translation(tid, is_segmented=True)
+    emb = temp_config.embeddings_dir / "en-a.npz"
+    emb.write_text("segments")
+    temp_config.update_translation("en-a", embeddings_path=emb)
+    rp = RabtizeProcessor(temp_config, cache=CacheManager(temp_config.cache_dir))
+    monkeypatch.setattr(rp, "align", lambda *a, **k: pytest.fail("should validate first"))
+
+    with pytest.raises(TranslationNotPreparedError, match="en-b"):
+        rp.align_many(["en-a", "en-b"])
+
+    monkeypatch.setattr(rp, "align", lambda tid, verse_range=None, use_cache=True: {"id": tid})
+    assert rp.align_many(["en-a", "en-a"]) == {"en-a": {"id": "en-a"}}
+
+
+def test_align_many_reads_cold_full_alignments_up_front(monkeypatch, temp_config, make_translation_file):
+    temp_config.spans_embeddings_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_config.spans_embeddings_path.write_text("spans")
+    for tid in ("en-a", "en-b"):
+        source = make_translation_file(segmented=True, name=tid)
+        temp_config.register_translation(tid, "Test", "en", source)
+        emb = temp_config.embeddings_dir / f"{tid}.npz"
+        emb.write_text("segments")
+        temp_config.update_translation(tid, is_segmented=True, embeddings_path=emb)
+    rp = RabtizeProcessor(temp_config, cache=CacheManager(temp_config.cache_dir))
+    rp._full_alignments["en-a"] = (rp._alignment_memo_key(temp_config.get_translation("en-a")), {})
+    bulk = []
+    monkeypatch.setattr(rp.cache, "get_cached_alignments", bulk.append)
+    monkeypatch.setattr(rp, "align", lambda tid, verse_range=None, use_cache=True: {})
+
+    rp.align_many(["en-a", "en-b"])
+    assert bulk == [[("en-b", "all")]]
 
 
 def test_align_raises_when_not_prepared(temp_config, make_translation_file):
@@ -92,3 +161,259 @@ def test_align_raises_when_not_prepared(temp_config, make_translation_file):
 
     with pytest.raises(TranslationNotPreparedError):
         rp.align(tc.id, verse_range=VerseRange.parse("1:1"))
+
+
+def test_run_rabtize_keeps_only_output_tail(monkeypatch, temp_config):
+    rp = RabtizeProcessor(temp_config, cache=CacheManager(temp_config.cache_dir))
+
+    class _FakeProcess:
+        returncode = 0
+
+        def __init__(self, *args, **kwargs):
+            self.stdout = io.BytesIO("".join(f"line {i}\n" for i in range(1000)).encode())
+
+        def wait(self):
+            return 0
+
+    monkeypatch.setattr("quran_segmenter.pipeline.rabtize.subprocess.Popen", _FakeProcess)
+
+    output = rp._run_rabtize_with_progress(["align"], "test")
+    lines = output.splitlines()
+    assert len(lines) == RabtizeProcessor.OUTPUT_TAIL_LINES
+    assert lines[-1] == "line 999"
+
+
+def test_run_rabtize_in_process(monkeypatch, temp_config):
+    package = temp_config.rabtize_dir / "rabtize"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "main.py").write_text(
+        "import sys\n"
+        "from pathlib import Path\n"
+        "if __name__ == '__main__':\n"
+        "    Path(sys.argv[-1]).write_text(' '.join(sys.argv[1:-1]))\n"
+        "    if 'fail' in sys.argv:\n"
+        "        sys.exit(2)\n"
+    )
+    monkeypatch.delitem(sys.modules, "rabtize", raising=False)
+    monkeypatch.delitem(sys.modules, "rabtize.main", raising=False)
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    temp_config.rabtize.in_process = True
+    rp = RabtizeProcessor(temp_config, cache=CacheManager(temp_config.cache_dir))
+
+    output = temp_config.cache_dir / "out.txt"
+    rp._run_rabtize_with_progress(["align", str(output)], "test")
+    assert output.read_text() == "align"
+
+    with pytest.raises(RabtizeError):
+        rp._run_rabtize_with_progress(["fail", str(output)], "test")
+
+
+@pytest.mark.slow
+def test_run_rabtize_in_persistent_worker(temp_config):
+    package = temp_config.rabtize_dir / "rabtize"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "main.py").write_text(
+        "import os, sys\n"
+        "if __name__ == '__main__':\n"
+        "    print('Loading model')\n"
+        "    print(f'pid {os.getpid()}')\n"
+        "    if 'fail' in sys.argv:\n"
+        "        sys.exit(3)\n"
+    )
+    temp_config.rabtize.worker = True
+    rp = RabtizeProcessor(temp_config, cache=CacheManager(temp_config.cache_dir))
+    try:
+        first = rp._run_rabtize_with_progress(["align"], "test")
+        second = rp._run_rabtize_with_progress(["align"], "test")
+        assert "Loading model" in first
+        # Both commands ran in the same process
+        pids = [line for out in (first, second) for line in out.splitlines() if line.startswith("pid")]
+        assert len(pids) == 2 and pids[0] == pids[1]
+
+        with pytest.raises(RabtizeError, match="exit code 3"):
+            rp._run_rabtize_with_progress(["fail"], "test")
+        assert rp._worker.poll() is None
+    finally:
+        rp.stop_worker()
+    assert rp._worker is None
+
+
+@pytest.mark.slow
+def test_hung_worker_command_times_out(temp_config):
+    package = temp_config.rabtize_dir / "rabtize"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "main.py").write_text(
+        "import time\n"
+        "if __name__ == '__main__':\n"
+        "    time.sleep(60)\n"
+    )
+    temp_config.rabtize.worker = True
+    rp = RabtizeProcessor(temp_config, cache=CacheManager(temp_config.cache_dir))
+    try:
+        with pytest.raises(RabtizeError, match="timed out"):
+            rp._run_rabtize_with_progress(["align"], "test", timeout=1)
+        assert rp._worker is None
+    finally:
+        rp.stop_worker()
+
+
+def test_filter_alignment_keeps_range_in_order():
+    alignment = {f"2:{v}": {"segments": []} for v in range(1, 287)}
+    vr = VerseRange.parse("2:5-7")
+
+    filtered = RabtizeProcessor._filter_alignment(alignment, vr)
+    assert list(filtered) == ["2:5", "2:6", "2:7"]
+
+    small = {"2:6": {}, "3:1": {}}
+    assert list(RabtizeProcessor._filter_alignment(small, vr)) == ["2:6"]
+
+
+def test_generate_segment_embeddings_batch_skips_existing(monkeypatch, temp_config, make_translation_file):
+    for tid in ("en-a", "en-b"):
+        source = make_translation_file(segmented=True, name=tid)
+        temp_config.register_translation(tid, "Test", "en", source)
+    (temp_config.embeddings_dir / "en-a.npz").write_text("existing")
+    rp = RabtizeProcessor(temp_config, cache=CacheManager(temp_config.cache_dir))
+    runs = []
+
+    def _fake_run(args, desc, timeout=0):
+        output = Path(args[4])
+        output.write_text("segments")
+        runs.append(output.stem)
+        return ""
+
+    monkeypatch.setattr(rp, "_run_rabtize_with_progress", _fake_run)
+    results = rp.generate_segment_embeddings_batch(["en-a", "en-b", "en-b"])
+
+    assert runs == ["en-b"]
+    assert set(results) == {"en-a", "en-b"}
+    assert all(p.exists() for p in results.values())
+
+
+def test_segment_embeddings_regenerate_only_when_translation_changes(monkeypatch, temp_config, make_translation_file):
+    source = make_translation_file(segmented=True)
+    tc = temp_config.register_translation("en-test", "Test", "en", source)
+    temp_config.update_translation(tc.id, is_segmented=True)
+    rp = RabtizeProcessor(temp_config, cache=CacheManager(temp_config.cache_dir))
+    runs = []
+
+    def _fake_run(args, desc, timeout=0):
+        Path(args[4]).write_text("segments")
+        runs.append(args[4])
+        return ""
+
+    monkeypatch.setattr(rp, "_run_rabtize_with_progress", _fake_run)
+    output = rp.generate_segment_embeddings(tc.id)
+    assert Path(str(output) + ".digest").exists()
+
+    rp.generate_segment_embeddings(tc.id)
+    assert len(runs) == 1
+
+    segmented = temp_config.get_translation(tc.id).get_segmented_path() or source
+    segmented.write_text(segmented.read_text().replace("}", ', "edited": 1}', 1))
+    rp.generate_segment_embeddings(tc.id)
+    assert rp.generate_segment_embeddings_batch([tc.id]) == {tc.id: output}
+    assert len(runs) == 2
+
+
+def test_is_ready_shares_exists_cache(temp_config, make_translation_file):
+    source = make_translation_file(segmented=True)
+    tc = temp_config.register_translation("en-test", "Test", "en", source)
+    rp = RabtizeProcessor(temp_config, cache=CacheManager(temp_config.cache_dir))
+
+    exists_cache = {}
+    ready, missing = rp.is_ready(tc.id, exists_cache=exists_cache)
+    assert not ready and missing == ["spans embeddings", "segment embeddings"]
+    assert exists_cache == {str(temp_config.spans_embeddings_path): False}
+
+
+def test_align_memoizes_full_alignment_in_memory(monkeypatch, temp_config, make_translation_file):
+    source = make_translation_file(segmented=True)
+    tc = temp_config.register_translation("en-test", "Test", "en", source)
+    spans = temp_config.spans_embeddings_path
+    spans.write_text("spans")
+    emb = temp_config.embeddings_dir / f"{tc.id}.npz"
+    emb.write_text("segments")
+    temp_config.update_translation(tc.id, embeddings_path=emb)
+
+    rp = RabtizeProcessor(temp_config, cache=CacheManager(temp_config.cache_dir))
+
+    def _fake_run(args, desc, timeout=0):
+        Path(args[-1]).write_text(json.dumps({"1:1": {"segments": []}, "1:2": {"segments": []}}))
+        return ""
+
+    monkeypatch.setattr(rp, "_run_rabtize_with_progress", _fake_run)
+    rp.align(tc.id, verse_range=VerseRange.parse("1:1"))
+
+    # Served from memory even if the on-disk cache disappears
+    rp.cache.get_alignment_path(tc.id, "all").unlink()
+    assert list(rp.align(tc.id, verse_range=VerseRange.parse("1:2"))) == ["1:2"]
+    assert list(rp.align(tc.id)) == ["1:1", "1:2"]
+
+    # Re-generated embeddings invalidate the in-memory copy
+    os.utime(emb, ns=(0, 0))
+    monkeypatch.setattr(rp, "_run_rabtize_with_progress", lambda *a, **k: "")
+    with pytest.raises(RabtizeError):
+        rp.align(tc.id, verse_range=VerseRange.parse("1:2"))
+
+
+def test_stage_file_links_and_follows_replaced_source(temp_config, tmp_path):
+    rp = RabtizeProcessor(temp_config, cache=CacheManager(temp_config.cache_dir))
+    src = tmp_path / "en.json"
+    src.write_text('{"1:1": {"text": "a"}}')
+
+    staged = rp._stage_file(src)
+    assert staged == temp_config.rabtize_dir / "en.json"
+    assert staged.read_text() == src.read_text()
+
+    # Jumlize swaps its output in with os.replace; restaging picks up the new file
+    replacement = tmp_path / "en.tmp"
+    replacement.write_text('{"1:1": {"text": "b"}}')
+    os.replace(replacement, src)
+    assert rp._stage_file(src).read_text() == '{"1:1": {"text": "b"}}'
+
+
+def test_iter_output_lines_splits_across_chunks_and_carriage_returns(monkeypatch):
+    monkeypatch.setattr(rabtize_module, "OUTPUT_READ_SIZE", 7)
+    pipe = io.BytesIO("Loading\r\n 10%|#\r 50%|##\rdone ✓\npartial".encode())
+
+    assert list(rabtize_module._iter_output_lines(pipe)) == [
+        "Loading", " 10%|#", " 50%|##", "done ✓", "partial"
+    ]
+
+
+@pytest.mark.skipif(not hasattr(os, "posix_fadvise"), reason="posix_fadvise unavailable")
+def test_prefetch_advises_willneed(monkeypatch, tmp_path):
+    target = tmp_path / "spans.npz"
+    target.write_bytes(b"x" * 4096)
+    advised = []
+    monkeypatch.setattr(rabtize_module.os, "posix_fadvise", lambda fd, off, length, advice: advised.append(advice))
+
+    assert rabtize_module._prefetch(target)
+    assert advised == [os.POSIX_FADV_WILLNEED]
+    assert not rabtize_module._prefetch(tmp_path / "missing.npz")
+
+
+def test_atexit_hook_is_held_only_while_a_worker_runs(monkeypatch, temp_config):
+    cache = CacheManager(temp_config.cache_dir)
+    hooks = []
+    monkeypatch.setattr(rabtize_module.atexit, "register", hooks.append)
+    monkeypatch.setattr(rabtize_module.atexit, "unregister", hooks.remove)
+
+    class FakeWorker:
+        stdin = stdout = None
+
+        def poll(self):
+            return 0
+
+    monkeypatch.setattr(rabtize_module.subprocess, "Popen", lambda *a, **kw: FakeWorker())
+    rp = RabtizeProcessor(temp_config, cache=cache)
+    assert hooks == []
+
+    rp._ensure_worker()
+    assert hooks == [rp.stop_worker]
+    rp.stop_worker()
+    assert hooks == []
@@ -0,0 +1,45 @@
+import pytest
+
+from quran_segmenter.utils import rate_limit
+from quran_segmenter.utils.rate_limit import TokenBucket, backoff_delay, is_rate_limited
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_paces_after_burst(monkeypatch):
+    clock = _FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_limit.time, "sleep", clock.sleep)
+
+    bucket = TokenBucket(rate_per_minute=60, capacity=2)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(1.0)
+    clock.now += 5  # refill is capped at capacity
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(1.0)
+
+
+def test_token_bucket_rejects_oversized_requests():
+    with pytest.raises(ValueError):
+        TokenBucket(rate_per_minute=10, capacity=1).acquire(2)
+
+
+def test_rate_limit_classification_and_backoff():
+    assert is_rate_limited("googleapi: Error 429: Too Many Requests")
+    assert is_rate_limited("RESOURCE_EXHAUSTED: quota exceeded")
+    assert not is_rate_limited("invalid API key")
+    assert 2 <= backoff_delay(0) <= 4
+    assert 6 <= backoff_delay(2) <= 12
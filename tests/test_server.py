@@ -0,0 +1,192 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+
+import pytest
+
+from quran_segmenter.utils import server as server_module
+from quran_segmenter.utils.server import LafzizeServer
+
+
+class _FakeProcess:
+    def __init__(self, alive=True):
+        self.alive = alive
+
+    def poll(self):
+        return None if self.alive else 1
+
+
+@pytest.fixture
+def lafzize_server(tmp_path, monkeypatch):
+    monkeypatch.setattr(server_module, "LOG_POLL_INTERVAL", 0.01)
+    srv = LafzizeServer(tmp_path)
+    srv._log_file = tmp_path / "server.log"
+    srv._log_file.write_bytes(b"INFO:     Started server process\n")
+    return srv
+
+
+def test_wait_for_ready_confirms_once_after_startup_line(lafzize_server):
+    lafzize_server._process = _FakeProcess()
+    with open(lafzize_server._log_file, "ab") as f:
+        f.write(b"INFO:     Application startup complete.\n")
+    checks = []
+    lafzize_server.is_running = lambda: checks.append(1) or True
+
+    assert lafzize_server.wait_for_ready(timeout=5)
+    assert checks == [1]
+
+
+def test_wait_for_ready_returns_fast_when_process_dies(lafzize_server):
+    lafzize_server._process = _FakeProcess(alive=False)
+    lafzize_server.is_running = lambda: pytest.fail("no HTTP check for a dead server")
+
+    assert not lafzize_server.wait_for_ready(timeout=5)
+
+
+def test_wait_for_ready_polls_without_log(tmp_path, monkeypatch):
+    srv = LafzizeServer(tmp_path)
+    srv._port_open = lambda: True
+    srv.is_running = lambda: True
+    monkeypatch.setattr(srv, "_wait_for_log_marker", lambda deadline: pytest.fail("no log to tail"))
+
+    assert srv.wait_for_ready(timeout=5)
+
+
+def test_wait_for_ready_polls_with_backoff(tmp_path, monkeypatch):
+    srv = LafzizeServer(tmp_path)
+    checks = iter([False] * 8 + [True])
+    srv._port_open = lambda: next(checks)
+    srv.is_running = lambda: True
+    sleeps = []
+    monkeypatch.setattr(server_module.time, "sleep", sleeps.append)
+
+    assert srv.wait_for_ready(timeout=60)
+    assert sleeps[0] == pytest.approx(server_module.POLL_INITIAL_DELAY, abs=0.01)
+    assert sleeps == sorted(sleeps)
+    assert max(sleeps) <= server_module.POLL_MAX_DELAY
+
+
+def test_is_running_reuses_one_session_until_stopped(tmp_path, monkeypatch):
+    srv = LafzizeServer(tmp_path)
+    session = srv._get_session()
+    assert srv._get_session() is session
+
+    class _Response:
+        status_code = 422
+
+    monkeypatch.setattr(session, "post", lambda *args, **kwargs: _Response())
+    assert srv.is_running()
+
+    srv.stop()
+    assert srv._session is None
+    assert srv._get_session() is not session
+
+
+def test_port_probe_skips_http_until_something_listens(tmp_path):
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    port = listener.getsockname()[1]
+    srv = LafzizeServer(tmp_path, port=port)
+    srv.is_running = lambda: pytest.fail("no HTTP check while the port is closed")
+    try:
+        assert not srv._port_open()
+        assert not srv.wait_for_ready(timeout=0.2)
+        listener.listen()
+        assert srv._port_open()
+    finally:
+        listener.close()
+
+
+def test_kill_port_lsof_fallback_signals_in_process(tmp_path, monkeypatch):
+    srv = LafzizeServer(tmp_path)
+    monkeypatch.setattr(server_module.sys, "platform", "darwin")
+    commands = []
+
+    def fake_run(cmd, **kwargs):
+        commands.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stdout=f"123\n{os.getpid()}\n456\n")
+
+    killed = []
+    monkeypatch.setattr(server_module.subprocess, "run", fake_run)
+    monkeypatch.setattr(server_module.os, "kill", lambda pid, sig: killed.append(pid))
+
+    assert srv._kill_port()
+    assert [c[0] for c in commands] == ["lsof"]
+    assert sorted(killed) == [123, 456]
+
+
+@pytest.mark.parametrize("log_file", ["server.log", None])
+def test_start_sends_output_to_log_file_or_devnull(tmp_path, monkeypatch, log_file):
+    srv = LafzizeServer(tmp_path, log_file=tmp_path / log_file if log_file else None)
+    srv._port_open = lambda: False
+    srv._kill_port = lambda: False
+    launched = []
+
+    def fake_popen(cmd, cwd, stdout, stderr):
+        launched.append((stdout, stderr))
+        return _FakeProcess()
+
+    monkeypatch.setattr(server_module.subprocess, "Popen", fake_popen)
+    assert srv.start(wait=False)
+    stdout, stderr = launched[0]
+    assert stdout is stderr
+    if log_file:
+        assert stdout.name == str(tmp_path / log_file) and stdout.closed
+    else:
+        assert stdout == subprocess.DEVNULL
+        assert srv.get_log() == ""
+    srv._started_by_us = False
+
+
+@pytest.mark.slow
+def test_import_defers_requests():
+    code = (
+        "import sys, quran_segmenter.utils.server, quran_segmenter.utils.cache; "
+        "assert 'requests' not in sys.modules; "
+        "assert 'concurrent.futures' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_star_import_from_utils_exposes_lazy_names():
+    namespace = {}
+    exec("from quran_segmenter.utils import *", namespace)
+    assert namespace["LafzizeServer"] is LafzizeServer
+    assert {"CacheManager", "parse_verse_spec", "load_quran_metadata"} <= set(namespace)
+
+
+@pytest.mark.slow
+def test_stop_kills_a_server_that_ignores_sigterm(tmp_path, monkeypatch):
+    monkeypatch.setattr(server_module, "STOP_TIMEOUT", 0.5)
+    srv = LafzizeServer(tmp_path)
+    srv._process = subprocess.Popen([
+        sys.executable, "-c",
+        "import signal, sys, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); "
+        "print('ready', flush=True); time.sleep(30)",
+    ], stdout=subprocess.PIPE)
+    srv._process.stdout.readline()
+    srv._started_by_us = True
+    process = srv._process
+
+    srv.stop()
+    assert process.returncode == -signal.SIGKILL
+    process.stdout.close()
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads /proc")
+def test_pids_bound_to_port_finds_listening_process():
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    port = listener.getsockname()[1]
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"], pass_fds=(listener.fileno(),))
+    try:
+        # Our own process is never reported, only the child sharing the socket
+        assert server_module._pids_bound_to_port(port) == {child.pid}
+    finally:
+        child.kill()
+        child.wait()
+        listener.close()
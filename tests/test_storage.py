@@ -0,0 +1,245 @@
+import asyncio
+import os
+
+from quran_segmenter.utils import storage
+from quran_segmenter.utils.storage import clone_file, link_or_copy, sync_path, sync_path_async
+
+
+def test_sync_path_copies_only_missing_or_newer(tmp_path):
+    src = tmp_path / "src"
+    (src / "nested").mkdir(parents=True)
+    (src / "a.json").write_text("a")
+    (src / "nested" / "b.npz").write_text("b")
+    dst = tmp_path / "dst"
+
+    assert sync_path(src, dst) == 2
+    assert (dst / "nested" / "b.npz").read_text() == "b"
+
+    # Unchanged tree: nothing to copy
+    assert sync_path(src, dst) == 0
+
+    (src / "a.json").write_text("a2")
+    os.utime(src / "a.json", ns=(0, 10**19))
+    assert sync_path(src, dst) == 1
+    assert (dst / "a.json").read_text() == "a2"
+
+
+def test_sync_path_single_file_and_missing_source(tmp_path):
+    src = tmp_path / "config.json"
+    src.write_text("{}")
+
+    assert sync_path(src, tmp_path / "out" / "config.json") == 1
+    assert sync_path(tmp_path / "missing", tmp_path / "out" / "missing") == 0
+
+
+def test_sync_path_isolates_failed_copies(monkeypatch, tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    for name in ("a", "b", "c"):
+        (src / name).write_text(name)
+
+    real_copy = storage._fast_copy
+
+    def _flaky_copy(s, d):
+        if s.endswith("b"):
+            raise OSError("drive hiccup")
+        return real_copy(s, d)
+
+    monkeypatch.setattr(storage, "_fast_copy", _flaky_copy)
+
+    assert sync_path(src, tmp_path / "dst") == 2
+    assert sorted(p.name for p in (tmp_path / "dst").iterdir()) == ["a", "c"]
+
+
+def test_clone_file_falls_back_to_copy(tmp_path):
+    src = tmp_path / "words.json"
+    src.write_text('{"1:1:1": {}}')
+    os.utime(src, ns=(0, 10**18))
+    dst = tmp_path / "lafzize" / "words.json"
+    dst.parent.mkdir()
+
+    clone_file(src, dst)
+
+    assert dst.read_text() == src.read_text()
+    assert dst.stat().st_mtime_ns == src.stat().st_mtime_ns
+
+
+def test_sync_path_watermarks_skip_unchanged_sources(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.npz").write_text("a")
+    dst = tmp_path / "dst"
+    watermarks = {}
+
+    assert sync_path(src, dst, watermarks=watermarks) == 1
+    assert watermarks == {str(src / "a.npz"): (src / "a.npz").stat().st_mtime}
+
+    # Matching watermark: dst is not consulted, so even a removed copy is skipped
+    (dst / "a.npz").unlink()
+    assert sync_path(src, dst, watermarks=watermarks) == 0
+
+    os.utime(src / "a.npz", ns=(0, 10**19))
+    assert sync_path(src, dst, watermarks=watermarks) == 1
+    assert (dst / "a.npz").read_text() == "a"
+
+
+def test_fast_copy_falls_back_to_copy2(monkeypatch, tmp_path):
+    src = tmp_path / "embeddings.npz"
+    src.write_bytes(b"x" * 4096)
+    os.utime(src, ns=(0, 10**18))
+    dst = tmp_path / "copy.npz"
+
+    def _unsupported(*args):
+        raise OSError("EXDEV")
+
+    monkeypatch.setattr(storage.os, "copy_file_range", _unsupported, raising=False)
+    storage._fast_copy(str(src), str(dst))
+
+    assert dst.read_bytes() == src.read_bytes()
+    assert dst.stat().st_mtime_ns == src.stat().st_mtime_ns
+
+
+def test_fast_copy_falls_back_when_copy_file_range_stops_early(monkeypatch, tmp_path):
+    src = tmp_path / "embeddings.npz"
+    src.write_bytes(b"x" * 4096)
+    dst = tmp_path / "copy.npz"
+
+    monkeypatch.setattr(storage.os, "copy_file_range", lambda *args: 0, raising=False)
+    storage._fast_copy(str(src), str(dst))
+
+    assert dst.read_bytes() == src.read_bytes()
+
+
+def test_link_or_copy_hardlinks_and_replaces_existing(tmp_path):
+    src = tmp_path / "words.json"
+    src.write_text("{}")
+    dst = tmp_path / "rabtize" / "words.json"
+    dst.parent.mkdir()
+    dst.write_text("stale")
+
+    link_or_copy(src, dst)
+    assert os.path.samefile(src, dst)
+
+    # Re-linking an already linked file is a no-op
+    link_or_copy(src, dst)
+    assert src.read_text() == "{}"
+
+
+def test_link_or_copy_falls_back_when_link_fails(monkeypatch, tmp_path):
+    src = tmp_path / "words.json"
+    src.write_text("{}")
+    dst = tmp_path / "words-copy.json"
+
+    def _no_link(*args):
+        raise OSError("EXDEV")
+
+    monkeypatch.setattr(storage.os, "link", _no_link)
+    link_or_copy(src, dst)
+
+    assert dst.read_text() == "{}"
+    assert not os.path.samefile(src, dst)
+
+
+def test_sync_path_async_matches_sync_path(tmp_path):
+    src = tmp_path / "src"
+    (src / "nested").mkdir(parents=True)
+    for name in ("a", "b", "nested/c"):
+        (src / name).write_text(name)
+    dst = tmp_path / "dst"
+    watermarks = {}
+
+    assert asyncio.run(sync_path_async(src, dst, concurrency=2, watermarks=watermarks)) == 3
+    assert (dst / "nested" / "c").read_text() == "nested/c"
+    assert len(watermarks) == 3
+    assert asyncio.run(sync_path_async(src, dst, watermarks=watermarks)) == 0
+
+
+def test_sync_path_creates_destination_dirs_only_when_copying(monkeypatch, tmp_path):
+    src = tmp_path / "src"
+    (src / "nested").mkdir(parents=True)
+    (src / "nested" / "a").write_text("a")
+    dst = tmp_path / "dst"
+    assert sync_path(src, dst) == 1
+
+    made = []
+    real_makedirs = storage.os.makedirs
+    monkeypatch.setattr(storage.os, "makedirs", lambda *a, **k: made.append(a) or real_makedirs(*a, **k))
+    assert sync_path(src, dst) == 0
+    assert made == []
+
+
+def test_storage_manager_sync_uses_fast_copy(monkeypatch, tmp_path):
+    local, drive = tmp_path / "local", tmp_path / "drive"
+    (drive / "embeddings").mkdir(parents=True)
+    (drive / "embeddings" / "en.npz").write_text("segments")
+    (drive / "config.json").write_text("{}")
+    stale = local / "embeddings" / "old.npz"
+    stale.parent.mkdir(parents=True)
+    stale.write_text("old")
+
+    copied = []
+    real = storage._fast_copy
+    monkeypatch.setattr(storage, "_fast_copy", lambda src, dst: copied.append(os.path.basename(dst)) or real(src, dst))
+
+    storage.StorageManager(local, drive_base=drive).sync_from_drive()
+
+    assert sorted(copied) == ["config.json", "en.npz"]
+    assert (local / "embeddings" / "en.npz").read_text() == "segments"
+    assert not stale.exists()
+
+
+def test_mirror_dir_copies_changes_and_prunes_orphans(monkeypatch, tmp_path):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    (src / "nested").mkdir(parents=True)
+    (src / "spans.npz").write_bytes(b"s" * 100)
+    (src / "nested" / "en.npz").write_text("en")
+
+    assert storage._mirror_dir(str(src), str(dst)) == 2
+    (dst / "orphan.npz").write_text("gone")
+    (dst / "old").mkdir()
+
+    def _no_copy(src, dst):
+        raise AssertionError(f"unexpected copy of {src}")
+
+    # Unchanged tree: no copies, orphans removed
+    monkeypatch.setattr(storage, "_fast_copy", _no_copy)
+    assert storage._mirror_dir(str(src), str(dst)) == 0
+    assert sorted(os.listdir(dst)) == ["nested", "spans.npz"]
+
+    monkeypatch.undo()
+    (src / "nested" / "en.npz").write_text("en, longer")
+    assert storage._mirror_dir(str(src), str(dst)) == 1
+    assert (dst / "nested" / "en.npz").read_text() == "en, longer"
+
+
+def test_load_config_copies_drive_version_only_when_newer(monkeypatch, tmp_path):
+    local, drive = tmp_path / "local", tmp_path / "drive"
+    drive.mkdir()
+    (drive / "config.json").write_text('{"v": "drive"}')
+    manager = storage.StorageManager(local, drive_base=drive)
+
+    assert manager.load_config() == {"v": "drive"}
+
+    def _no_copy(src, dst):
+        raise AssertionError(f"unexpected copy of {src}")
+
+    # Same mtime on both sides after the copy: no second copy
+    monkeypatch.setattr(storage, "_fast_copy", _no_copy)
+    assert manager.load_config() == {"v": "drive"}
+
+    assert storage.StorageManager(tmp_path / "empty").load_config() is None
+
+
+def test_save_embeddings_uploads_only_the_saved_file(tmp_path):
+    local, drive = tmp_path / "local", tmp_path / "drive"
+    drive.mkdir()
+    manager = storage.StorageManager(local, drive_base=drive)
+    (local / "embeddings").mkdir()
+    (local / "embeddings" / "unsynced.npz").write_text("x")
+    src = tmp_path / "en.npz"
+    src.write_text("segments")
+
+    manager.save_embeddings("en.npz", src)
+
+    assert os.listdir(drive / "embeddings") == ["en.npz"]
+    assert (drive / "embeddings" / "en.npz").read_text() == "segments"
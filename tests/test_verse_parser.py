@@ -4,6 +4,7 @@ from pathlib import Path
 import pytest
 
 from quran_segmenter.models import VerseRange, QuranMetadata
+from quran_segmenter.utils import verse_parser
 from quran_segmenter.utils.verse_parser import (
     SURAH_VERSE_COUNTS,
     load_quran_metadata,
@@ -28,9 +29,29 @@ def test_parse_full_surah_with_metadata(tmp_path):
     assert vr.start_verse == 1 and vr.end_verse == 3
 
 
+def test_parse_verse_spec_skips_empty_prefix_tokens():
+    vr = parse_verse_spec(" Taawwudh + +2:1 ")
+    assert vr.include_taawwudh and not vr.include_basmalah
+    assert parse_verse_spec("1:1+") == VerseRange.parse("1:1")
+    with pytest.raises(ValueError, match="Empty verse spec"):
+        parse_verse_spec(" + ")
+
+
+def test_parse_verse_spec_memoizes_but_returns_fresh_ranges():
+    verse_parser._split_verse_spec.cache_clear()
+    first = parse_verse_spec("basmalah+2:1-3")
+    first.include_basmalah = False
+    second = parse_verse_spec("basmalah+2:1-3")
+
+    assert second.include_basmalah and second is not first
+    assert verse_parser._split_verse_spec.cache_info().hits == 1
+
+
 def test_parse_non_contiguous_rejected():
     with pytest.raises(ValueError):
         parse_verse_spec("1:1,1:3")
+    with pytest.raises(ValueError, match="Non-contiguous"):
+        parse_verse_spec("1:1,3")
 
 
 def test_parse_unknown_prefix_rejected():
@@ -48,6 +69,16 @@ def test_validate_verse_range_checks_bounds():
     assert not ok and "exceeds" in msg
 
 
+def test_validate_verse_range_with_metadata():
+    metadata = QuranMetadata(surah_verse_counts={1: 7})
+    assert validate_verse_range(VerseRange(surah=1, start_verse=1, end_verse=7), metadata) == (True, "")
+    assert validate_verse_range(VerseRange(surah=2, start_verse=1, end_verse=1), metadata) == (
+        False, "Unknown surah: 2"
+    )
+    ok, msg = validate_verse_range(VerseRange(surah=1, start_verse=0, end_verse=9), metadata)
+    assert not ok and msg == "Start verse must be >= 1"
+
+
 def test_load_quran_metadata_fills_defaults(tmp_path):
     # Only supply partial data; loader should backfill missing surahs
     meta_path = tmp_path / "meta.json"
@@ -56,3 +87,31 @@ def test_load_quran_metadata_fills_defaults(tmp_path):
 
     assert meta.get_verse_count(1) == 2
     assert meta.get_verse_count(2) == SURAH_VERSE_COUNTS[2]
+
+
+def test_load_quran_metadata_memoizes_until_file_changes(monkeypatch, tmp_path):
+    meta_path = tmp_path / "meta.json"
+    meta_path.write_text(json.dumps({"2:1": {}, "2:2": {}}))
+    assert load_quran_metadata(meta_path).get_verse_count(2) == 2
+    # Nothing is written next to the user's file
+    assert list(tmp_path.iterdir()) == [meta_path]
+
+    def fail(path):
+        raise AssertionError("metadata JSON should not be parsed")
+
+    monkeypatch.setattr(QuranMetadata, "load", classmethod(lambda cls, path: fail(path)))
+    meta = load_quran_metadata(meta_path)
+    assert meta.get_verse_count(2) == 2
+    meta.surah_verse_counts[2] = 99  # callers get their own copy
+    assert load_quran_metadata(meta_path).get_verse_count(2) == 2
+
+    monkeypatch.undo()
+    meta_path.write_text(json.dumps({"2:1": {}, "2:2": {}, "2:3": {}}))
+    assert load_quran_metadata(meta_path).get_verse_count(2) == 3
+
+
+def test_star_import_exposes_only_public_api():
+    namespace = {}
+    exec("from quran_segmenter.utils.verse_parser import *", namespace)
+    names = set(namespace) - {"__builtins__"}
+    assert names == {"SURAH_VERSE_COUNTS", "load_quran_metadata", "parse_verse_spec", "validate_verse_range"}